@@ -1,75 +1,356 @@
-"""Analytics and Metrics Tracking for Service Performance"""
-from datetime import datetime
-from typing import Dict, List
-
-ANALYTICS = {
-    "total_conversations": 0,
-    "total_orders": 0,
-    "total_revenue": 0,
-    "avg_order_value": 0,
-    "conversion_rate": 0,
-    "cart_abandonment": 0,
-    "popular_products": {},
-    "customer_satisfaction": [],
-    "agent_performance": {
-        "recommendation_agent": 0,
-        "inventory_agent": 0,
-        "payment_agent": 0,
-        "loyalty_agent": 0,
-        "fulfillment_agent": 0,
-        "support_agent": 0
+"""Analytics and Metrics Tracking for Service Performance
+
+Each thread counts into its own shard, so tracking an event touches no lock
+and no shared dict. Ratings and order values are streamed into fixed-bucket
+histograms (count, sum, buckets) instead of growing lists, and service views
+into heavy-hitter sketches (see heavy_hitters). A background
+flusher writes this process's shard totals to ANALYTICS_DIR/<pid>.json, and
+the aggregating process (the server) merges every process's file into one
+snapshot on the same interval, so get_metrics only formats that snapshot.
+Shard files carry a SHARD_FORMAT number; files in any other format, or that
+cannot be read, are skipped.
+
+Run `python analytics_tracker.py` to benchmark tracking and get_metrics.
+"""
+import atexit
+import json
+import os
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from heavy_hitters import ServiceViews
+
+ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", "analytics")
+ANALYTICS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_FLUSH_SECONDS", "5"))
+
+AGENTS = (
+    "recommendation_agent",
+    "inventory_agent",
+    "payment_agent",
+    "loyalty_agent",
+    "fulfillment_agent",
+    "support_agent",
+)
+RATING_BOUNDS = (1, 2, 3, 4, 5)
+ORDER_VALUE_BOUNDS = (100, 500, 1000, 5000, 10000, 50000)  # ₹ upper bounds; the last bucket is open
+# Shard file of processes that have exited, so their counts survive without one file per dead pid
+RETIRED = "retired"
+# Version of the shard file layout; bump it when MetricsShard.to_dict changes
+SHARD_FORMAT = 1
+# What a shard file can hold that does not fit it
+SHARD_ERRORS = (ValueError, KeyError, TypeError, IndexError, AttributeError)
+
+
+class Histogram:
+    """Count, sum and bucket counts of a stream of values."""
+
+    __slots__ = ("bounds", "counts", "count", "total")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "total": self.total, "counts": list(self.counts)}
+
+    def merge(self, data: dict):
+        self.count += data["count"]
+        self.total += data["total"]
+        for i, count in enumerate(data["counts"]):
+            self.counts[i] += count
+
+
+class MetricsShard:
+    """One thread's counters; only its own thread ever writes to it."""
+
+    __slots__ = ("conversations", "orders", "revenue", "cart_abandonment", "agent_calls",
+                 "satisfaction", "order_values", "service_views")
+
+    def __init__(self):
+        self.conversations = 0
+        self.orders = 0
+        self.revenue = 0.0
+        self.cart_abandonment = 0
+        self.agent_calls = [0] * len(AGENTS)
+        self.satisfaction = Histogram(RATING_BOUNDS)
+        self.order_values = Histogram(ORDER_VALUE_BOUNDS)
+        self.service_views = ServiceViews()
+
+    def to_dict(self) -> dict:
+        return {
+            "format": SHARD_FORMAT,
+            "conversations": self.conversations,
+            "orders": self.orders,
+            "revenue": self.revenue,
+            "cart_abandonment": self.cart_abandonment,
+            "agent_calls": list(self.agent_calls),
+            "satisfaction": self.satisfaction.to_dict(),
+            "order_values": self.order_values.to_dict(),
+            "service_views": self.service_views.to_dict(),
+        }
+
+    def merge(self, data: dict):
+        self.conversations += data["conversations"]
+        self.orders += data["orders"]
+        self.revenue += data["revenue"]
+        self.cart_abandonment += data["cart_abandonment"]
+        for i, count in enumerate(data["agent_calls"]):
+            self.agent_calls[i] += count
+        self.satisfaction.merge(data["satisfaction"])
+        self.order_values.merge(data["order_values"])
+        self.service_views.merge(data["service_views"])
+
+
+_local = threading.local()
+_shards: List[MetricsShard] = []  # every thread's shard in this process
+_shards_lock = threading.Lock()  # taken only when a thread creates its shard
+_snapshot: Optional[dict] = None  # formatted metrics from the last aggregation
+_flusher: Optional[threading.Thread] = None
+
+
+def _shard() -> MetricsShard:
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = _local.shard = MetricsShard()
+        with _shards_lock:
+            _shards.append(shard)
+        return shard
+
+
+def _process_totals() -> MetricsShard:
+    """This process's counts summed over its thread shards."""
+    totals = MetricsShard()
+    with _shards_lock:
+        shards = list(_shards)
+    for shard in shards:
+        totals.merge(shard.to_dict())
+    return totals
+
+
+def _write_shard(name: str, data: dict):
+    path = os.path.join(ANALYTICS_DIR, f"{name}.json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _read_shard(name: str) -> Optional[MetricsShard]:
+    """A shard file's counts, or None if it is missing or cannot be read."""
+    try:
+        with open(os.path.join(ANALYTICS_DIR, f"{name}.json")) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Skipping unreadable analytics shard {name}: {e!r}")
+        return None
+    # Merge into a fresh shard, so a malformed file cannot leave totals half-merged
+    shard = MetricsShard()
+    try:
+        if data.get("format") != SHARD_FORMAT:
+            raise ValueError(f"unknown shard format {data.get('format')!r}")
+        shard.merge(data)
+    except SHARD_ERRORS as e:
+        logger.warning(f"Skipping malformed analytics shard {name}: {e!r}")
+        return None
+    return shard
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def flush():
+    """Write this process's totals to its shard file."""
+    os.makedirs(ANALYTICS_DIR, exist_ok=True)
+    _write_shard(str(os.getpid()), _process_totals().to_dict())
+
+
+def aggregate() -> dict:
+    """Merge every process's shard file into a fresh metrics snapshot.
+
+    Files left by processes that have exited are folded into the retired
+    shard and removed, so the directory holds one file per live process.
+    """
+    global _snapshot
+    os.makedirs(ANALYTICS_DIR, exist_ok=True)
+    own_pid = os.getpid()
+    totals = _process_totals()
+    retired = _read_shard(RETIRED)
+    folded = False
+    for filename in os.listdir(ANALYTICS_DIR):
+        name, ext = os.path.splitext(filename)
+        if ext != ".json" or not name.isdigit() or int(name) == own_pid:
+            continue
+        shard = _read_shard(name)
+        if _alive(int(name)):
+            if shard is not None:
+                totals.merge(shard.to_dict())
+            continue
+        # An exited process's file that cannot be read never will be; drop it
+        if shard is not None:
+            if retired is None:
+                retired = MetricsShard()
+            retired.merge(shard.to_dict())
+            _write_shard(RETIRED, retired.to_dict())
+        os.remove(os.path.join(ANALYTICS_DIR, filename))
+        folded = True
+    if retired is not None:
+        totals.merge(retired.to_dict())
+    if folded:
+        logger.debug("Folded analytics shards of exited processes")
+    _snapshot = _format(totals)
+    return _snapshot
+
+
+def _format(totals: MetricsShard) -> Dict:
+    conversion_rate = totals.orders / totals.conversations * 100 if totals.conversations else 0
+    return {
+        "total_conversations": totals.conversations,
+        "total_orders": totals.orders,
+        "total_revenue": f"₹{totals.revenue:.2f}",
+        "avg_order_value": f"₹{totals.order_values.mean:.2f}",
+        "conversion_rate": f"{conversion_rate:.2f}%",
+        "cart_abandonment": totals.cart_abandonment,
+        "avg_satisfaction": f"{totals.satisfaction.mean:.2f}/5",
+        "satisfaction_ratings": {str(rating): count for rating, count in zip(RATING_BOUNDS, totals.satisfaction.counts)},
+        "top_services": totals.service_views.top(5),
+        "agent_performance": dict(zip(AGENTS, totals.agent_calls)),
     }
-}
+
+
+def _flush_loop(aggregating: bool, interval: float, stop: threading.Event):
+    while not stop.wait(interval):
+        try:
+            aggregate() if aggregating else flush()
+        except Exception:
+            # Never let the thread die; the next interval tries again
+            logger.exception("Analytics flush failed")
+
 
 class AnalyticsTracker:
+    @staticmethod
+    def start(aggregate: bool = False, interval: float = ANALYTICS_FLUSH_SECONDS):
+        """Start the background flusher for this process.
+
+        Bot processes flush their own shard; the server passes aggregate=True
+        to also merge every process's shard into the get_metrics snapshot.
+        """
+        global _flusher
+        if _flusher is not None:
+            return
+        stop = threading.Event()
+        _flusher = threading.Thread(
+            target=_flush_loop, args=(aggregate, interval, stop), name="analytics-flush", daemon=True
+        )
+        _flusher.start()
+
+        def final_flush():
+            stop.set()
+            try:
+                flush()
+            except Exception:
+                logger.exception("Final analytics flush failed")
+
+        atexit.register(final_flush)
+
     @staticmethod
     def track_conversation_start():
         """Track new conversation"""
-        ANALYTICS["total_conversations"] += 1
-    
+        _shard().conversations += 1
+
     @staticmethod
     def track_order(order_value: float):
         """Track completed order"""
-        ANALYTICS["total_orders"] += 1
-        ANALYTICS["total_revenue"] += order_value
-        ANALYTICS["avg_order_value"] = ANALYTICS["total_revenue"] / ANALYTICS["total_orders"]
-        ANALYTICS["conversion_rate"] = (ANALYTICS["total_orders"] / ANALYTICS["total_conversations"]) * 100
-    
+        shard = _shard()
+        shard.orders += 1
+        shard.revenue += order_value
+        shard.order_values.observe(order_value)
+
     @staticmethod
-    def track_product_view(sku: str):
-        """Track product views"""
-        if sku not in ANALYTICS["popular_products"]:
-            ANALYTICS["popular_products"][sku] = 0
-        ANALYTICS["popular_products"][sku] += 1
-    
+    def track_service_view(service_id: str):
+        """Track service views"""
+        _shard().service_views.add(service_id)
+
     @staticmethod
     def track_agent_call(agent_name: str):
         """Track worker agent usage"""
-        if agent_name in ANALYTICS["agent_performance"]:
-            ANALYTICS["agent_performance"][agent_name] += 1
-    
+        if agent_name in AGENTS:
+            _shard().agent_calls[AGENTS.index(agent_name)] += 1
+
     @staticmethod
     def track_cart_abandonment():
         """Track cart abandonment"""
-        ANALYTICS["cart_abandonment"] += 1
-    
+        _shard().cart_abandonment += 1
+
     @staticmethod
     def track_satisfaction(rating: int):
         """Track customer satisfaction (1-5)"""
-        ANALYTICS["customer_satisfaction"].append(rating)
-    
+        _shard().satisfaction.observe(rating)
+
     @staticmethod
     def get_metrics() -> Dict:
-        """Get current analytics"""
-        avg_satisfaction = sum(ANALYTICS["customer_satisfaction"]) / len(ANALYTICS["customer_satisfaction"]) if ANALYTICS["customer_satisfaction"] else 0
-        
-        return {
-            "total_conversations": ANALYTICS["total_conversations"],
-            "total_orders": ANALYTICS["total_orders"],
-            "total_revenue": f"₹{ANALYTICS['total_revenue']:.2f}",
-            "avg_order_value": f"₹{ANALYTICS['avg_order_value']:.2f}",
-            "conversion_rate": f"{ANALYTICS['conversion_rate']:.2f}%",
-            "avg_satisfaction": f"{avg_satisfaction:.2f}/5",
-            "top_products": sorted(ANALYTICS["popular_products"].items(), key=lambda x: x[1], reverse=True)[:5],
-            "agent_performance": ANALYTICS["agent_performance"]
-        }
+        """Get analytics as of the last aggregation, across every process"""
+        return _snapshot if _snapshot is not None else aggregate()
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    ANALYTICS_DIR = tempfile.mkdtemp(prefix="analytics-")
+    EVENTS = 1_000_000
+    rng = random.Random(19)
+    ratings = [rng.randint(1, 5) for _ in range(EVENTS)]
+
+    def track(count: int):
+        for i in range(count):
+            AnalyticsTracker.track_conversation_start()
+            AnalyticsTracker.track_satisfaction(ratings[i])
+            AnalyticsTracker.track_agent_call(AGENTS[i % len(AGENTS)])
+            AnalyticsTracker.track_service_view(f"SVC{ratings[i] * ratings[i - 1]:03d}")
+            if i % 4 == 0:
+                AnalyticsTracker.track_order(ratings[i] * 700.0)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(track, [EVENTS // 4] * 4))
+    elapsed = time.perf_counter() - start
+    print(f"{EVENTS:,} conversations over 4 threads: {elapsed / EVENTS * 1e6:.2f} µs per conversation (4-5 events)")
+
+    # A second process that has since exited
+    _write_shard("999999999", _process_totals().to_dict())
+    start = time.perf_counter()
+    metrics = aggregate()
+    print(f"aggregate (own shards + 1 exited process): {(time.perf_counter() - start) * 1000:.2f} ms, "
+          f"files left: {sorted(os.listdir(ANALYTICS_DIR))}")
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        AnalyticsTracker.get_metrics()
+    print(f"get_metrics: {(time.perf_counter() - start) / 100_000 * 1e9:.0f} ns")
+    print(metrics)
@@ -7,21 +7,34 @@ It includes:
 - Speech-to-speech using the Gemini Multimodal Live API
 - Transcription using Gemini's generate_content API
 - RTVI client/server events
+
+Only what every session needs is imported up front: the Silero VAD is
+imported and loaded in a worker thread while the bot joins its room, and the
+Daily REST helper only when a room is configured from the command line. Run
+with --profile-startup to log where startup time goes.
 """
+from startup_profile import STARTUP
 
+import argparse
 import asyncio
+import copy
+from contextlib import nullcontext
+import json
 from datetime import date
-import sys
 import os
+import time
 
 import aiohttp
-from requests import get
 from loguru import logger
-from runner import configure
+STARTUP.mark("import stdlib, aiohttp, loguru")
 
-from pipecat.audio.vad.silero import SileroVADAnalyzer
-from pipecat.audio.vad.vad_analyzer import VADParams
-from pipecat.frames.frames import Frame, EndFrame, TranscriptionFrame
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    EndFrame,
+    Frame,
+    TranscriptionFrame,
+    UserStoppedSpeakingFrame,
+)
 from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
@@ -33,18 +46,27 @@ from pipecat.processors.frameworks.rtvi import (
     RTVISpeakingProcessor,
     RTVIUserTranscriptionProcessor,
 )
+STARTUP.mark("import pipecat pipeline")
 from pipecat.services.gemini_multimodal_live.gemini import GeminiMultimodalLiveLLMService
+STARTUP.mark("import Gemini Live service")
 from pipecat.transports.services.daily import DailyParams, DailyTransport
-from helper_functions import *
-from worker_agents import *
-from edge_case_handlers import *
-from session_manager import SessionManager
-from fuzzywuzzy import fuzz
+STARTUP.mark("import Daily transport")
+import tool_registry
+from context_window import ContextWindowManager
+from analytics_tracker import AnalyticsTracker
+from metrics import TIME_TO_FIRST_AUDIO, TURN_LATENCY, report_to_server
+from tool_tracing import instrument
+from log_config import configure_logging
 from dotenv import load_dotenv
 
-logger.remove(0)
-logger.add(sys.stderr, level="DEBUG")
 load_dotenv()
+configure_logging()
+
+# Function declarations are built once per process and shared read-only by
+# every session it runs.
+TOOLS = tool_registry.build()
+STARTUP.mark("import handlers, build tool declarations")
+
 
 class UserTranscriptionFrameFilter(FrameProcessor):
     """Filter out UserTranscription frames."""
@@ -58,8 +80,123 @@ class UserTranscriptionFrameFilter(FrameProcessor):
         await self.push_frame(frame, direction)
 
 
-async def main():
-    """Main bot execution function.
+class LatencyObserver(FrameProcessor):
+    """Report time to first audio and turn latency to the server's /metrics.
+
+    Sits right after the LLM, where user speech frames pass downstream and the
+    output transport's BotStartedSpeakingFrame passes upstream.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._joined_at = None
+        self._user_stopped_at = None
+
+    def participant_joined(self):
+        self._joined_at = time.monotonic()
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, UserStoppedSpeakingFrame):
+            self._user_stopped_at = time.monotonic()
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            if self._joined_at is not None:
+                TIME_TO_FIRST_AUDIO.observe(time.monotonic() - self._joined_at, "webrtc")
+                self._joined_at = None
+            elif self._user_stopped_at is not None:
+                TURN_LATENCY.observe(time.monotonic() - self._user_stopped_at, "webrtc")
+            self._user_stopped_at = None
+
+        await self.push_frame(frame, direction)
+
+
+# Sent once, when the Gemini Live session is set up. The context's own system
+# messages are appended to it, and the transcriber gets them with every turn,
+# so the whole prompt lives here.
+SYSTEM_INSTRUCTION = """
+You are DialMate, a Multilingual AI Voice Agent for Government/Public Sector services.
+
+PUBLIC SERVICE PSYCHOLOGY & APPROACH:
+- Start with citizen-centric questions: "What services are you interested in?", "Can you tell me about your situation?", "What are your eligibility needs?"
+- Listen actively and acknowledge citizen needs: "I understand you're looking for..."
+- Use supportive language: "Let me help you navigate this process"
+- Create awareness of deadlines: "This application period is limited", "Benefits expire soon"
+- Handle concerns with empathy: "I understand your concern about [eligibility/documentation/time]. Let me help you with that."
+
+ADDITIONAL SERVICES & SUPPORT:
+- Suggest complementary services naturally: "This healthcare application pairs well with our nutrition programs"
+- Recommend bundles for comprehensive support: "Adding one more application qualifies you for additional benefits"
+- Highlight savings/benefits: "You'll receive additional support with this combo"
+- Use social proof: "This is our most utilized service" or "Citizens who applied for this also benefited from..."
+
+OMNICHANNEL CONTINUITY:
+- Maintain context when citizens switch channels (web → phone → kiosk)
+- Reference previous interactions: "I see you were inquiring about [service] earlier"
+- Preserve applications and preferences across channels
+
+EDGE CASE HANDLING:
+- Service unavailable: Offer alternatives in same category or notify when available
+- Application failure: Suggest retry or alternative submission methods
+- Eligibility objection: Highlight requirements, offers, or show similar services
+- Documentation concerns: Provide document guide and mention assistance options
+
+CONVERSATION FLOW:
+1. Greet warmly and understand needs (discovery)
+2. Recommend 2-3 relevant services (information)
+3. Check availability and confirm eligibility (availability)
+4. Suggest complementary services (additional services)
+5. Apply best benefits and support options (benefits)
+6. Process application smoothly (application)
+7. Confirm delivery preference (document delivery)
+8. Thank and offer post-service support
+
+Your output will be converted to audio so use natural, conversational language with only simple words and punctuation.
+Keep responses concise (2-3 sentences max).
+Today is {today}. If there is a long silence, say 'Hello?'
+Use function tools proactively to check availability, search services, manage applications, apply benefits, and process requests.
+"""
+
+_vad_template = None
+_vad_loading = None
+
+
+def _load_vad_template(in_background: bool = False):
+    global _vad_template
+    if _vad_template is None:
+        # Loaded in the foreground, it is timed by the caller's next mark
+        with STARTUP.background("import and load Silero VAD") if in_background else nullcontext():
+            from pipecat.audio.vad.silero import SileroVADAnalyzer
+            from pipecat.audio.vad.vad_analyzer import VADParams
+
+            _vad_template = SileroVADAnalyzer(params=VADParams(stop_secs=0.5))
+
+
+def preload_vad() -> asyncio.Future:
+    """Start loading the Silero model in a worker thread, once per process."""
+    global _vad_loading
+    if _vad_loading is None:
+        _vad_loading = asyncio.ensure_future(asyncio.to_thread(_load_vad_template, True))
+    return _vad_loading
+
+
+def create_vad_analyzer():
+    """Create a Silero VAD analyzer for one session.
+
+    The Silero model is loaded once per process. Each analyzer gets its own
+    recurrent state but shares the ONNX inference session, which is read-only
+    and safe to use from concurrent pipelines.
+    """
+    _load_vad_template()
+
+    analyzer = copy.copy(_vad_template)
+    analyzer._model = copy.copy(_vad_template._model)
+    analyzer._model.reset_states()
+    return analyzer
+
+
+async def run_bot(room_url: str, token: str, vad_analyzer=None, handle_sigint: bool = True):
+    """Bot execution function for a single Daily room.
 
     Sets up and runs the bot pipeline including:
     - Daily video transport with specific audio parameters
@@ -67,434 +204,219 @@ async def main():
     - Voice activity detection
     - Animation processing
     - RTVI event handling
+
+    Without a ready `vad_analyzer`, the room is joined with Daily's built-in
+    VAD while Silero loads in the background, and Silero takes over once loaded.
     """
-    async with aiohttp.ClientSession() as session:
-        (room_url, token) = await configure(session)
-        
-        SYSTEM_INSTRUCTION = f"""
-        You are DialMate, a Multilingual AI Voice Agent for Government/Public Sector services.
-        
-        PUBLIC SERVICE PSYCHOLOGY & APPROACH:
-        - Start with citizen-centric questions: "What services are you interested in?", "Can you tell me about your situation?", "What are your eligibility needs?"
-        - Listen actively and acknowledge citizen needs: "I understand you're looking for..."
-        - Use supportive language: "Let me help you navigate this process"
-        - Create awareness of deadlines: "This application period is limited", "Benefits expire soon"
-        - Handle concerns with empathy: "I understand your concern about [eligibility/documentation/time]. Let me help you with that."
-        
-        ADDITIONAL SERVICES & SUPPORT:
-        - Suggest complementary services naturally: "This healthcare application pairs well with our nutrition programs"
-        - Recommend bundles for comprehensive support: "Adding one more application qualifies you for additional benefits"
-        - Highlight savings/benefits: "You'll receive additional support with this combo"
-        - Use social proof: "This is our most utilized service" or "Citizens who applied for this also benefited from..."
-        
-        OMNICHANNEL CONTINUITY:
-        - Maintain context when citizens switch channels (web → phone → kiosk)
-        - Reference previous interactions: "I see you were inquiring about [service] earlier"
-        - Preserve applications and preferences across channels
-        
-        EDGE CASE HANDLING:
-        - Service unavailable: Offer alternatives in same category or notify when available
-        - Application failure: Suggest retry or alternative submission methods
-        - Eligibility objection: Highlight requirements, offers, or show similar services
-        - Documentation concerns: Provide document guide and mention assistance options
-        
-        CONVERSATION FLOW:
-        1. Greet warmly and understand needs (discovery)
-        2. Recommend 2-3 relevant services (information)
-        3. Check availability and confirm eligibility (availability)
-        4. Suggest complementary services (additional services)
-        5. Apply best benefits and support options (benefits)
-        6. Process application smoothly (application)
-        7. Confirm delivery preference (document delivery)
-        8. Thank and offer post-service support
-        
-        Your output will be converted to audio so use natural, conversational language.
-        Keep responses concise (2-3 sentences max).
-        Today is {date.today().strftime("%A, %B %d, %Y")}.
-        Use function tools proactively to check availability, search services, manage applications, apply benefits, and process requests.
-        """
-        
-        system_prompt = f"""
-        You are a helpful multilingual AI voice agent who converses with citizens and answers questions about government services. Respond concisely to general questions.
-        Your response will be turned into speech so use only simple words and punctuation.
-        Today is {date.today().strftime("%A, %B %d, %Y")}. If there is a long silence, say 'Hello?'
-        Use function tools wherever necessary.
-        """
-
-        # Set up Daily transport with specific audio/video parameters for Gemini
-        transport = DailyTransport(
-            room_url,
-            token,
-            "Chatbot",
-            DailyParams(
-                audio_in_sample_rate=16000,
-                audio_out_sample_rate=24000,
-                audio_out_enabled=True,
-                camera_out_enabled=True,
-                camera_out_width=1024,
-                camera_out_height=576,
-                vad_enabled=True,
-                vad_audio_passthrough=True,
-                vad_analyzer=SileroVADAnalyzer(params=VADParams(stop_secs=0.5)),
-            ),
-        )
-
-        tools = [
-            {
-                "function_declarations": [
-                    # Recommendation Agent
-                    {
-                        "name": "search_products",
-                        "description": "Search for products by name, category, or price range",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "query": {"type": "string", "description": "Product name or keyword"},
-                                "category": {"type": "string", "description": "Category like Tops, Bottoms, Footwear, Accessories"},
-                                "max_price": {"type": "number", "description": "Maximum price in rupees"},
-                            },
-                        }
-                    },
-                    {
-                        "name": "get_recommendations",
-                        "description": "Get personalized product recommendations based on customer profile",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "customer_id": {"type": "string", "description": "Customer ID"},
-                            },
-                        }
-                    },
-                    # Inventory Agent
-                    {
-                        "name": "check_inventory",
-                        "description": "Check product stock availability at stores or warehouse",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sku": {"type": "string", "description": "Product SKU code"},
-                                "location": {"type": "string", "description": "Location: store1, warehouse, or all"},
-                            },
-                            "required": ["sku"],
-                        }
-                    },
-                    # Cart & Payment Agent
-                    {
-                        "name": "add_to_cart",
-                        "description": "Add product to shopping cart",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "session_id": {"type": "string", "description": "Session ID"},
-                                "sku": {"type": "string", "description": "Product SKU"},
-                                "quantity": {"type": "number", "description": "Quantity"},
-                            },
-                            "required": ["sku"],
-                        }
-                    },
-                    {
-                        "name": "view_cart",
-                        "description": "View current shopping cart contents and total",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "session_id": {"type": "string", "description": "Session ID"},
-                            },
-                        }
-                    },
-                    {
-                        "name": "process_payment",
-                        "description": "Process payment for the order",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "amount": {"type": "number", "description": "Payment amount"},
-                                "method": {"type": "string", "description": "Payment method: card, upi, cash"},
-                            },
-                            "required": ["amount"],
-                        }
-                    },
-                    # Loyalty & Offers Agent
-                    {
-                        "name": "apply_coupon",
-                        "description": "Apply promotional coupon code to get discount",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "code": {"type": "string", "description": "Coupon code"},
-                                "cart_total": {"type": "number", "description": "Cart total amount"},
-                                "customer_tier": {"type": "string", "description": "Customer loyalty tier"},
-                            },
-                            "required": ["code", "cart_total"],
-                        }
-                    },
-                    {
-                        "name": "check_loyalty_points",
-                        "description": "Check customer loyalty points and tier",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "customer_id": {"type": "string", "description": "Customer ID"},
-                            },
-                        }
-                    },
-                    # Fulfillment Agent
-                    {
-                        "name": "schedule_delivery",
-                        "description": "Schedule home delivery or store pickup",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "order_id": {"type": "string", "description": "Order ID"},
-                                "delivery_type": {"type": "string", "description": "home or pickup"},
-                                "date": {"type": "string", "description": "Preferred date"},
-                            },
-                            "required": ["order_id"],
-                        }
-                    },
-                    # Post-Purchase Support Agent
-                    {
-                        "name": "track_order",
-                        "description": "Track order delivery status",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "order_id": {"type": "string", "description": "Order ID"},
-                            },
-                            "required": ["order_id"],
-                        }
-                    },
-                    {
-                        "name": "initiate_return",
-                        "description": "Initiate product return or exchange",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "order_id": {"type": "string", "description": "Order ID"},
-                                "reason": {"type": "string", "description": "Return reason"},
-                            },
-                            "required": ["order_id"],
-                        }
-                    },
-                    # Escalation & Context
-                    {
-                        "name": "escalate_to_human",
-                        "description": "Escalate to human agent with context",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "session_id": {"type": "string", "description": "Session ID"},
-                                "reason": {"type": "string", "description": "Reason for escalation"},
-                            },
-                        }
-                    },
-                    {
-                        "name": "get_session_context",
-                        "description": "Get session context for continuity",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "session_id": {"type": "string", "description": "Session ID"},
-                            },
-                        }
-                    },
-                    # Edge Cases & Additional Services
-                    {
-                        "name": "handle_out_of_stock",
-                        "description": "Handle out of stock with alternatives",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sku": {"type": "string", "description": "Product SKU"},
-                            },
-                            "required": ["sku"],
-                        }
-                    },
-                    {
-                        "name": "handle_payment_retry",
-                        "description": "Retry failed payment",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "amount": {"type": "number", "description": "Amount"},
-                                "method": {"type": "string", "description": "Payment method"},
-                                "retry_count": {"type": "number", "description": "Retry attempt"},
-                            },
-                            "required": ["amount"],
-                        }
-                    },
-                    {
-                        "name": "modify_order",
-                        "description": "Modify order before shipment",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "order_id": {"type": "string", "description": "Order ID"},
-                                "action": {"type": "string", "description": "add_item, remove_item, change_address"},
-                            },
-                            "required": ["order_id"],
-                        }
-                    },
-                    {
-                        "name": "handle_price_objection",
-                        "description": "Handle customer price concerns",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sku": {"type": "string", "description": "Product SKU"},
-                            },
-                            "required": ["sku"],
-                        }
-                    },
-                    {
-                        "name": "bundle_recommendation",
-                        "description": "Recommend product bundles",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "category": {"type": "string", "description": "Product category"},
-                            },
-                        }
-                    },
-                    {
-                        "name": "notify_back_in_stock",
-                        "description": "Register for stock notifications",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sku": {"type": "string", "description": "Product SKU"},
-                                "email": {"type": "string", "description": "Email"},
-                                "phone": {"type": "string", "description": "Phone"},
-                            },
-                            "required": ["sku"],
-                        }
-                    },
-                    {
-                        "name": "gift_wrap_service",
-                        "description": "Add gift wrapping",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "order_id": {"type": "string", "description": "Order ID"},
-                                "message": {"type": "string", "description": "Gift message"},
-                            },
-                            "required": ["order_id"],
-                        }
-                    },
-                    {
-                        "name": "size_fit_guide",
-                        "description": "Provide sizing guidance",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sku": {"type": "string", "description": "Product SKU"},
-                            },
-                            "required": ["sku"],
-                        }
-                    },
-                    {
-                        "name": "store_locator",
-                        "description": "Find nearest store",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "city": {"type": "string", "description": "City name"},
-                            },
-                        }
-                    },
-                ]
-            }
-        ]
+    if vad_analyzer is None and _vad_loading is not None and _vad_loading.done():
+        vad_analyzer = create_vad_analyzer()
+    if vad_analyzer is None:
+        vad_loading = preload_vad()
+
+    # Set up Daily transport with specific audio/video parameters for Gemini
+    transport = DailyTransport(
+        room_url,
+        token,
+        "Chatbot",
+        DailyParams(
+            audio_in_sample_rate=16000,
+            audio_out_sample_rate=24000,
+            audio_out_enabled=True,
+            camera_out_enabled=True,
+            camera_out_width=1024,
+            camera_out_height=576,
+            vad_enabled=True,
+            vad_audio_passthrough=True,
+            vad_analyzer=vad_analyzer,
+        ),
+    )
+    if vad_analyzer is None:
+        vad_loading.add_done_callback(lambda loading: _use_silero(transport, loading))
+
+    # Initialize the Gemini Multimodal Live model
+    llm = GeminiMultimodalLiveLLMService(
+        api_key=os.getenv('GEMINI_API_KEY'),
+        voice_id="Kore",  # Options: Aoede, Charon, Fenrir, Kore, Puck
+        transcribe_user_audio=True,
+        transcribe_model_audio=True,
+        system_instruction=SYSTEM_INSTRUCTION.format(today=date.today().strftime("%A, %B %d, %Y")),
+        tools=TOOLS,
+    )
+
+    # Register every worker agent and edge case handler, each timed and traced
+    instrument(llm)
+    tool_registry.register_all(llm)
 
-        # Initialize the Gemini Multimodal Live model
-        llm = GeminiMultimodalLiveLLMService(
-            api_key=os.getenv('GEMINI_API_KEY'),
-            voice_id="Kore",  # Options: Aoede, Charon, Fenrir, Kore, Puck
-            transcribe_user_audio=True,
-            transcribe_model_audio=True,
-            system_instruction=SYSTEM_INSTRUCTION,
-            tools=tools,
-        )
-
-        # Register all worker agent functions
-        llm.register_function("search_products", search_products)
-        llm.register_function("get_recommendations", get_recommendations)
-        llm.register_function("check_inventory", check_inventory)
-        llm.register_function("add_to_cart", add_to_cart)
-        llm.register_function("view_cart", view_cart)
-        llm.register_function("process_payment", process_payment)
-        llm.register_function("apply_coupon", apply_coupon)
-        llm.register_function("check_loyalty_points", check_loyalty_points)
-        llm.register_function("schedule_delivery", schedule_delivery)
-        llm.register_function("track_order", track_order)
-        llm.register_function("initiate_return", initiate_return)
-        llm.register_function("escalate_to_human", escalate_to_human)
-        llm.register_function("get_session_context", get_session_context)
-        
-        # Register edge case handlers
-        llm.register_function("handle_out_of_stock", handle_out_of_stock)
-        llm.register_function("handle_payment_retry", handle_payment_retry)
-        llm.register_function("modify_order", modify_order)
-        llm.register_function("handle_price_objection", handle_price_objection)
-        llm.register_function("bundle_recommendation", bundle_recommendation)
-        llm.register_function("notify_back_in_stock", notify_back_in_stock)
-        llm.register_function("gift_wrap_service", gift_wrap_service)
-        llm.register_function("size_fit_guide", size_fit_guide)
-        llm.register_function("store_locator", store_locator)
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": 'Start by greeting: "Hello! I\'m DialMate, your personal shopping assistant. How can I help you find the perfect outfit today?"'},
+    messages = [
+        {"role": "user", "content": 'Start by greeting: "Hello! I\'m DialMate, your personal shopping assistant. How can I help you find the perfect outfit today?"'},
+    ]
+
+    # Set up conversation context and management
+    context = OpenAILLMContext(messages, tools=TOOLS)
+    context_aggregator = llm.create_context_aggregator(context)
+    context_window = ContextWindowManager(context)
+
+    # RTVI events for Pipecat client UI
+    rtvi_speaking = RTVISpeakingProcessor()
+    rtvi_user_transcription = RTVIUserTranscriptionProcessor()
+    rtvi_bot_transcription = RTVIBotTranscriptionProcessor()
+    rtvi_metrics = RTVIMetricsProcessor()
+    latency_observer = LatencyObserver()
+
+    pipeline = Pipeline(
+        [
+            transport.input(),
+            context_aggregator.user(),
+            context_window,
+            llm,
+            latency_observer,
+            rtvi_speaking,
+            rtvi_user_transcription,
+            UserTranscriptionFrameFilter(),
+            rtvi_bot_transcription,
+            rtvi_metrics,
+            transport.output(),
+            context_aggregator.assistant(),
         ]
+    )
+
+    task = PipelineTask(
+        pipeline,
+        PipelineParams(
+            allow_interruptions=True,
+            enable_metrics=True,
+            enable_usage_metrics=True,
+        ),
+    )
+
+    @transport.event_handler("on_first_participant_joined")
+    async def on_first_participant_joined(transport, participant):
+        AnalyticsTracker.track_conversation_start()
+        latency_observer.participant_joined()
+        await transport.capture_participant_transcription(participant["id"])
+        await task.queue_frames([context_aggregator.user().get_context_frame()])
 
-        # Set up conversation context and management
-        context = OpenAILLMContext(messages, tools=tools)
-        context_aggregator = llm.create_context_aggregator(context)
-
-        # RTVI events for Pipecat client UI
-        rtvi_speaking = RTVISpeakingProcessor()
-        rtvi_user_transcription = RTVIUserTranscriptionProcessor()
-        rtvi_bot_transcription = RTVIBotTranscriptionProcessor()
-        rtvi_metrics = RTVIMetricsProcessor()
-
-        pipeline = Pipeline(
-            [
-                transport.input(),
-                context_aggregator.user(),
-                llm,
-                rtvi_speaking,
-                rtvi_user_transcription,
-                UserTranscriptionFrameFilter(),
-                rtvi_bot_transcription,
-                rtvi_metrics,
-                transport.output(),
-                context_aggregator.assistant(),
-            ]
-        )
-
-        task = PipelineTask(
-            pipeline,
-            PipelineParams(
-                allow_interruptions=True,
-                enable_metrics=True,
-                enable_usage_metrics=True,
-            ),
-        )
-
-        @transport.event_handler("on_first_participant_joined")
-        async def on_first_participant_joined(transport, participant):
-            await transport.capture_participant_transcription(participant["id"])
-            await task.queue_frames([context_aggregator.user().get_context_frame()])
-
-        @transport.event_handler("on_participant_left")
-        async def on_participant_left(transport, participant, reason):
-            print(f"Participant left: {participant}")
-            await task.queue_frame(EndFrame())
-
-        runner = PipelineRunner()
+    @transport.event_handler("on_participant_left")
+    async def on_participant_left(transport, participant, reason):
+        logger.info(f"Participant left: {participant}")
+        await task.queue_frame(EndFrame())
 
+    @transport.event_handler("on_joined")
+    async def on_joined(transport, data):
+        STARTUP.mark("join Daily room")
+        report = STARTUP.finish()
+        if STARTUP.enabled and report:
+            logger.info(report)
+
+    runner = PipelineRunner(handle_sigint=handle_sigint)
+    STARTUP.mark("set up transport, model and pipeline")
+
+    try:
         await runner.run(task)
+    finally:
+        STARTUP.finish()  # in case the room was never joined
+
+
+def _use_silero(transport: DailyTransport, loading: asyncio.Future):
+    """Swap the Silero VAD in for Daily's built-in one once it has loaded."""
+    if loading.cancelled():
+        logger.warning("Silero VAD load was cancelled, keeping Daily's VAD")
+        return
+    error = loading.exception()
+    if error is not None:
+        logger.error(f"Silero VAD failed to load, keeping Daily's VAD: {error}")
+        return
+    # DailyInputTransport reads its analyzer on every audio chunk and has no setter
+    transport.input()._vad_analyzer = create_vad_analyzer()
+
+
+async def main():
+    """Main bot execution function for a room passed on the command line."""
+    preload_vad()
+    from runner import configure
+
+    async with aiohttp.ClientSession() as session:
+        (room_url, token) = await configure(session)
+    STARTUP.mark("configure Daily room")
+
+    await run_bot(room_url, token)
+
+
+async def run_worker(ipc_path: str):
+    """Pre-warmed pool worker.
+
+    All modules are imported and the VAD model is loaded before the worker
+    reports ready to the pool over the local IPC socket, so the only work left
+    when a room is assigned is joining it.
+    """
+    vad_analyzer = create_vad_analyzer()
+    STARTUP.mark("load Silero VAD")
+
+    reader, writer = await asyncio.open_unix_connection(ipc_path)
+    writer.write(json.dumps({"event": "ready", "pid": os.getpid()}).encode() + b"\n")
+    await writer.drain()
+
+    line = await reader.readline()
+    writer.close()
+    STARTUP.skip()  # idle in the pool, not startup
+    if not line:
+        logger.info("Bot pool closed before assigning a room")
+        return
+
+    assignment = json.loads(line)
+    await run_bot(assignment["room_url"], assignment["token"], vad_analyzer=vad_analyzer)
+
+
+async def run_host(ipc_path: str):
+    """Multi-session bot host.
+
+    Runs every room the supervisor assigns as its own pipeline task in this
+    event loop, and reports each session's end so the supervisor can track load.
+    """
+    create_vad_analyzer()
+    STARTUP.mark("load Silero VAD")
+
+    reader, writer = await asyncio.open_unix_connection(ipc_path)
+    writer.write(json.dumps({"event": "ready", "pid": os.getpid()}).encode() + b"\n")
+    await writer.drain()
+
+    sessions = set()
+
+    async def run_session(room_url: str, token: str):
+        try:
+            await run_bot(room_url, token, vad_analyzer=create_vad_analyzer(), handle_sigint=False)
+        except Exception:
+            logger.exception(f"Bot session for {room_url} failed")
+        finally:
+            if not writer.is_closing():
+                writer.write(json.dumps({"event": "ended", "room_url": room_url}).encode() + b"\n")
+
+    async for line in reader:
+        STARTUP.skip()  # idle until the first room, then a no-op
+        assignment = json.loads(line)
+        session = asyncio.create_task(run_session(assignment["room_url"], assignment["token"]))
+        sessions.add(session)
+        session.add_done_callback(sessions.discard)
+
+    # Supervisor went away: let the running calls finish before exiting
+    writer.close()
+    if sessions:
+        await asyncio.gather(*sessions)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Gemini Bot")
+    parser.add_argument("--worker", type=str, help="Run as a pre-warmed pool worker on this IPC socket")
+    parser.add_argument("--host", type=str, help="Run as a multi-session bot host on this IPC socket")
+    parser.add_argument("--profile-startup", action="store_true", help="Log a startup time breakdown once the room is joined")
+    args, _ = parser.parse_known_args()
+    STARTUP.enabled = args.profile_startup
+    AnalyticsTracker.start()
+    report_to_server()
+
+    if args.worker:
+        asyncio.run(run_worker(args.worker))
+    elif args.host:
+        asyncio.run(run_host(args.host))
+    else:
+        asyncio.run(main())
@@ -0,0 +1,180 @@
+"""Multi-Session Bot Hosts for High Call Density
+
+Instead of one OS process per room, each host process (`bot-gemini --host`)
+runs many Gemini pipelines concurrently in a single event loop and shares the
+Silero VAD weights and tool declarations between them. The supervisor keeps one
+host per core alive and assigns every new session to the least-loaded host,
+and calls `on_ended` with a room's URL when its session ends or its host exits.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Callable, Dict, Optional
+
+BOT_HOSTS = int(os.getenv("BOT_HOSTS", str(os.cpu_count() or 1)))
+BOT_HOST_MAX_SESSIONS = int(os.getenv("BOT_HOST_MAX_SESSIONS", "50"))
+BOT_HOST_READY_TIMEOUT = float(os.getenv("BOT_HOST_READY_TIMEOUT", "30"))
+
+
+class BotHost:
+    """A host process and the sessions currently assigned to it."""
+
+    __slots__ = ("proc", "writer", "rooms")
+
+    def __init__(self, proc: subprocess.Popen, writer: asyncio.StreamWriter):
+        self.proc = proc
+        self.writer = writer
+        self.rooms = set()
+
+    @property
+    def load(self) -> int:
+        return len(self.rooms)
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None and not self.writer.is_closing()
+
+
+class BotHostSupervisor:
+    """Supervises `num_hosts` multi-session bot hosts.
+
+    Exposes the same start/stop/acquire interface as BotWorkerPool so the
+    server can use either.
+    """
+
+    def __init__(self, bot_file: str, cwd: str, num_hosts: int = BOT_HOSTS, max_sessions: int = BOT_HOST_MAX_SESSIONS,
+                 on_ended: Optional[Callable[[str], None]] = None):
+        self.bot_file = bot_file
+        self.cwd = cwd
+        self.num_hosts = num_hosts
+        self.max_sessions = max_sessions
+        self.on_ended = on_ended
+
+        self._ipc_dir = tempfile.mkdtemp(prefix="bot-hosts-")
+        self._ipc_path = os.path.join(self._ipc_dir, "hosts.sock")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._supervise_task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+
+        self._starting: Dict[int, subprocess.Popen] = {}  # spawned, not yet connected
+        self._hosts: Dict[int, BotHost] = {}  # connected and accepting sessions
+
+    async def start(self):
+        """Open the IPC socket and start one host per configured core."""
+        self._server = await asyncio.start_unix_server(self._handle_host, path=self._ipc_path)
+        for _ in range(self.num_hosts):
+            self._spawn()
+        self._supervise_task = asyncio.create_task(self._supervise_loop())
+
+    async def stop(self):
+        """Terminate every host process."""
+        if self._supervise_task:
+            self._supervise_task.cancel()
+        if self._server:
+            self._server.close()
+        for host in self._hosts.values():
+            host.writer.close()
+            host.proc.terminate()
+        for proc in self._starting.values():
+            proc.terminate()
+        self._hosts.clear()
+        self._starting.clear()
+        if os.path.exists(self._ipc_path):
+            os.unlink(self._ipc_path)
+        os.rmdir(self._ipc_dir)
+
+    @property
+    def size(self) -> int:
+        """Number of sessions running across all hosts."""
+        return sum(host.load for host in self._hosts.values())
+
+    @property
+    def processes(self) -> int:
+        """Number of host processes, starting or connected."""
+        return len(self._hosts) + len(self._starting)
+
+    async def acquire(self, room_url: str, token: str) -> subprocess.Popen:
+        """Assign a room to the least-loaded host and return the host process.
+
+        Raises RuntimeError when every host is at `max_sessions`.
+        """
+        host = await self._least_loaded()
+        host.rooms.add(room_url)
+        message = json.dumps({"room_url": room_url, "token": token}).encode() + b"\n"
+        host.writer.write(message)
+        await host.writer.drain()
+        return host.proc
+
+    async def _least_loaded(self) -> BotHost:
+        if not self._hosts:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=BOT_HOST_READY_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise RuntimeError("Timed out waiting for a bot host to start")
+
+        hosts = [host for host in self._hosts.values() if host.alive]
+        if not hosts:
+            raise RuntimeError("No bot host is running")
+        host = min(hosts, key=lambda h: h.load)
+        if host.load >= self.max_sessions:
+            raise RuntimeError(f"All {len(hosts)} bot hosts are at {self.max_sessions} sessions")
+        return host
+
+    def _spawn(self):
+        proc = subprocess.Popen(
+            [sys.executable, "-m", self.bot_file, "--host", self._ipc_path],
+            cwd=self.cwd,
+        )
+        self._starting[proc.pid] = proc
+
+    async def _handle_host(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Register a host that connected back, then track its session events."""
+        line = await reader.readline()
+        if not line:
+            writer.close()
+            return
+        pid = json.loads(line)["pid"]
+        proc = self._starting.pop(pid, None)
+        if proc is None:
+            writer.close()
+            return
+
+        host = BotHost(proc, writer)
+        self._hosts[pid] = host
+        self._ready.set()
+
+        async for line in reader:
+            event = json.loads(line)
+            if event["event"] == "ended":
+                host.rooms.discard(event["room_url"])
+                self._ended(event["room_url"])
+
+        # Connection closed: the host exited or crashed, taking its sessions with it
+        writer.close()
+        self._hosts.pop(pid, None)
+        for room_url in host.rooms:
+            self._ended(room_url)
+        host.rooms.clear()
+        if not self._hosts:
+            self._ready.clear()
+
+    def _ended(self, room_url: str):
+        if self.on_ended is not None:
+            self.on_ended(room_url)
+
+    async def _supervise_loop(self):
+        """Replace hosts that exit, keeping `num_hosts` running."""
+        while True:
+            for pid, proc in list(self._starting.items()):
+                if proc.poll() is not None:
+                    self._starting.pop(pid, None)
+            for pid, host in list(self._hosts.items()):
+                if host.proc.poll() is not None:
+                    self._hosts.pop(pid, None)
+
+            for _ in range(self.num_hosts - len(self._hosts) - len(self._starting)):
+                self._spawn()
+            await asyncio.sleep(1.0)
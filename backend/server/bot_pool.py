@@ -0,0 +1,177 @@
+"""Pre-warmed Bot Worker Pool for Fast Session Start
+
+Spawning `python3 -m bot-gemini` per session pays for interpreter boot, the
+pipecat/Silero imports and the VAD model load before the bot can join the
+Daily room. The pool keeps workers that have already done all of that idle on a
+local unix socket, and hands each new session to one of them.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import deque
+from typing import Dict, Optional
+
+BOT_POOL_MIN = int(os.getenv("BOT_POOL_MIN", "2"))
+BOT_POOL_MAX = int(os.getenv("BOT_POOL_MAX", "20"))
+BOT_POOL_READY_TIMEOUT = float(os.getenv("BOT_POOL_READY_TIMEOUT", "30"))
+
+
+class BotWorker:
+    """An idle, warmed-up bot process waiting for a room assignment."""
+
+    __slots__ = ("proc", "reader", "writer")
+
+    def __init__(self, proc: subprocess.Popen, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.proc = proc
+        self.reader = reader
+        self.writer = writer
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None and not self.writer.is_closing()
+
+
+class BotWorkerPool:
+    """Supervised pool of pre-warmed bot workers.
+
+    Keeps at least `min_size` workers warming or idle, never runs more than
+    `max_size` bot processes in total, and refills itself in the background as
+    workers are handed out or die.
+    """
+
+    def __init__(self, bot_file: str, cwd: str, min_size: int = BOT_POOL_MIN, max_size: int = BOT_POOL_MAX):
+        self.bot_file = bot_file
+        self.cwd = cwd
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size)
+
+        self._ipc_dir = tempfile.mkdtemp(prefix="bot-pool-")
+        self._ipc_path = os.path.join(self._ipc_dir, "pool.sock")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._refill_task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._ready = asyncio.Event()
+
+        self._procs: Dict[int, subprocess.Popen] = {}  # every process spawned by the pool
+        self._warming: Dict[int, subprocess.Popen] = {}  # spawned, not yet ready
+        self._idle: deque = deque()  # BotWorker instances ready for a room
+
+    async def start(self):
+        """Open the IPC socket and start warming workers."""
+        self._server = await asyncio.start_unix_server(self._handle_worker, path=self._ipc_path)
+        self._refill_task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self):
+        """Stop refilling and terminate every idle or warming worker."""
+        if self._refill_task:
+            self._refill_task.cancel()
+        if self._server:
+            self._server.close()
+        while self._idle:
+            worker = self._idle.popleft()
+            worker.writer.close()
+            worker.proc.terminate()
+        for proc in self._warming.values():
+            proc.terminate()
+        self._warming.clear()
+        if os.path.exists(self._ipc_path):
+            os.unlink(self._ipc_path)
+        os.rmdir(self._ipc_dir)
+
+    @property
+    def size(self) -> int:
+        """Number of live bot processes owned by the pool, busy ones included."""
+        return len(self._procs)
+
+    @property
+    def processes(self) -> int:
+        return len(self._procs)
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    async def acquire(self, room_url: str, token: str) -> subprocess.Popen:
+        """Hand a room to an idle worker and return its process.
+
+        Falls back to waiting for a worker to finish warming when none is idle.
+        Raises RuntimeError when the pool is at `max_size` with no idle worker.
+        """
+        worker = await self._take_idle()
+        message = json.dumps({"room_url": room_url, "token": token}).encode() + b"\n"
+        worker.writer.write(message)
+        await worker.writer.drain()
+        worker.writer.close()
+        self._wake.set()
+        return worker.proc
+
+    async def _take_idle(self) -> BotWorker:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + BOT_POOL_READY_TIMEOUT
+        while True:
+            while self._idle:
+                worker = self._idle.popleft()
+                if worker.alive:
+                    return worker
+                self._procs.pop(worker.proc.pid, None)
+
+            self._reap()
+            if not self._warming:
+                if self.size >= self.max_size:
+                    raise RuntimeError(f"Bot pool exhausted: {self.size}/{self.max_size} bots running")
+                self._spawn()
+
+            self._ready.clear()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise RuntimeError("Timed out waiting for a bot worker to warm up")
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                raise RuntimeError("Timed out waiting for a bot worker to warm up")
+
+    def _spawn(self):
+        proc = subprocess.Popen(
+            [sys.executable, "-m", self.bot_file, "--worker", self._ipc_path],
+            cwd=self.cwd,
+        )
+        self._procs[proc.pid] = proc
+        self._warming[proc.pid] = proc
+
+    def _reap(self):
+        """Forget processes that have exited."""
+        for pid, proc in list(self._procs.items()):
+            if proc.poll() is not None:
+                self._procs.pop(pid, None)
+                self._warming.pop(pid, None)
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Register a worker that connected back after warming up."""
+        line = await reader.readline()
+        if not line:
+            writer.close()
+            return
+        pid = json.loads(line)["pid"]
+        proc = self._warming.pop(pid, None)
+        if proc is None:
+            writer.close()
+            return
+        self._idle.append(BotWorker(proc, reader, writer))
+        self._ready.set()
+
+    async def _refill_loop(self):
+        while True:
+            self._reap()
+            available = len(self._idle) + len(self._warming)
+            while available < self.min_size and self.size < self.max_size:
+                self._spawn()
+                available += 1
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,136 @@
+"""Per-Call State for Concurrent Twilio Media Streams"""
+import time
+import uuid
+from typing import Dict, Optional
+
+from media_bridge import AudioQueue
+from media_relay import StreamEnvelope
+
+# Live phone calls handled by this worker
+LIVE_CALLS: Dict[str, "CallContext"] = {}
+
+
+class CallContext:
+    """Everything one /media-stream connection needs, so concurrent calls never share state."""
+
+    __slots__ = (
+        "call_id",
+        "twilio_ws",
+        "openai_ws",
+        "stream_sid",
+        "envelope",
+        "inbound",
+        "outbound",
+        "frames_in",
+        "frames_out",
+        "response_item_id",
+        "response_done",
+        "interrupted_item_id",
+        "audio_sent_ms",
+        "audio_played_ms",
+        "interruptions",
+        "connected_at",
+        "stream_started_at",
+        "last_media_at",
+        "speech_stopped_at",
+    )
+
+    def __init__(self, twilio_ws, openai_ws=None):
+        self.call_id = uuid.uuid4().hex
+        self.twilio_ws = twilio_ws
+        self.openai_ws = openai_ws
+        self.stream_sid: Optional[str] = None
+        self.envelope: Optional[StreamEnvelope] = None
+        self.inbound = AudioQueue.inbound()  # Twilio -> OpenAI
+        self.outbound = AudioQueue.outbound()  # OpenAI -> Twilio
+        self.frames_in = 0  # media messages received from Twilio
+        self.frames_out = 0  # media messages sent to Twilio
+        self.response_item_id: Optional[str] = None  # assistant item whose audio is playing
+        self.response_done = False  # the model finished that item; its audio may still be playing
+        self.interrupted_item_id: Optional[str] = None  # late deltas for this item are dropped
+        self.audio_sent_ms = 0  # audio of the current item sent to Twilio
+        self.audio_played_ms = 0  # audio of the current item Twilio confirmed playing, via marks
+        self.interruptions = 0
+        self.connected_at = time.monotonic()
+        self.stream_started_at: Optional[float] = None
+        self.last_media_at: Optional[float] = None
+        self.speech_stopped_at: Optional[float] = None  # caller's last turn ended, no reply audio yet
+
+    def start_stream(self, stream_sid: str):
+        """Bind the call to the Twilio stream announced by the `start` event."""
+        self.stream_sid = stream_sid
+        self.envelope = StreamEnvelope(stream_sid)
+        self.stream_started_at = time.monotonic()
+
+    def start_response(self, item_id: str):
+        """Start tracking playback of a new assistant audio item."""
+        self.response_item_id = item_id
+        self.response_done = False
+        self.audio_sent_ms = 0
+        self.audio_played_ms = 0
+
+    def finish_response(self):
+        """The model is done with the current item; stop tracking it once it has played."""
+        self.response_done = True
+        self._release_if_played()
+
+    def mark_played(self, item_id: str, played_ms: int):
+        """Twilio played the audio of `item_id` up to `played_ms`."""
+        if item_id == self.response_item_id:
+            self.audio_played_ms = played_ms
+            self._release_if_played()
+
+    def _release_if_played(self):
+        # Until then a barge-in still has buffered audio to clear
+        if self.response_done and self.audio_played_ms >= self.audio_sent_ms and self.outbound.depth == 0:
+            self.response_item_id = None
+            self.response_done = False
+
+    def interrupt(self):
+        """Stop tracking the current item after the caller barged in."""
+        self.interrupted_item_id = self.response_item_id
+        self.response_item_id = None
+        self.response_done = False
+        self.audio_sent_ms = 0
+        self.audio_played_ms = 0
+        self.interruptions += 1
+
+    def to_dict(self) -> dict:
+        now = time.monotonic()
+        return {
+            "call_id": self.call_id,
+            "stream_sid": self.stream_sid,
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+            "interruptions": self.interruptions,
+            "duration_seconds": round(now - self.connected_at, 1),
+            "idle_seconds": round(now - self.last_media_at, 1) if self.last_media_at else None,
+            "inbound_queue": self.inbound.stats(),
+            "outbound_queue": self.outbound.stats(),
+        }
+
+
+class CallRegistry:
+    @staticmethod
+    def register(call: CallContext) -> CallContext:
+        """Track a newly connected call"""
+        LIVE_CALLS[call.call_id] = call
+        return call
+
+    @staticmethod
+    def unregister(call_id: str):
+        """Forget a call once either side hangs up"""
+        LIVE_CALLS.pop(call_id, None)
+
+    @staticmethod
+    def get(call_id: str) -> Optional[CallContext]:
+        return LIVE_CALLS.get(call_id)
+
+    @staticmethod
+    def count() -> int:
+        return len(LIVE_CALLS)
+
+    @staticmethod
+    def snapshot() -> list:
+        """Summaries of all live calls"""
+        return [call.to_dict() for call in LIVE_CALLS.values()]
@@ -0,0 +1,283 @@
+"""Outbound Dialer Campaigns
+
+A campaign dials a list of numbers through TwilioDialer with a cap on live
+calls and on calls started per second, retries rate-limited or failed
+requests with exponential backoff, and tracks each call's SID and final
+outcome (reported by Twilio's status callback). With a status callback, a
+call holds its concurrency slot until Twilio reports that it has ended, or
+for at most CAMPAIGN_CALL_TIMEOUT seconds; without one nothing would report
+the end, so the slot is freed once the call is initiated. Finished campaigns
+are kept for CAMPAIGN_TTL seconds so late status callbacks still land, and
+at most CAMPAIGN_MAX of them are kept at all.
+
+Dry run against a local fake Twilio endpoint:
+
+    python campaign.py --numbers 10000 --calls-per-second 500 --concurrency 50
+"""
+import asyncio
+import csv
+import io
+import os
+import random
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+from loguru import logger
+
+from twilio_dialer import TwilioCallError, TwilioDialer
+
+# Call states
+QUEUED = "queued"
+DIALING = "dialing"
+RETRYING = "retrying"
+INITIATED = "initiated"
+FAILED = "failed"
+
+CAMPAIGN_TTL = float(os.getenv("CAMPAIGN_TTL", "3600"))  # seconds a finished campaign is kept
+CAMPAIGN_MAX = int(os.getenv("CAMPAIGN_MAX", "100"))  # finished campaigns kept at most
+CAMPAIGN_CALL_TIMEOUT = float(os.getenv("CAMPAIGN_CALL_TIMEOUT", "1800"))  # longest a call holds its slot
+# Twilio CallStatus values after which a call is over
+TERMINAL_STATUSES = {"completed", "busy", "no-answer", "failed", "canceled"}
+
+CAMPAIGNS: Dict[str, "Campaign"] = {}
+CAMPAIGN_CALLS: Dict[str, "CampaignCall"] = {}  # {call_sid: CampaignCall} for status callbacks
+
+
+class CampaignCall:
+    __slots__ = ("to", "status", "call_sid", "attempts", "error", "outcome", "ended")
+
+    def __init__(self, to: str):
+        self.to = to
+        self.status = QUEUED
+        self.call_sid: Optional[str] = None
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.outcome: Optional[str] = None  # final Twilio CallStatus, e.g. completed, busy, no-answer
+        self.ended: Optional[asyncio.Event] = None  # set once Twilio reports a terminal status
+
+    def to_dict(self) -> dict:
+        return {
+            "to": self.to,
+            "status": self.status,
+            "call_sid": self.call_sid,
+            "attempts": self.attempts,
+            "error": self.error,
+            "outcome": self.outcome,
+        }
+
+
+class RateLimiter:
+    """Spaces events at least 1/per_second apart."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second
+        self._next = 0.0
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class Campaign:
+    def __init__(self, numbers: Iterable[str], dialer: TwilioDialer, twiml: str,
+                 concurrency: int = 5, calls_per_second: float = 1.0, max_attempts: int = 3,
+                 backoff_seconds: float = 2.0, status_callback: Optional[str] = None):
+        self.campaign_id = f"CMP{uuid.uuid4().hex[:10]}"
+        self.calls: List[CampaignCall] = [CampaignCall(to) for to in numbers]
+        self.dialer = dialer
+        self.twiml = twiml
+        self.concurrency = concurrency
+        self.calls_per_second = calls_per_second
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.status_callback = status_callback
+
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def numbers_from_csv(text: str) -> List[str]:
+        """Phone numbers from a CSV with a to_phone_number/phone column, or from its first column."""
+        rows = csv.reader(io.StringIO(text))
+        header = next(rows, [])
+        columns = [name.strip().lower() for name in header]
+        for name in ("to_phone_number", "phone_number", "phone", "number"):
+            if name in columns:
+                index = columns.index(name)
+                break
+        else:
+            index = 0
+            if header and header[0].strip().lstrip("+").isdigit():
+                rows = iter([header, *rows])  # no header row
+
+        return [row[index].strip() for row in rows if len(row) > index and row[index].strip()]
+
+    def start(self) -> "Campaign":
+        """Register the campaign and run it in the background."""
+        Campaign.evict_finished()
+        CAMPAIGNS[self.campaign_id] = self
+        self.task = asyncio.create_task(self.run())
+        return self
+
+    async def run(self):
+        """Dial every number; returns once each call has ended (or timed out) or has failed for good."""
+        loop = asyncio.get_running_loop()
+        self.started_at = time.monotonic()
+        limiter = RateLimiter(self.calls_per_second)
+        queue: asyncio.Queue = asyncio.Queue()
+        for call in self.calls:
+            queue.put_nowait(call)
+
+        remaining = len(self.calls)
+        drained = asyncio.Event()
+        if not remaining:
+            drained.set()
+
+        async def worker():
+            nonlocal remaining
+            while True:
+                call = await queue.get()
+                await limiter.wait()
+                try:
+                    await self._dial(call)
+                except Exception as e:
+                    # Anything unexpected still settles the call, or run() would never return
+                    logger.exception(f"Campaign {self.campaign_id}: dialing {call.to} failed")
+                    call.error = f"{type(e).__name__}: {e}"
+                    call.status = RETRYING if call.attempts < self.max_attempts else FAILED
+                if call.status == RETRYING:
+                    delay = self.backoff_seconds * 2 ** (call.attempts - 1) * random.uniform(0.5, 1.0)
+                    loop.call_later(delay, queue.put_nowait, call)
+                    continue
+                if call.status == INITIATED and call.ended is not None:
+                    await self._wait_ended(call)
+                remaining -= 1
+                if not remaining:
+                    drained.set()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await drained.wait()
+        finally:
+            for task in workers:
+                task.cancel()
+            self.finished_at = time.monotonic()
+
+    async def _dial(self, call: CampaignCall):
+        call.status = DIALING
+        call.attempts += 1
+        try:
+            call.call_sid = await self.dialer.create_call(call.to, self.twiml, self.status_callback)
+            call.status = INITIATED
+            call.error = None
+            if self.status_callback:
+                call.ended = asyncio.Event()
+            CAMPAIGN_CALLS[call.call_sid] = call
+            return
+        except TwilioCallError as e:
+            call.error = str(e)
+            retryable = e.retryable
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            call.error = str(e) or type(e).__name__
+            retryable = True
+
+        call.status = RETRYING if retryable and call.attempts < self.max_attempts else FAILED
+
+    async def _wait_ended(self, call: CampaignCall):
+        """Hold the caller's concurrency slot until the call ends."""
+        try:
+            await asyncio.wait_for(call.ended.wait(), timeout=CAMPAIGN_CALL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Campaign {self.campaign_id}: no final status for {call.call_sid} "
+                           f"after {CAMPAIGN_CALL_TIMEOUT:g}s, freeing its slot")
+
+    @staticmethod
+    def evict_finished():
+        """Forget campaigns finished more than CAMPAIGN_TTL ago, and the oldest beyond CAMPAIGN_MAX."""
+        now = time.monotonic()
+        finished = sorted((c for c in CAMPAIGNS.values() if c.finished_at is not None), key=lambda c: c.finished_at)
+        expired = [c for c in finished if now - c.finished_at > CAMPAIGN_TTL]
+        expired += finished[len(expired):max(len(finished) - CAMPAIGN_MAX, len(expired))]
+        for campaign in expired:
+            del CAMPAIGNS[campaign.campaign_id]
+            for call in campaign.calls:
+                if call.call_sid:
+                    CAMPAIGN_CALLS.pop(call.call_sid, None)
+
+    @staticmethod
+    def record_status(call_sid: str, call_status: str):
+        """Store the outcome Twilio reports for a campaign call, and free its slot once it has ended."""
+        call = CAMPAIGN_CALLS.get(call_sid)
+        if call is not None:
+            call.outcome = call_status
+            if call_status in TERMINAL_STATUSES and call.ended is not None:
+                call.ended.set()
+
+    def summary(self) -> dict:
+        statuses: Dict[str, int] = {}
+        outcomes: Dict[str, int] = {}
+        for call in self.calls:
+            statuses[call.status] = statuses.get(call.status, 0) + 1
+            if call.outcome:
+                outcomes[call.outcome] = outcomes.get(call.outcome, 0) + 1
+
+        elapsed = ((self.finished_at or time.monotonic()) - self.started_at) if self.started_at else 0.0
+        dialed = statuses.get(INITIATED, 0) + statuses.get(FAILED, 0)
+        return {
+            "campaign_id": self.campaign_id,
+            "state": "done" if self.finished_at else "running",
+            "total": len(self.calls),
+            "statuses": statuses,
+            "outcomes": outcomes,
+            "elapsed_seconds": round(elapsed, 2),
+            "calls_per_second": round(dialed / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from aiohttp import web
+
+    async def dry_run(config):
+        """Run a campaign against a local fake Twilio Calls endpoint."""
+
+        async def fake_calls(request):
+            await asyncio.sleep(random.uniform(0, config.latency_ms / 1000))
+            if random.random() < config.error_rate:
+                return web.json_response({"message": "Too Many Requests"}, status=429)
+            return web.json_response({"sid": f"CA{uuid.uuid4().hex}"}, status=201)
+
+        app = web.Application()
+        app.router.add_post("/2010-04-01/Accounts/{sid}/Calls.json", fake_calls)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", config.port).start()
+
+        dialer = TwilioDialer("ACdryrun", "token", "+15550000000", api_base=f"http://127.0.0.1:{config.port}",
+                              max_connections=config.concurrency)
+        await dialer.start()
+        numbers = [f"+1555{i:07d}" for i in range(config.numbers)]
+        campaign = Campaign(numbers, dialer, "<Response/>", concurrency=config.concurrency,
+                            calls_per_second=config.calls_per_second, backoff_seconds=0.05)
+        await campaign.run()
+        print(campaign.summary())
+
+        await dialer.close()
+        await runner.cleanup()
+
+    parser = argparse.ArgumentParser(description="Campaign dry run against a fake Twilio endpoint")
+    parser.add_argument("--numbers", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--calls-per-second", type=float, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50, help="Max fake Twilio response time")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of requests answered with 429")
+    parser.add_argument("--port", type=int, default=7863)
+    asyncio.run(dry_run(parser.parse_args()))
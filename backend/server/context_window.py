@@ -0,0 +1,204 @@
+"""Token-Budgeted Context Window for Long Bot Calls
+
+The context aggregators append every turn and tool call to the call's
+OpenAILLMContext, and the Gemini Live service sends that whole history along
+each time it transcribes a user or model turn, so without a bound the per-turn
+payload grows for as long as the call lasts. ContextWindowManager sits between
+the user aggregator and the LLM and keeps the history under CONTEXT_MAX_TOKENS:
+- leading system messages are pinned and never evicted;
+- once over budget, the oldest turns are evicted down to CONTEXT_TARGET_RATIO
+  of it and folded into a memo message of at most CONTEXT_MEMO_LINES lines,
+  kept right after the pinned messages;
+- a tool result identical to a later one is replaced by a short reference, and
+  earlier tool results are cut to CONTEXT_TOOL_RESULT_CHARS.
+The newest CONTEXT_KEEP_MESSAGES messages are never touched, so the tool result
+the LLM is about to send is always complete. Tokens are estimated at four
+characters each, which is close enough for a budget.
+"""
+import json
+import os
+from collections import deque
+from typing import Dict, List, Optional
+
+from loguru import logger
+from pipecat.frames.frames import Frame, UserStoppedSpeakingFrame
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext, OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+CONTEXT_TARGET_RATIO = float(os.getenv("CONTEXT_TARGET_RATIO", "0.75"))
+CONTEXT_KEEP_MESSAGES = int(os.getenv("CONTEXT_KEEP_MESSAGES", "6"))
+CONTEXT_MEMO_LINES = int(os.getenv("CONTEXT_MEMO_LINES", "12"))
+CONTEXT_TOOL_RESULT_CHARS = int(os.getenv("CONTEXT_TOOL_RESULT_CHARS", "400"))
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role and framing
+MEMO_LINE_CHARS = 160
+MEMO_HEADER = "Summary of the earlier part of this call:"
+SAME_RESULT = json.dumps("Same result as a later identical call")
+
+
+def message_text(message: dict) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        return " ".join(part.get("text") or "" for part in content if part.get("type") == "text")
+    return content or ""
+
+
+def estimate_tokens(message: dict) -> int:
+    chars = len(message_text(message))
+    for call in message.get("tool_calls") or ():
+        chars += len(call["function"]["name"]) + len(call["function"]["arguments"])
+    return chars // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+class ContextWindowManager(FrameProcessor):
+    """Keep a call's LLM context under a token budget, in place."""
+
+    def __init__(self, context: OpenAILLMContext, max_tokens: int = CONTEXT_MAX_TOKENS,
+                 keep_messages: int = CONTEXT_KEEP_MESSAGES, **kwargs):
+        super().__init__(**kwargs)
+        self._context = context
+        self._max_tokens = max_tokens
+        self._keep = max(keep_messages, 1)
+        self._memo: Optional[dict] = None
+        self._memo_lines = deque(maxlen=CONTEXT_MEMO_LINES)
+        self._compacted = 0  # messages before this index have been deduplicated and cut
+        self._results: Dict[str, dict] = {}  # tool result content -> latest message carrying it
+        self.evicted = 0
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        # The LLM reads the history right after these: to transcribe the turn
+        # that just ended, or to send a tool result
+        if isinstance(frame, (UserStoppedSpeakingFrame, OpenAILLMContextFrame)):
+            self.fit()
+
+        await self.push_frame(frame, direction)
+
+    def fit(self) -> int:
+        """Compact and trim the history; returns its estimated size in tokens."""
+        messages = self._context.messages
+        if self._compacted > len(messages):  # history was replaced
+            self._compacted = 0
+            self._results.clear()
+        self._compact(messages)
+
+        total = sum(estimate_tokens(message) for message in messages)
+        if total > self._max_tokens:
+            total = self._evict(messages, total)
+        return total
+
+    def _compact(self, messages: List[dict]):
+        # The newest messages are left alone until they are no longer the newest
+        end = max(len(messages) - self._keep, self._compacted)
+        for message in messages[self._compacted:end]:
+            if message.get("role") != "tool":
+                continue
+            content = message.get("content") or ""
+            earlier = self._results.get(content)
+            if earlier is not None and earlier is not message:
+                earlier["content"] = SAME_RESULT
+            self._results[content] = message
+            if len(content) > CONTEXT_TOOL_RESULT_CHARS:
+                message["content"] = json.dumps(content[:CONTEXT_TOOL_RESULT_CHARS] + "…")
+        self._compacted = end
+
+    def _evict(self, messages: List[dict], total: int) -> int:
+        start = 0
+        while start < len(messages) and messages[start].get("role") == "system":
+            start += 1  # pinned system messages, then the memo
+
+        target = self._max_tokens * CONTEXT_TARGET_RATIO
+        stop = len(messages) - self._keep
+        end = start
+        while end < stop and (total > target or messages[end].get("role") == "tool"):
+            # A tool result goes with the call it answers
+            total -= estimate_tokens(messages[end])
+            self._remember(messages[end])
+            end += 1
+        if end == start:
+            return total
+
+        evicted = {id(message) for message in messages[start:end]}
+        self._results = {content: message for content, message in self._results.items() if id(message) not in evicted}
+        del messages[start:end]
+        self._compacted = max(self._compacted - (end - start), 0)
+        self.evicted += end - start
+
+        total += self._update_memo(messages, start)
+        logger.debug(f"Context window: evicted {end - start} messages, ~{total} tokens left")
+        return total
+
+    def _remember(self, message: dict):
+        role = message.get("role")
+        if message.get("tool_calls"):
+            for call in message["tool_calls"]:
+                function = call["function"]
+                self._memo_lines.append(_clip(f"Agent called {function['name']}({function['arguments']})", MEMO_LINE_CHARS))
+        elif role == "tool":
+            result = message_text(message)
+            if result != SAME_RESULT and self._memo_lines and self._memo_lines[-1].startswith("Agent called"):
+                self._memo_lines[-1] = _clip(f"{self._memo_lines[-1]} -> {result}", MEMO_LINE_CHARS * 2)
+        elif role in ("user", "assistant"):
+            text = message_text(message)
+            if text:
+                speaker = "Citizen" if role == "user" else "Agent"
+                self._memo_lines.append(_clip(f"{speaker}: {text}", MEMO_LINE_CHARS))
+
+    def _update_memo(self, messages: List[dict], start: int) -> int:
+        """Rewrite the memo from the remembered lines; returns the change in tokens."""
+        lines = [MEMO_HEADER, *(f"- {line}" for line in self._memo_lines)]
+
+        if self._memo is None:
+            self._memo = {"role": "system", "content": ""}
+            messages.insert(start, self._memo)
+            before = 0
+        else:
+            before = estimate_tokens(self._memo)
+        self._memo["content"] = "\n".join(lines)
+        return estimate_tokens(self._memo) - before
+
+
+if __name__ == "__main__":
+    import asyncio
+    import time
+
+    # A 20-minute call: a turn every ~8 s, a tool call every third turn, and
+    # the same availability check repeated now and then
+    turns = 150
+    result = json.dumps({"services": [{"id": f"SRV{i:03d}", "name": "Housing Assistance", "status": "active",
+                                       "eligibility": "Low income families"} for i in range(6)]})
+
+    async def simulate(manage: bool):
+        context = OpenAILLMContext([{"role": "system", "content": "You are DialMate. " * 20}])
+        manager = ContextWindowManager(context) if manage else None
+        sizes, elapsed = [], 0.0
+        for turn in range(turns):
+            context.add_message({"role": "user", "content": [{"type": "text", "text": f"Question {turn} " * 12}]})
+            if turn % 3 == 0:
+                arguments = json.dumps({"service_id": f"SRV00{turn % 2}"})
+                context.add_message({"role": "assistant", "tool_calls": [
+                    {"id": "check_service_availability", "type": "function",
+                     "function": {"name": "check_service_availability", "arguments": arguments}}]})
+                context.add_message({"role": "tool", "tool_call_id": "check_service_availability",
+                                     "content": result if turn % 2 else json.dumps(f"Service {turn} is open")})
+            if manager:
+                started = time.perf_counter()
+                manager.fit()
+                elapsed += time.perf_counter() - started
+            sizes.append(sum(estimate_tokens(message) for message in context.messages))
+            context.add_message({"role": "assistant", "content": f"Answer {turn} " * 25})
+        return sizes, elapsed, context
+
+    unbounded, _, _ = asyncio.run(simulate(False))
+    bounded, elapsed, context = asyncio.run(simulate(True))
+    for turn in (10, 50, 100, turns - 1):
+        print(f"turn {turn + 1:3d}: ~{unbounded[turn]:6d} tokens unbounded, ~{bounded[turn]:5d} windowed")
+    print(f"fit(): {elapsed / turns * 1e6:.0f} µs per turn, {len(context.messages)} messages kept")
@@ -0,0 +1,101 @@
+"""Bounded Conversation History for Sessions
+
+A session keeps its most recent HISTORY_MAX_TURNS turns in a ring buffer of
+slotted records; each turn pushed out of the buffer is folded into a short
+rolling summary instead, so a session's history stays the same size however
+long the call runs. Roles are interned and timestamps are integer epoch
+milliseconds that never go backwards within a history.
+"""
+import os
+import sys
+import time
+from typing import Iterator, List, Optional
+
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "50"))
+HISTORY_MAX_MESSAGE_CHARS = int(os.getenv("HISTORY_MAX_MESSAGE_CHARS", "1000"))
+HISTORY_SUMMARY_CHARS = int(os.getenv("HISTORY_SUMMARY_CHARS", "1000"))
+# Characters of each rolled-up turn kept in the summary
+SUMMARY_SNIPPET_CHARS = 80
+
+
+class Turn:
+    __slots__ = ("role", "message", "ts_ms")
+
+    def __init__(self, role: str, message: str, ts_ms: int):
+        self.role = role
+        self.message = message
+        self.ts_ms = ts_ms
+
+    def to_dict(self) -> dict:
+        return {"role": self.role, "message": self.message, "ts_ms": self.ts_ms}
+
+
+class ConversationHistory:
+    __slots__ = ("max_turns", "_turns", "_start", "summary", "rolled_up", "_last_ts")
+
+    def __init__(self, max_turns: int = HISTORY_MAX_TURNS):
+        self.max_turns = max_turns
+        self._turns: List[Turn] = []  # ring buffer once full; _start is the oldest turn
+        self._start = 0
+        self.summary = ""  # condensed older turns, oldest dropped first
+        self.rolled_up = 0  # turns folded into the summary so far
+        self._last_ts = 0
+
+    def append(self, role: str, message: str, ts_ms: Optional[int] = None) -> Turn:
+        if ts_ms is None:
+            ts_ms = max(time.time_ns() // 1_000_000, self._last_ts)
+        self._last_ts = ts_ms
+        turn = Turn(sys.intern(role), message[:HISTORY_MAX_MESSAGE_CHARS], ts_ms)
+        if len(self._turns) < self.max_turns:
+            self._turns.append(turn)
+        else:
+            self._roll_up(self._turns[self._start])
+            self._turns[self._start] = turn
+            self._start = (self._start + 1) % self.max_turns
+        return turn
+
+    def _roll_up(self, turn: Turn):
+        snippet = turn.message if len(turn.message) <= SUMMARY_SNIPPET_CHARS else turn.message[:SUMMARY_SNIPPET_CHARS] + "…"
+        summary = f"{self.summary} {turn.role}: {snippet}".strip()
+        if len(summary) > HISTORY_SUMMARY_CHARS:
+            # Keep the newest part, starting at a word boundary
+            summary = summary[-HISTORY_SUMMARY_CHARS:]
+            cut = summary.find(" ", 1)
+            summary = "…" + summary[cut + 1:] if cut > 0 else summary
+        self.summary = summary
+        self.rolled_up += 1
+
+    def recent(self, count: int) -> List[Turn]:
+        """The last `count` turns, oldest first."""
+        return list(self)[-count:] if count else []
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[Turn]:
+        if self._start:
+            return iter(self._turns[self._start:] + self._turns[:self._start])
+        return iter(self._turns)
+
+    def to_dict(self) -> dict:
+        return {
+            "turns": [[turn.role, turn.message, turn.ts_ms] for turn in self],
+            "summary": self.summary,
+            "rolled_up": self.rolled_up,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, max_turns: int = HISTORY_MAX_TURNS) -> "ConversationHistory":
+        history = cls(max_turns)
+        history.summary = data.get("summary", "")
+        history.rolled_up = data.get("rolled_up", 0)
+        turns = data.get("turns", ())
+        if len(turns) > max_turns:
+            # Stored under a larger cap; roll the excess into the summary
+            for role, message, ts_ms in turns[:-max_turns]:
+                history._roll_up(Turn(role, message, ts_ms))
+            turns = turns[-max_turns:]
+        history._turns = [Turn(sys.intern(role), message, ts_ms) for role, message, ts_ms in turns]
+        if history._turns:
+            history._last_ts = history._turns[-1].ts_ms
+        return history
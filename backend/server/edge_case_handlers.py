@@ -1,195 +1,238 @@
 """Edge Case Handlers for Robust Government Service Experience"""
-from mock_data import PRODUCTS, CART
+from mock_data import SERVICES, CITIZENS, REQUESTS
+from tool_registry import tool
 import random
 
-async def handle_out_of_stock(function_name, tool_call_id, arguments, llm, context, result_callback):
-    """Handle out of stock scenarios with alternatives"""
-    sku = arguments.get("sku", "")
-    
-    if sku not in PRODUCTS:
-        await result_callback("Product not found.")
+@tool("Handle an unavailable service by offering alternatives in the same category",
+      required=["service_id"],
+      service_id=("string", "Service ID"))
+async def handle_service_unavailable(function_name, tool_call_id, arguments, llm, context, result_callback):
+    """Handle unavailable services with alternatives"""
+    service_id = arguments.get("service_id", "")
+
+    if service_id not in SERVICES:
+        await result_callback("Service not found.")
         return
-    
-    product = PRODUCTS[sku]
-    
-    # Simulate out of stock
-    if random.choice([True, False]):
-        # Find alternative in same category
-        alternatives = [s for s, p in PRODUCTS.items() 
-                       if p["category"] == product["category"] and s != sku]
-        
-        if alternatives:
-            alt_sku = alternatives[0]
-            alt_product = PRODUCTS[alt_sku]
-            await result_callback(
-                f"Sorry, {product['name']} is currently out of stock. "
-                f"However, we have {alt_product['name']} (₹{alt_product['price']}) available. "
-                f"Would you like to see this instead?"
-            )
-        else:
-            await result_callback(
-                f"{product['name']} is out of stock. "
-                f"We can notify you when it's back in stock. Would you like that?"
-            )
+
+    service = SERVICES[service_id]
+
+    if service["availability"]["status"] == "active":
+        await result_callback(f"{service['name']} is available right now!")
+        return
+
+    # Find an active alternative in the same category
+    alternatives = [s for s, svc in SERVICES.items()
+                   if svc["category"] == service["category"] and s != service_id
+                   and svc["availability"]["status"] == "active"]
+
+    if alternatives:
+        alt_service = SERVICES[alternatives[0]]
+        await result_callback(
+            f"Sorry, {service['name']} is temporarily unavailable. "
+            f"However, {alt_service['name']} ({alternatives[0]}) is open for applications. "
+            f"Would you like to apply for that instead?"
+        )
     else:
-        await result_callback(f"{product['name']} is in stock!")
+        await result_callback(
+            f"{service['name']} is temporarily unavailable. "
+            f"Next available: {service['availability'].get('next_available', 'N/A')}. "
+            f"We can notify you when it opens. Would you like that?"
+        )
 
 
-async def handle_payment_retry(function_name, tool_call_id, arguments, llm, context, result_callback):
-    """Handle payment failures with retry logic"""
-    amount = arguments.get("amount", 0)
-    method = arguments.get("method", "card")
+@tool("Retry a failed application submission or suggest other ways to submit",
+      retry_count=("number", "Retry attempt"))
+async def handle_submission_retry(function_name, tool_call_id, arguments, llm, context, result_callback):
+    """Handle application submission failures with retry logic"""
     retry_count = arguments.get("retry_count", 0)
-    
+
     if retry_count >= 2:
         await result_callback(
-            "Payment failed multiple times. Please try a different payment method "
-            "or contact your bank. You can also complete this purchase later."
+            "Submission failed multiple times. You can submit at your nearest service office "
+            "or kiosk, or I can connect you to a human agent. Your applications are saved."
         )
         return
-    
-    # Simulate payment with failure rate
+
+    # Simulate submission with failure rate
     success = random.choice([True, True, False])
-    
+
     if success:
-        order_id = f"ORD{random.randint(10000, 99999)}"
-        await result_callback(f"Payment successful! Order ID: {order_id}")
+        request_id = f"REQ{random.randint(10000, 99999)}"
+        await result_callback(f"Application submitted successfully! Request ID: {request_id}")
     else:
         await result_callback(
-            f"Payment failed. This could be due to insufficient funds or network issues. "
-            f"Would you like to try again or use a different payment method?"
+            f"Submission failed. This could be due to missing information or network issues. "
+            f"Would you like to try again or submit at a service office?"
         )
 
 
-async def modify_order(function_name, tool_call_id, arguments, llm, context, result_callback):
-    """Modify existing order before shipment"""
-    order_id = arguments.get("order_id", "")
-    action = arguments.get("action", "")  # add_item, remove_item, change_address
-    
-    # Simulate order modification
-    if action == "add_item":
+@tool("Modify a submitted request before it is processed",
+      required=["request_id"],
+      request_id=("string", "Request ID"),
+      action=("string", "add_document, withdraw, or change_address"))
+async def modify_request(function_name, tool_call_id, arguments, llm, context, result_callback):
+    """Modify a submitted request before processing"""
+    request_id = arguments.get("request_id", "")
+    action = arguments.get("action", "")  # add_document, withdraw, change_address
+
+    if action == "add_document":
         await result_callback(
-            f"I've added the item to order {order_id}. "
-            f"Updated total will be charged to your payment method."
+            f"You can add documents to request {request_id}. "
+            f"Upload them on the portal or bring them to any service office."
         )
-    elif action == "remove_item":
+    elif action == "withdraw":
+        if request_id in REQUESTS:
+            REQUESTS[request_id].status = "withdrawn"
         await result_callback(
-            f"Item removed from order {order_id}. "
-            f"Refund will be processed within 3-5 business days."
+            f"Request {request_id} has been withdrawn. "
+            f"You can apply again at any time."
         )
     elif action == "change_address":
         await result_callback(
-            f"Delivery address updated for order {order_id}. "
-            f"New estimated delivery: 3-5 days."
+            f"Correspondence address updated for request {request_id}. "
+            f"Documents will be sent to the new address."
         )
     else:
         await result_callback(
-            f"Order {order_id} can be modified. What would you like to change?"
+            f"Request {request_id} can be modified. What would you like to change?"
         )
 
 
-async def handle_price_objection(function_name, tool_call_id, arguments, llm, context, result_callback):
-    """Handle price objections with offers"""
-    sku = arguments.get("sku", "")
-    
-    if sku not in PRODUCTS:
-        await result_callback("Product not found.")
+@tool("Handle a citizen's concern about eligibility for a service",
+      required=["service_id"],
+      service_id=("string", "Service ID"),
+      citizen_id=("string", "Citizen ID"))
+async def handle_eligibility_objection(function_name, tool_call_id, arguments, llm, context, result_callback):
+    """Handle eligibility concerns with requirements and alternatives"""
+    service_id = arguments.get("service_id", "")
+    citizen_id = arguments.get("citizen_id", "CIT001")
+
+    if service_id not in SERVICES:
+        await result_callback("Service not found.")
         return
-    
-    product = PRODUCTS[sku]
-    
+
+    service = SERVICES[service_id]
+    citizen = CITIZENS.get(citizen_id, CITIZENS["CIT001"])
+    # Imported here so NumPy loads on first use, not while the bot starts
+    from eligibility_engine import get_engine
+    eligible = get_engine().eligible_for(citizen)
+
     # Offer solutions
     responses = [
-        f"I understand. {product['name']} is priced at ₹{product['price']}. "
-        f"We have a SAVE20 coupon that gives 20% off on purchases above ₹2000. "
-        f"Would you like to add more items to qualify?",
-        
-        f"The price reflects premium quality. However, as a valued customer, "
-        f"I can check if you have loyalty points to offset the cost. "
-        f"Let me check your account.",
-        
-        f"I can show you similar items in a lower price range. "
-        f"What's your budget?"
+        f"I understand. {service['name']} is meant for: {service['eligibility']}. "
+        f"If your situation has changed recently, updated documents may make you eligible.",
+
+        f"Based on your profile you already qualify for: {', '.join(eligible)}. "
+        f"Would you like to hear more about any of these?" if eligible else
+        f"Let me look for similar services with different eligibility requirements.",
+
+        f"A human agent can review your case if you think the requirements "
+        f"don't reflect your situation. Would you like me to arrange that?"
     ]
-    
+
     await result_callback(random.choice(responses))
 
 
+@tool("Recommend services that are commonly applied for together",
+      category=("string", "Service category"))
 async def bundle_recommendation(function_name, tool_call_id, arguments, llm, context, result_callback):
-    """Recommend product bundles for better value"""
+    """Recommend service bundles for comprehensive support"""
     category = arguments.get("category", "")
-    
+
     bundles = {
-        "Tops": "Pair with our Bottoms collection and get 15% off on the combo!",
-        "Bottoms": "Complete the look with our Tops and Accessories - save ₹500 on bundle!",
-        "Footwear": "Add matching accessories and get free shipping!",
-        "Dresses": "Pair with our Accessories collection for a complete look - 10% off!"
+        "Healthcare": "Families on the Healthcare Subsidy often also qualify for Disability Support Services.",
+        "Education": "Pair an Education Grant with our Skill Training Program for complete support.",
+        "Employment": "Unemployment Benefits work best alongside our Skill Training Program.",
+        "Family Services": "Child Care Subsidy applicants often also benefit from Housing Assistance."
     }
-    
-    response = bundles.get(category, "Check out our combo offers for great savings!")
+
+    response = bundles.get(category, "Ask me about services that are often applied for together!")
     await result_callback(response)
 
 
-async def notify_back_in_stock(function_name, tool_call_id, arguments, llm, context, result_callback):
-    """Register for back-in-stock notifications"""
-    sku = arguments.get("sku", "")
+@tool("Register to be notified when an unavailable service opens",
+      required=["service_id"],
+      service_id=("string", "Service ID"),
+      email=("string", "Email address to notify"),
+      phone=("string", "Phone number to notify by SMS"))
+async def notify_when_available(function_name, tool_call_id, arguments, llm, context, result_callback):
+    """Register for service availability notifications"""
+    service_id = arguments.get("service_id", "")
     email = arguments.get("email", "")
     phone = arguments.get("phone", "")
-    
-    if sku not in PRODUCTS:
-        await result_callback("Product not found.")
+
+    if service_id not in SERVICES:
+        await result_callback("Service not found.")
+        return
+
+    service = SERVICES[service_id]
+    channels = [f"email at {email}"] if email else []
+    if phone:
+        channels.append(f"SMS at {phone}")
+    if not channels:
+        await result_callback(
+            f"I can notify you when {service['name']} opens. "
+            f"Which email address or phone number should we use?"
+        )
         return
-    
-    product = PRODUCTS[sku]
     await result_callback(
-        f"You'll be notified when {product['name']} is back in stock. "
-        f"We'll send updates via email and SMS."
+        f"You'll be notified when {service['name']} opens for applications. "
+        f"We'll send updates by {' and '.join(channels)}."
     )
 
 
-async def gift_wrap_service(function_name, tool_call_id, arguments, llm, context, result_callback):
-    """Add gift wrapping service"""
-    order_id = arguments.get("order_id", "")
-    message = arguments.get("message", "")
-    
+@tool("Request priority processing of a submitted request",
+      required=["request_id"],
+      request_id=("string", "Request ID"),
+      reason=("string", "Reason for urgency"))
+async def request_priority_processing(function_name, tool_call_id, arguments, llm, context, result_callback):
+    """Request priority processing for urgent cases"""
+    request_id = arguments.get("request_id", "")
+    reason = arguments.get("reason", "")
+
     await result_callback(
-        f"Gift wrapping added to order {order_id} for ₹99. "
-        f"Your personalized message will be included. "
-        f"Perfect for gifting!"
+        f"Priority processing requested for {request_id}. "
+        f"A case officer will review your reason ({reason or 'not given'}) and contact you within 2 business days."
     )
 
 
-async def size_fit_guide(function_name, tool_call_id, arguments, llm, context, result_callback):
-    """Provide size and fit guidance"""
-    sku = arguments.get("sku", "")
-    
-    if sku not in PRODUCTS:
-        await result_callback("Product not found.")
+@tool("List the documents needed to apply for a service",
+      required=["service_id"],
+      service_id=("string", "Service ID"))
+async def document_checklist(function_name, tool_call_id, arguments, llm, context, result_callback):
+    """Provide the document checklist for a service"""
+    service_id = arguments.get("service_id", "")
+
+    if service_id not in SERVICES:
+        await result_callback("Service not found.")
         return
-    
-    product = PRODUCTS[sku]
-    category = product["category"]
-    
-    guides = {
-        "Tops": "For shirts, measure chest circumference. S(36-38), M(39-41), L(42-44), XL(45-47)",
-        "Bottoms": "For jeans, measure waist. 28-30(S), 31-33(M), 34-36(L), 37-39(XL)",
-        "Footwear": "Measure foot length. UK 6-7(S), 8-9(M), 10-11(L)",
-        "Dresses": "Measure bust and waist. S(32-34), M(36-38), L(40-42)"
+
+    service = SERVICES[service_id]
+    category = service["category"]
+
+    checklists = {
+        "Healthcare": "Aadhaar card, income certificate, and medical records or prescriptions",
+        "Education": "Aadhaar card, age proof, admission letter, and family income certificate",
+        "Identification": "Old passport, Aadhaar card, and address proof",
+        "Housing": "Aadhaar card, income certificate, and rental agreement or property papers",
+        "Employment": "Aadhaar card, termination letter, and bank account details"
     }
-    
-    guide = guides.get(category, "Check product description for size chart")
-    await result_callback(f"{product['name']} sizing: {guide}")
+
+    checklist = checklists.get(category, "Aadhaar card and address proof; the service page lists anything else")
+    await result_callback(f"For {service['name']} you will need: {checklist}. Offices can help scan documents.")
 
 
-async def store_locator(function_name, tool_call_id, arguments, llm, context, result_callback):
-    """Find nearest store location"""
+@tool("Find the nearest government service office",
+      city=("string", "City name"))
+async def office_locator(function_name, tool_call_id, arguments, llm, context, result_callback):
+    """Find nearest service office location"""
     city = arguments.get("city", "")
-    
-    stores = {
-        "Mumbai": "Store at Phoenix Mall, Lower Parel. Open 10 AM - 10 PM",
-        "Delhi": "Store at Select City Walk, Saket. Open 10 AM - 10 PM",
-        "Bangalore": "Store at UB City, Vittal Mallya Road. Open 10 AM - 10 PM"
+
+    offices = {
+        "Mumbai": "Citizen Service Centre at Bandra Kurla Complex. Open 9 AM - 5 PM, Monday to Saturday",
+        "Delhi": "Citizen Service Centre at ITO. Open 9 AM - 5 PM, Monday to Saturday",
+        "Bangalore": "Citizen Service Centre at MS Building. Open 9 AM - 5 PM, Monday to Saturday"
     }
-    
-    store_info = stores.get(city, "We have stores in Mumbai, Delhi, and Bangalore")
-    await result_callback(f"{store_info}. Would you like to reserve items for in-store pickup?")
+
+    office_info = offices.get(city, "We have service centres in Mumbai, Delhi, and Bangalore")
+    await result_callback(f"{office_info}. Would you like to book an appointment slot?")
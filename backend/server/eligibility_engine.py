@@ -0,0 +1,206 @@
+"""Columnar Eligibility Engine for Citizen × Benefit Evaluation
+
+Citizens are held as NumPy columns and each benefit's rule (see
+eligibility_rules) is compiled once when the benefits are loaded, so
+eligibility for a whole batch of citizens against every benefit is a handful
+of vectorized comparisons per benefit. Results come back sparse (CSR: row
+offsets plus benefit indices) since most citizens qualify for only a few
+benefits.
+
+Run `python eligibility_engine.py` to benchmark 1M citizens.
+"""
+import os
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from eligibility_rules import CATEGORICAL_FIELDS, NUMERIC_FIELDS, Rule, benefit_rule, compile_checks
+
+ELIGIBILITY_BATCH_SIZE = int(os.getenv("ELIGIBILITY_BATCH_SIZE", "65536"))
+
+
+class CitizenColumns:
+    """Citizen attributes as parallel NumPy arrays.
+
+    `columns` holds numeric fields and integer codes for categorical ones,
+    with `categories` mapping each categorical value to its code; `history`
+    holds one boolean column per service ID for service_history.
+    """
+
+    __slots__ = ("ids", "columns", "categories", "history")
+
+    def __init__(self, ids: List[str], columns: Dict[str, np.ndarray],
+                 categories: Dict[str, Dict[str, int]] = None, history: Dict[str, np.ndarray] = None):
+        self.ids = ids
+        self.columns = columns
+        self.categories = categories or {}
+        self.history = history or {}
+
+    @staticmethod
+    def encode(values) -> Tuple[np.ndarray, Dict[str, int]]:
+        """Integer codes and the value -> code mapping for a categorical column."""
+        uniques, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        return codes.astype(np.int32), {value: code for code, value in enumerate(uniques.tolist())}
+
+    @classmethod
+    def from_records(cls, citizens: Dict[str, dict]) -> "CitizenColumns":
+        records = list(citizens.values())
+        columns, categories = {}, {}
+        for field in NUMERIC_FIELDS:
+            columns[field] = np.array([record.get(field, 0) for record in records], dtype=np.float64)
+        for field in CATEGORICAL_FIELDS:
+            columns[field], categories[field] = cls.encode([record.get(field, "") for record in records])
+
+        history: Dict[str, np.ndarray] = {}
+        for row, record in enumerate(records):
+            for service_id in record.get("service_history", ()):
+                if service_id not in history:
+                    history[service_id] = np.zeros(len(records), dtype=bool)
+                history[service_id][row] = True
+        return cls(list(citizens), columns, categories, history)
+
+    def slice(self, start: int, stop: int) -> "CitizenColumns":
+        """A batch of rows; arrays are views, not copies."""
+        return CitizenColumns(
+            self.ids[start:stop],
+            {field: column[start:stop] for field, column in self.columns.items()},
+            self.categories,
+            {service_id: column[start:stop] for service_id, column in self.history.items()},
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class EligibilityEngine:
+    """Evaluates citizens against every benefit at once."""
+
+    def __init__(self, benefits: Dict[str, dict]):
+        self.benefit_ids = list(benefits)
+        self.index = {benefit_id: i for i, benefit_id in enumerate(self.benefit_ids)}
+        self.rules = [Rule(benefit_rule(benefit)) for benefit in benefits.values()]
+        self._eligible = compile_checks(self.benefit_ids, self.rules)
+
+    def mask(self, citizens: CitizenColumns) -> np.ndarray:
+        """Boolean (citizens × benefits) eligibility matrix."""
+        result = np.empty((len(citizens), len(self.rules)), dtype=bool)
+        for i, rule in enumerate(self.rules):
+            result[:, i] = rule.mask(citizens)
+        return result
+
+    def batches(self, citizens: CitizenColumns,
+                batch_size: int = ELIGIBILITY_BATCH_SIZE) -> Iterator[Tuple[int, np.ndarray]]:
+        """(first row, packed bitmap) per batch; bits are benefits, little-endian."""
+        for start in range(0, len(citizens), batch_size):
+            mask = self.mask(citizens.slice(start, start + batch_size))
+            yield start, np.packbits(mask, axis=1, bitorder="little")
+
+    def evaluate(self, citizens: CitizenColumns,
+                 batch_size: int = ELIGIBILITY_BATCH_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse eligibility for every citizen as CSR arrays (indptr, benefit indices).
+
+        Citizen i qualifies for benefit_ids[j] for each j in
+        indices[indptr[i]:indptr[i + 1]].
+        """
+        counts = np.empty(len(citizens), dtype=np.int64)
+        chunks = []
+        for start in range(0, len(citizens), batch_size):
+            mask = self.mask(citizens.slice(start, start + batch_size))
+            counts[start:start + len(mask)] = mask.sum(axis=1)
+            chunks.append(np.nonzero(mask)[1].astype(np.int32))
+
+        indptr = np.zeros(len(citizens) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        indices = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+        return indptr, indices
+
+    def eligible_for(self, citizen: dict) -> List[str]:
+        """Benefit IDs one citizen qualifies for."""
+        return self._eligible(citizen)
+
+    def is_eligible(self, citizen: dict, benefit_id: str) -> bool:
+        i = self.index.get(benefit_id)
+        return i is not None and self.rules[i](citizen)
+
+    def explain(self, citizen: dict, benefit_id: str) -> str:
+        """One sentence on why a citizen does or does not qualify, for the agent to quote."""
+        i = self.index.get(benefit_id)
+        if i is None:
+            return f"There is no benefit called {benefit_id}."
+        passed, conditions = self.rules[i].explain(citizen)
+        if passed:
+            reasons = [description for description, ok in conditions if ok]
+            return f"Eligible for {benefit_id}: " + "; ".join(reasons) + "."
+        reasons = [description for description, ok in conditions if not ok]
+        return f"Not eligible for {benefit_id}: " + "; ".join(reasons) + "."
+
+
+_engine = None
+
+
+def get_engine() -> EligibilityEngine:
+    """Engine for mock_data.BENEFITS, built on first use."""
+    global _engine
+    if _engine is None:
+        from mock_data import BENEFITS
+        _engine = EligibilityEngine(BENEFITS)
+    return _engine
+
+
+if __name__ == "__main__":
+    import time
+
+    from mock_data import BENEFITS
+
+    CITIZENS = 1_000_000
+    rng = np.random.default_rng(13)
+    CHANNELS = ["web", "phone", "whatsapp", "kiosk"]
+    TIERS = ["Bronze", "Silver", "Gold", "Platinum"]
+    channel, channels = CitizenColumns.encode(rng.choice(CHANNELS, CITIZENS))
+    tier, tiers = CitizenColumns.encode(rng.choice(TIERS, CITIZENS))
+    citizens = CitizenColumns(
+        [f"CIT{i:07d}" for i in range(CITIZENS)],
+        {
+            "income": rng.lognormal(12.8, 0.6, CITIZENS).round(),
+            "age": rng.integers(0, 95, CITIZENS).astype(np.float64),
+            "benefits_points": rng.integers(0, 7000, CITIZENS).astype(np.float64),
+            "channel": channel,
+            "benefits_tier": tier,
+        },
+        {"channel": channels, "benefits_tier": tiers},
+        {f"SVC{i:03d}": rng.random(CITIZENS) < 0.1 for i in range(1, 13)},
+    )
+    synthetic = dict(BENEFITS)
+    for i in range(len(synthetic), 500):
+        low = int(rng.integers(0, 60))
+        synthetic[f"benefit_{i}"] = {"rule": (
+            f"income <= {int(rng.integers(1, 20)) * 50_000} and age between {low} and {low + int(rng.integers(5, 40))}"
+            f" and (channel in ({', '.join(rng.choice(CHANNELS, 2, replace=False))})"
+            f" or benefits_tier == {rng.choice(TIERS)}) and not service_history has SVC{int(rng.integers(1, 13)):03d}"
+        )}
+
+    for benefits in (BENEFITS, synthetic):
+        start = time.perf_counter()
+        engine = EligibilityEngine(benefits)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        indptr, indices = engine.evaluate(citizens)
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        packed_bytes = sum(bitmap.nbytes for _, bitmap in engine.batches(citizens))
+        bitmap_elapsed = time.perf_counter() - start
+
+        print(f"{CITIZENS:,} citizens × {len(benefits)} benefits (rules compiled in {compile_ms:.1f} ms): "
+              f"sparse in {elapsed * 1000:.0f} ms ({CITIZENS / elapsed / 1e6:.2f}M citizens/s, "
+              f"{len(indices) / CITIZENS:.1f} benefits each), packed bitmap in {bitmap_elapsed * 1000:.0f} ms "
+              f"({packed_bytes / 1e6:.1f} MB)")
+
+        sample = {"income": 300000, "age": 35, "benefits_points": 2500, "channel": "web",
+                  "benefits_tier": "Gold", "service_history": ["SVC001", "SVC005"]}
+        start = time.perf_counter()
+        for _ in range(2_000):
+            engine.eligible_for(sample)
+        print(f"  one citizen against all {len(benefits)} benefits: "
+              f"{(time.perf_counter() - start) / 2_000 * 1e6:.1f} µs")
@@ -0,0 +1,397 @@
+"""Eligibility Rule Language for Benefit Definitions
+
+Each benefit states who qualifies as a small expression over citizen fields:
+
+    income <= 400000
+    age between 18 and 25 and channel in (web, whatsapp)
+    benefits_tier in (Gold, Platinum) or service_history has SVC006
+    not (income > 800000) and service_history has any (SVC001, SVC009)
+
+Numeric fields (income, age, benefits_points) take <, <=, >, >=, ==, != and
+`between a and b` (inclusive) against numbers; categorical fields (channel,
+benefits_tier) take ==, != and `in (...)` against names; service_history takes
+`has X` and `has any (...)`. Conditions combine with and / or / not and
+parentheses, and an operator used on the wrong kind of field is a RuleError.
+Rules are parsed and compiled once, when the benefits are loaded, into a
+Python predicate for one citizen and a NumPy mask builder for citizen
+columns, and can explain which conditions passed.
+"""
+import operator
+import re
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+NUMERIC_FIELDS = {"income", "age", "benefits_points"}
+CATEGORICAL_FIELDS = {"channel", "benefits_tier"}
+LIST_FIELDS = {"service_history"}
+# Compiled predicates read every field into a local first, with these defaults
+_FIELD_DEFAULTS = {"income": 0, "age": 0, "benefits_points": 0, "channel": "", "benefits_tier": "", "service_history": ()}
+_PRELUDE = "".join(f"    {field} = c.get({field!r}, {default!r})\n" for field, default in _FIELD_DEFAULTS.items())
+
+
+def _field(citizen: dict, field: str):
+    """A citizen's field as the compiled predicates read it."""
+    return citizen.get(field, _FIELD_DEFAULTS[field])
+
+_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+        "==": operator.eq, "!=": operator.ne}
+_NEGATED = {"<": ">=", "<=": ">", ">": "<=", ">=": "<", "==": "!=", "!=": "=="}
+_OP_WORDS = {"<": "below", "<=": "at most", ">": "above", ">=": "at least", "==": "", "!=": "anything but"}
+_TOKEN_RE = re.compile(r"\s*(?:(<=|>=|==|!=|<|>|\(|\)|,)|(\d[\d_]*(?:\.\d+)?)|\"([^\"]*)\"|'([^']*)'|([\w+-]+))")
+
+
+class RuleError(ValueError):
+    """A benefit rule could not be parsed or refers to an unknown field."""
+
+
+def _tokenize(source: str) -> List[Tuple[str, object]]:
+    tokens, position = [], 0
+    source = source.rstrip()
+    while position < len(source):
+        match = _TOKEN_RE.match(source, position)
+        if not match:
+            raise RuleError(f"Unexpected character at {position} in rule: {source!r}")
+        symbol, number, double_quoted, single_quoted, word = match.groups()
+        if symbol:
+            tokens.append(("op", symbol))
+        elif number:
+            value = float(number.replace("_", ""))
+            tokens.append(("value", int(value) if value.is_integer() else value))
+        elif double_quoted is not None or single_quoted is not None:
+            tokens.append(("value", double_quoted if double_quoted is not None else single_quoted))
+        else:
+            keyword = word.lower()
+            if keyword in ("and", "or", "not", "in", "between", "has", "any"):
+                tokens.append(("kw", keyword))
+            else:
+                tokens.append(("word", word))
+        position = match.end()
+    return tokens
+
+
+class Node:
+    """A compiled rule expression."""
+
+    def source(self, names: Dict[str, object]) -> str:
+        """Python expression over the citizen's fields; constants are added to `names`."""
+        raise NotImplementedError
+
+    def mask(self, citizens) -> np.ndarray:
+        """Boolean array over CitizenColumns."""
+        raise NotImplementedError
+
+    def explain(self, citizen: dict, out: List[Tuple[str, bool]]) -> bool:
+        """Evaluate, appending (description, passed) for each condition."""
+        raise NotImplementedError
+
+
+class Compare(Node):
+    def __init__(self, field: str, op: str, value):
+        self.field, self.op, self.value = field, op, value
+
+    def source(self, names):
+        return f"({self.field} {self.op} {self.value!r})"
+
+    def mask(self, citizens):
+        if self.field in CATEGORICAL_FIELDS:
+            # Categorical columns hold integer codes
+            code = citizens.categories[self.field].get(self.value, -1)
+            return _OPS[self.op](citizens.columns[self.field], code)
+        return _OPS[self.op](citizens.columns[self.field], self.value)
+
+    def explain(self, citizen, out):
+        actual = _field(citizen, self.field)
+        passed = _OPS[self.op](actual, self.value)
+        needs = f"{_OP_WORDS[self.op]} {self.value}".strip()
+        out.append((f"{self.field} is {actual}, needs {needs}", passed))
+        return passed
+
+
+class Between(Node):
+    def __init__(self, field: str, low, high):
+        self.field, self.low, self.high = field, low, high
+
+    def source(self, names):
+        return f"({self.low!r} <= {self.field} <= {self.high!r})"
+
+    def mask(self, citizens):
+        column = citizens.columns[self.field]
+        return (column >= self.low) & (column <= self.high)
+
+    def explain(self, citizen, out):
+        actual = _field(citizen, self.field)
+        passed = self.low <= actual <= self.high
+        out.append((f"{self.field} is {actual}, needs between {self.low} and {self.high}", passed))
+        return passed
+
+
+class In(Node):
+    def __init__(self, field: str, values: List):
+        self.field, self.values = field, frozenset(values)
+
+    def source(self, names):
+        name = f"_k{len(names)}"
+        names[name] = self.values
+        return f"({self.field} in {name})"
+
+    def mask(self, citizens):
+        categories = citizens.categories[self.field]
+        table = np.zeros(len(categories) + 1, dtype=bool)  # last slot for unknown (-1) codes
+        for value in self.values:
+            if value in categories:
+                table[categories[value]] = True
+        return table[citizens.columns[self.field]]
+
+    def explain(self, citizen, out):
+        actual = _field(citizen, self.field)
+        passed = actual in self.values
+        out.append((f"{self.field} is {actual}, needs one of {', '.join(sorted(map(str, self.values)))}", passed))
+        return passed
+
+
+class Has(Node):
+    """service_history has X / has any (X, Y)"""
+
+    def __init__(self, field: str, values: List):
+        self.field, self.values = field, frozenset(values)
+
+    def source(self, names):
+        name = f"_k{len(names)}"
+        names[name] = self.values
+        return f"(not {name}.isdisjoint({self.field}))"
+
+    def mask(self, citizens):
+        result = np.zeros(len(citizens), dtype=bool)
+        for value in self.values:
+            column = citizens.history.get(value)
+            if column is not None:
+                result |= column
+        return result
+
+    def explain(self, citizen, out):
+        passed = not self.values.isdisjoint(_field(citizen, self.field))
+        needs = " or ".join(sorted(self.values))
+        out.append((f"{self.field} {'includes' if passed else 'does not include'} {needs}", passed))
+        return passed
+
+
+class And(Node):
+    def __init__(self, parts: List[Node]):
+        self.parts = parts
+
+    def source(self, names):
+        return "(" + " and ".join(part.source(names) for part in self.parts) + ")"
+
+    def mask(self, citizens):
+        result = self.parts[0].mask(citizens)
+        for part in self.parts[1:]:
+            result = result & part.mask(citizens)
+        return result
+
+    def explain(self, citizen, out):
+        results = [part.explain(citizen, out) for part in self.parts]
+        return all(results)
+
+
+class Or(Node):
+    def __init__(self, parts: List[Node]):
+        self.parts = parts
+
+    def source(self, names):
+        return "(" + " or ".join(part.source(names) for part in self.parts) + ")"
+
+    def mask(self, citizens):
+        result = self.parts[0].mask(citizens)
+        for part in self.parts[1:]:
+            result = result | part.mask(citizens)
+        return result
+
+    def explain(self, citizen, out):
+        results = [part.explain(citizen, out) for part in self.parts]
+        return any(results)
+
+
+class Not(Node):
+    def __init__(self, part: Node):
+        self.part = part
+
+    def source(self, names):
+        return f"(not {self.part.source(names)})"
+
+    def mask(self, citizens):
+        return ~self.part.mask(citizens)
+
+    def explain(self, citizen, out):
+        inner: List[Tuple[str, bool]] = []
+        passed = not self.part.explain(citizen, inner)
+        out.extend((f"not ({description})", not ok) for description, ok in inner)
+        return passed
+
+
+class _Parser:
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = _tokenize(source)
+        self.position = 0
+
+    def error(self, message: str) -> RuleError:
+        return RuleError(f"{message} in rule: {self.source!r}")
+
+    def peek(self, kind: str = None, value=None) -> bool:
+        if self.position >= len(self.tokens):
+            return False
+        token_kind, token_value = self.tokens[self.position]
+        return (kind is None or token_kind == kind) and (value is None or token_value == value)
+
+    def take(self, kind: str, value=None):
+        if not self.peek(kind, value):
+            found = self.tokens[self.position][1] if self.position < len(self.tokens) else "end of rule"
+            raise self.error(f"Expected {value or kind}, found {found!r}")
+        self.position += 1
+        return self.tokens[self.position - 1][1]
+
+    def parse(self) -> Node:
+        node = self.expression()
+        if self.position != len(self.tokens):
+            raise self.error(f"Unexpected {self.tokens[self.position][1]!r}")
+        return node
+
+    def expression(self) -> Node:
+        parts = [self.conjunction()]
+        while self.peek("kw", "or"):
+            self.position += 1
+            parts.append(self.conjunction())
+        return parts[0] if len(parts) == 1 else Or(parts)
+
+    def conjunction(self) -> Node:
+        parts = [self.negation()]
+        while self.peek("kw", "and"):
+            self.position += 1
+            parts.append(self.negation())
+        return parts[0] if len(parts) == 1 else And(parts)
+
+    def negation(self) -> Node:
+        if self.peek("kw", "not"):
+            self.position += 1
+            node = self.negation()
+            if isinstance(node, Compare):
+                return Compare(node.field, _NEGATED[node.op], node.value)
+            return Not(node)
+        if self.peek("op", "("):
+            self.position += 1
+            node = self.expression()
+            self.take("op", ")")
+            return node
+        return self.condition()
+
+    def value(self):
+        if self.peek("word"):
+            return self.take("word")
+        return self.take("value")
+
+    def number(self):
+        value = self.take("value")
+        if not isinstance(value, (int, float)):
+            raise self.error(f"Expected a number, found {value!r}")
+        return value
+
+    def name(self):
+        value = self.value()
+        if not isinstance(value, str):
+            raise self.error(f"Expected a name, found {value!r}")
+        return value
+
+    def names(self) -> List:
+        self.take("op", "(")
+        values = [self.name()]
+        while self.peek("op", ","):
+            self.position += 1
+            values.append(self.name())
+        self.take("op", ")")
+        return values
+
+    def condition(self) -> Node:
+        field = self.take("word")
+        if field in LIST_FIELDS:
+            self.take("kw", "has")
+            if self.peek("kw", "any"):
+                self.position += 1
+                return Has(field, self.names())
+            return Has(field, [self.name()])
+
+        if field not in NUMERIC_FIELDS and field not in CATEGORICAL_FIELDS:
+            raise self.error(f"Unknown field {field!r}")
+        numeric = field in NUMERIC_FIELDS
+        if self.peek("kw", "between"):
+            if not numeric:
+                raise self.error(f"{field} is not numeric, so it does not support between")
+            self.position += 1
+            low = self.number()
+            self.take("kw", "and")
+            return Between(field, low, self.number())
+        if self.peek("kw", "in"):
+            if numeric:
+                raise self.error(f"{field} is numeric, so it does not support in; use between or comparisons")
+            self.position += 1
+            return In(field, self.names())
+        if self.peek("kw", "has"):
+            raise self.error(f"Only {', '.join(sorted(LIST_FIELDS))} supports has")
+
+        op = self.take("op")
+        if op not in _OPS:
+            raise self.error(f"Expected a comparison, found {op!r}")
+        if numeric:
+            return Compare(field, op, self.number())
+        if op not in ("==", "!="):
+            raise self.error(f"{field} only supports == and !=")
+        return Compare(field, op, self.name())
+
+
+class Rule:
+    """A benefit rule compiled for single citizens and for citizen columns."""
+
+    __slots__ = ("source", "tree", "predicate")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tree = _Parser(source).parse()
+        names: Dict[str, object] = {}
+        self.predicate: Callable[[dict], bool] = _compile(
+            "def predicate(c):\n" + _PRELUDE + f"    return {self.tree.source(names)}\n", names
+        )["predicate"]
+
+    def __call__(self, citizen: dict) -> bool:
+        return self.predicate(citizen)
+
+    def mask(self, citizens) -> np.ndarray:
+        return self.tree.mask(citizens)
+
+    def explain(self, citizen: dict) -> Tuple[bool, List[Tuple[str, bool]]]:
+        """Whether the citizen passes, and each condition with its outcome."""
+        conditions: List[Tuple[str, bool]] = []
+        return self.tree.explain(citizen, conditions), conditions
+
+
+def _compile(code: str, names: Dict[str, object]) -> dict:
+    # Generated code only holds field names, operators and literals from the parser
+    namespace = {"__builtins__": {}, **names}
+    exec(code, namespace)
+    return namespace
+
+
+def compile_checks(benefit_ids: List[str], rules: List[Rule]) -> Callable[[dict], List[str]]:
+    """One function testing a citizen against every rule, reading each field once."""
+    names: Dict[str, object] = {"_ids": tuple(benefit_ids)}
+    lines = ["def eligible(c):\n", _PRELUDE, "    out = []\n"]
+    for i, rule in enumerate(rules):
+        lines.append(f"    if {rule.tree.source(names)}:\n        out.append(_ids[{i}])\n")
+    lines.append("    return out\n")
+    return _compile("".join(lines), names)["eligible"]
+
+
+def benefit_rule(benefit: dict) -> str:
+    """A benefit's rule, or one built from legacy max_income/min_age fields."""
+    if "rule" in benefit:
+        return benefit["rule"]
+    return f"income <= {benefit['max_income']} and age >= {benefit['min_age']}"
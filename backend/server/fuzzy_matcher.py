@@ -0,0 +1,262 @@
+"""Fuzzy and Multilingual Matching of Spoken Service Names
+
+ASR output rarely matches a service name exactly ("passport renewel",
+"swasthya yojana", "पासपोर्ट"). Rather than running fuzz.ratio against every
+name in the catalog, the matcher corrects each spoken word against the
+catalog's vocabulary, which is far smaller than the catalog itself:
+
+1. Devanagari is transliterated to Latin and common Hindi words are mapped to
+   their English catalog terms.
+2. Candidate vocabulary words are found through a trigram index and a
+   phonetic key (vowels dropped, similar consonants merged), and only those
+   few are scored with fuzz.ratio.
+3. Services are ranked by how well their names cover the corrected words.
+
+Run `python fuzzy_matcher.py` to benchmark matching on a 10k-service catalog.
+"""
+import heapq
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from fuzzywuzzy import fuzz
+
+from service_catalog import get_catalog, tokenize
+
+MIN_WORD_SCORE = 70  # fuzz.ratio a spoken word needs against a catalog word
+MAX_CORRECTIONS = 3  # catalog words kept per spoken word
+MAX_CANDIDATE_WORDS = 12  # vocabulary words scored with fuzz.ratio per spoken word
+
+_VOWELS = {
+    "अ": "a", "आ": "a", "इ": "i", "ई": "i", "उ": "u", "ऊ": "u", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o",
+}
+_VOWEL_SIGNS = {
+    "ा": "a", "ि": "i", "ी": "i", "ु": "u", "ू": "u", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॅ": "e", "ॉ": "o",
+}
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "व": "v", "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+}
+# Consonants written with a nukta (़) after them
+_NUKTA = {"k": "q", "kh": "kh", "g": "g", "j": "z", "ph": "f", "d": "r", "dh": "rh"}
+_MARKS = {"ं": "n", "ँ": "n", "ः": "h"}
+_VIRAMA = "्"
+_NUKTA_SIGN = "़"
+_DIGITS = {chr(0x0966 + digit): str(digit) for digit in range(10)}
+
+# Hindi (and Hinglish) words callers use for catalog terms, as transliterated
+HINDI_TERMS = {
+    "swasthya": "healthcare", "svasthya": "healthcare", "sehat": "healthcare", "ilaj": "healthcare",
+    "shiksha": "education", "padhai": "education", "chhatravritti": "education",
+    "pasaport": "passport",
+    "awas": "housing", "aavas": "housing", "makan": "housing", "ghar": "housing",
+    "rozgar": "employment", "rojgar": "employment", "naukri": "employment",
+    "berozgari": "unemployment", "berojgari": "unemployment", "berozgar": "unemployment",
+    "bhatta": "benefits", "labh": "benefits",
+    "vriddh": "senior", "buzurg": "senior", "varishth": "senior", "nagrik": "citizen",
+    "vyapar": "business", "vyavsay": "business", "dhandha": "business", "lasans": "license",
+    "bachche": "child", "bal": "child", "shishu": "child", "dekhbhal": "care",
+    "viklang": "disability", "divyang": "disability", "viklangta": "disability",
+    "paryavaran": "environmental",
+    "kaushal": "skill", "prashikshan": "training",
+    "kar": "tax",
+    "anudan": "grant", "sahayata": "assistance", "sahayta": "assistance", "madad": "assistance",
+    "sahayog": "support", "subsidi": "subsidy",
+    "yojana": "program", "yojna": "program", "karyakram": "program",
+    "naveenikaran": "renewal", "navinikaran": "renewal", "aavedan": "application", "avedan": "application",
+}
+
+
+def transliterate(text: str) -> str:
+    """Romanize Devanagari, dropping the inherent vowel at the end of a word."""
+    out = []
+    pending = False  # a consonant is waiting for its inherent "a"
+    for char in text:
+        if char in _CONSONANTS:
+            if pending:
+                out.append("a")
+            out.append(_CONSONANTS[char])
+            pending = True
+        elif char in _VOWEL_SIGNS:
+            out.append(_VOWEL_SIGNS[char])
+            pending = False
+        elif char == _VIRAMA:
+            pending = False
+        elif char == _NUKTA_SIGN:
+            if out and out[-1] in _NUKTA:
+                out[-1] = _NUKTA[out[-1]]
+        elif char in _MARKS:
+            if pending:
+                out.append("a")
+                pending = False
+            out.append(_MARKS[char])
+        else:
+            if pending and char in _VOWELS:
+                out.append("a")
+            pending = False
+            out.append(_VOWELS.get(char) or _DIGITS.get(char) or char)
+    return "".join(out)
+
+
+_PHONETIC_RULES = [
+    (re.compile(r"ph"), "f"), (re.compile(r"(sh|ch)h?"), "s"), (re.compile(r"[kg]h"), "k"),
+    (re.compile(r"[tdb]h"), lambda match: match.group()[0]),
+    (re.compile(r"[cq]"), "k"), (re.compile(r"x"), "ks"), (re.compile(r"w"), "v"), (re.compile(r"z"), "j"),
+]
+_NON_CONSONANTS = re.compile(r"(?<!^)[aeiouyh]")
+_REPEATS = re.compile(r"(.)\1+")
+
+
+def phonetic_key(word: str) -> str:
+    """Consonant skeleton of a word, so spellings that sound alike share a key."""
+    for pattern, replacement in _PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    return _REPEATS.sub(r"\1", _NON_CONSONANTS.sub("", word))
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+_PHONETIC_HINDI = {phonetic_key(word): english for word, english in HINDI_TERMS.items()}
+
+
+class FuzzyMatcher:
+    """Fuzzy index over service names for one catalog."""
+
+    def __init__(self, services: Dict[str, dict]):
+        self.services = services
+        self._words: Dict[str, Set[str]] = {}  # catalog word -> service IDs
+        self._word_counts: Dict[str, int] = {}  # service ID -> words in its name
+        self._grams: Dict[str, List[str]] = {}  # trigram -> catalog words
+        self._phonetic: Dict[str, List[str]] = {}  # phonetic key -> catalog words
+
+        for service_id, service in services.items():
+            words = set(tokenize(service["name"])) | set(tokenize(service.get("category", "")))
+            self._word_counts[service_id] = len(words)
+            for word in words:
+                self._words.setdefault(word, set()).add(service_id)
+
+        for word in self._words:
+            for gram in trigrams(word):
+                self._grams.setdefault(gram, []).append(word)
+            self._phonetic.setdefault(phonetic_key(word), []).append(word)
+
+    def spoken_words(self, text: str) -> List[str]:
+        """Romanized words of an utterance, with known Hindi words translated."""
+        words = []
+        for word in tokenize(transliterate(text)):
+            if word not in self._words:
+                word = HINDI_TERMS.get(word) or _PHONETIC_HINDI.get(phonetic_key(word)) or word
+            words.append(word)
+        return words
+
+    def correct(self, word: str) -> List[Tuple[str, int]]:
+        """Catalog words that `word` is probably a misspelling or mishearing of, best first."""
+        if word in self._words:
+            return [(word, 100)]
+
+        overlap = Counter()
+        for gram in trigrams(word):
+            overlap.update(self._grams.get(gram, ()))
+        sounds_alike = self._phonetic.get(phonetic_key(word), ())
+        candidates = {candidate for candidate, _ in overlap.most_common(MAX_CANDIDATE_WORDS)}
+        candidates.update(sounds_alike)
+
+        scored = []
+        for candidate in candidates:
+            score = fuzz.ratio(word, candidate)
+            if candidate in sounds_alike:
+                score = max(score, MIN_WORD_SCORE)
+            if score >= MIN_WORD_SCORE:
+                scored.append((candidate, score))
+        return heapq.nlargest(MAX_CORRECTIONS, scored, key=lambda pair: pair[1])
+
+    def match(self, text: str, k: int = 5) -> List[Tuple[str, int]]:
+        """Service IDs whose names best match a spoken phrase, with a 0-100 score."""
+        words = self.spoken_words(text)
+        if not words:
+            return []
+
+        corrections = [self.correct(word) for word in words]
+        if not all(corrections):
+            # Some words matched nothing; rank by the words that did
+            corrections = [pairs for pairs in corrections if pairs]
+            if not corrections:
+                return []
+
+        # Services whose names account for every word, found with set intersections
+        candidate_sets = []
+        for pairs in corrections:
+            if len(pairs) == 1:
+                candidate_sets.append(self._words[pairs[0][0]])
+            else:
+                candidate_sets.append(set().union(*(self._words[candidate] for candidate, _ in pairs)))
+        candidate_sets.sort(key=len)
+        matches = candidate_sets[0].intersection(*candidate_sets[1:])
+
+        if matches:
+            scores = {}
+            for service_id in matches:
+                total = 0
+                for pairs in corrections:
+                    # pairs are best first, so the first one naming the service counts
+                    total += next(score for candidate, score in pairs if service_id in self._words[candidate])
+                scores[service_id] = total
+        else:
+            # No name covers every word: score each service by the words it does cover
+            scores = {}
+            for pairs in corrections:
+                best: Dict[str, int] = {}
+                for candidate, score in pairs:
+                    for service_id in self._words[candidate]:
+                        if score > best.get(service_id, 0):
+                            best[service_id] = score
+                for service_id, score in best.items():
+                    scores[service_id] = scores.get(service_id, 0) + score
+
+        word_counts = self._word_counts
+        # Best coverage first, then names without unmatched extra words
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -word_counts[item[0]]))
+        return [(service_id, round(score / len(words))) for service_id, score in top]
+
+
+_matcher: Optional[FuzzyMatcher] = None
+
+
+def get_matcher() -> FuzzyMatcher:
+    """Matcher for the service catalog, built on first use."""
+    global _matcher
+    if _matcher is None:
+        _matcher = FuzzyMatcher(get_catalog().services)
+    return _matcher
+
+
+if __name__ == "__main__":
+    import time
+
+    from service_catalog import synthetic_catalog
+
+    services = synthetic_catalog(10_000)
+
+    start = time.perf_counter()
+    matcher = FuzzyMatcher(services)
+    print(f"10,000 services: matcher built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for phrase in ["passport renewel", "pasport renwal kerala", "helthcare subsidy", "स्वास्थ्य सहायता",
+                   "पासपोर्ट नवीनीकरण", "berozgari bhatta", "seenior citizen suport", "bijness lisense punjab"]:
+        samples = []
+        for _ in range(200):
+            begin = time.perf_counter_ns()
+            matches = matcher.match(phrase)
+            samples.append(time.perf_counter_ns() - begin)
+        samples.sort()
+        names = ", ".join(f"{services[service_id]['name']} ({score})" for service_id, score in matches[:2])
+        print(f"  {phrase!r:>28}: p50 {samples[100] / 1e6:.3f} ms, p99 {samples[198] / 1e6:.3f} ms -> {names}")
@@ -0,0 +1,210 @@
+"""Heavy-Hitter Sketches for Popular Services
+
+SpaceSaving keeps counts for at most `capacity` keys: a key arriving when the
+sketch is full takes over the smallest counter (and inherits its count as
+error), so memory is fixed however many distinct service IDs are viewed and
+any key viewed more than total/capacity times is guaranteed to be kept.
+
+WindowedTopK answers "most viewed in the last hour/day" with a ring of
+per-interval sketches. The closed intervals are merged once per interval, so
+a top-k query only folds the current interval into that merge and picks the k
+largest of at most `capacity` counters.
+
+Run `python heavy_hitters.py` to benchmark against exact counting.
+"""
+import heapq
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+HEAVY_HITTERS_CAPACITY = int(os.getenv("HEAVY_HITTERS_CAPACITY", "256"))
+# name -> (window seconds, intervals the window is split into)
+VIEW_WINDOWS = {"hour": (3600, 12), "day": (86400, 24)}
+
+
+class SpaceSaving:
+    """Top keys of a weighted stream in `capacity` counters."""
+
+    __slots__ = ("capacity", "counts", "errors", "_heap")
+
+    def __init__(self, capacity: int = HEAVY_HITTERS_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}  # how much of each count may belong to evicted keys
+        self._heap: List[Tuple[int, str]] = []  # one (count when pushed, key) per key; stale entries are refreshed lazily
+
+    def add(self, key: str, count: int = 1):
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+            return
+        if len(counts) < self.capacity:
+            counts[key] = count
+            self.errors[key] = 0
+            heapq.heappush(self._heap, (count, key))
+            return
+        # Full: evict the key with the smallest current count
+        heap = self._heap
+        while True:
+            pushed, victim = heap[0]
+            current = counts[victim]
+            if pushed == current:
+                break
+            heapq.heapreplace(heap, (current, victim))
+        del counts[victim]
+        del self.errors[victim]
+        counts[key] = current + count
+        self.errors[key] = current
+        heapq.heapreplace(heap, (current + count, key))
+
+    def update(self, counts: Iterable[Tuple[str, int]]):
+        for key, count in counts:
+            self.add(key, count)
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        """The k largest counters, largest first, without sorting the rest."""
+        return heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class WindowedTopK:
+    """Space-Saving over a sliding window of `intervals` equal intervals."""
+
+    __slots__ = ("interval", "intervals", "capacity", "sketches", "_closed", "_closed_epoch")
+
+    def __init__(self, window: float, intervals: int, capacity: int = HEAVY_HITTERS_CAPACITY):
+        self.interval = window / intervals
+        self.intervals = intervals
+        self.capacity = capacity
+        self.sketches: Dict[int, SpaceSaving] = {}  # interval number -> its sketch
+        self._closed: Optional[SpaceSaving] = None  # merge of the window's closed intervals
+        self._closed_epoch = -1  # current interval number when _closed was merged
+
+    def _epoch(self, now: Optional[float]) -> int:
+        return int((time.time() if now is None else now) // self.interval)
+
+    def _expire(self, epoch: int):
+        oldest = epoch - self.intervals + 1
+        for stale in [e for e in self.sketches if e < oldest]:
+            del self.sketches[stale]
+
+    def add(self, key: str, count: int = 1, now: Optional[float] = None):
+        epoch = self._epoch(now)
+        sketch = self.sketches.get(epoch)
+        if sketch is None:
+            sketch = self.sketches[epoch] = SpaceSaving(self.capacity)
+            self._expire(epoch)
+        sketch.add(key, count)
+
+    def top(self, k: int, now: Optional[float] = None) -> List[Tuple[str, int]]:
+        epoch = self._epoch(now)
+        if self._closed_epoch != epoch:
+            self._expire(epoch)
+            closed = SpaceSaving(self.capacity)
+            for e, sketch in self.sketches.items():
+                if e != epoch:
+                    closed.update(sketch.counts.items())
+            self._closed, self._closed_epoch = closed, epoch
+        current = self.sketches.get(epoch)
+        if current is None:
+            return self._closed.top(k)
+        window = dict(self._closed.counts)
+        for key, count in current.counts.items():
+            window[key] = window.get(key, 0) + count
+        return heapq.nlargest(k, window.items(), key=lambda item: item[1])
+
+    def to_list(self) -> List[list]:
+        """[interval number, {key: count}] for each interval in the window.
+
+        Safe to call from another thread while this one adds: the dicts are
+        copied in single C-level steps before they are walked.
+        """
+        return [[epoch, dict(sketch.counts)] for epoch, sketch in list(self.sketches.items())]
+
+    def merge(self, intervals: List[list]):
+        """Fold in another window's to_list(), interval by interval."""
+        for epoch, counts in intervals:
+            sketch = self.sketches.get(epoch)
+            if sketch is None:
+                sketch = self.sketches[epoch] = SpaceSaving(self.capacity)
+            sketch.update(counts.items())
+        if self.sketches:
+            self._expire(max(self.sketches))
+        self._closed_epoch = -1
+
+
+class ServiceViews:
+    """Most viewed services over all time and over each of VIEW_WINDOWS."""
+
+    __slots__ = ("all_time", "windows")
+
+    def __init__(self, capacity: int = HEAVY_HITTERS_CAPACITY):
+        self.all_time = SpaceSaving(capacity)
+        self.windows = {name: WindowedTopK(window, intervals, capacity)
+                        for name, (window, intervals) in VIEW_WINDOWS.items()}
+
+    def add(self, service_id: str, now: Optional[float] = None):
+        if now is None:
+            now = time.time()
+        self.all_time.add(service_id)
+        for window in self.windows.values():
+            window.add(service_id, now=now)
+
+    def top(self, k: int = 5, now: Optional[float] = None) -> Dict[str, List[Tuple[str, int]]]:
+        top = {name: window.top(k, now) for name, window in self.windows.items()}
+        top["all_time"] = self.all_time.top(k)
+        return top
+
+    def to_dict(self) -> dict:
+        data = {name: window.to_list() for name, window in self.windows.items()}
+        data["all_time"] = dict(self.all_time.counts)
+        return data
+
+    def merge(self, data: dict):
+        self.all_time.update(data["all_time"].items())
+        for name, window in self.windows.items():
+            window.merge(data.get(name, ()))
+
+
+if __name__ == "__main__":
+    import random
+    from collections import Counter
+
+    VIEWS = 1_000_000
+    SERVICES = [f"SVC{i:06d}" for i in range(100_000)]
+    rng = random.Random(20)
+    # Zipf-like popularity, spread over one simulated day
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(SERVICES))]
+    stream = rng.choices(SERVICES, weights, k=VIEWS)
+    start_ts = 1_700_000_000 - 1_700_000_000 % 86400
+    timestamps = [start_ts + i * 86400 / VIEWS for i in range(VIEWS)]
+
+    views = ServiceViews()
+    start = time.perf_counter()
+    for service_id, ts in zip(stream, timestamps):
+        views.add(service_id, now=ts)
+    elapsed = time.perf_counter() - start
+    print(f"{VIEWS:,} views of {len(set(stream)):,} distinct services: {elapsed / VIEWS * 1e6:.2f} µs per view, "
+          f"{len(views.all_time)} counters per sketch")
+
+    now = timestamps[-1]
+    exact_day = Counter(stream)
+    exact_hour = Counter(s for s, ts in zip(stream, timestamps) if ts > now - 3600)
+    top = views.top(10, now)
+    for name, exact in (("all_time", exact_day), ("hour", exact_hour)):
+        expected = [service_id for service_id, _ in exact.most_common(10)]
+        found = [service_id for service_id, _ in top[name]]
+        print(f"  {name}: top-10 overlap with exact counts {len(set(expected) & set(found))}/10")
+
+    start = time.perf_counter()
+    for _ in range(1_000):
+        views.top(5, now)
+    print(f"top-5 for every window: {(time.perf_counter() - start) / 1_000 * 1e6:.0f} µs per query")
+
+    exact = Counter(SERVICES * 3)
+    start = time.perf_counter()
+    for _ in range(20):
+        sorted(exact.items(), key=lambda x: x[1], reverse=True)[:5]
+    print(f"  vs sorting {len(exact):,} exact counters: {(time.perf_counter() - start) / 20 * 1e6:.0f} µs")
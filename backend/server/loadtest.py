@@ -0,0 +1,157 @@
+"""Load Test for Concurrent Twilio Media Streams
+
+Drives many fake Twilio media streams against the /media-stream handler in
+server.py, with a local stand-in for the OpenAI Realtime WebSocket that echoes
+each call's audio straight back. Every call checks that the audio it receives
+carries its own stream SID and its own payloads, so crossed streams show up as
+misrouted frames.
+
+    python loadtest.py --calls 300 --seconds 10
+    python loadtest.py --calls 50 --jitter-ms 60
+"""
+import argparse
+import asyncio
+import base64
+import functools
+import json
+import os
+import random
+import time
+
+import websockets
+
+FRAME_INTERVAL = 0.02  # Twilio sends one 20 ms μ-law frame at a time
+FRAME_BYTES = 160  # 20 ms of 8 kHz μ-law
+
+
+async def fake_realtime_handler(ws, path=None, jitter: float = 0.0):
+    """Minimal OpenAI Realtime stand-in: acknowledge the session, echo audio.
+
+    With `jitter` set, each echo is delayed by up to that many seconds, which
+    backs up the bridge the way a congested network would.
+    """
+    async for message in ws:
+        event = json.loads(message)
+        if event["type"] == "session.update":
+            await ws.send(json.dumps({"type": "session.updated", "session": event["session"]}))
+        elif event["type"] == "input_audio_buffer.append":
+            if jitter:
+                await asyncio.sleep(random.uniform(0, jitter))
+            await ws.send(json.dumps({"type": "response.audio.delta", "item_id": "item_echo", "delta": event["audio"]}))
+
+
+async def fake_twilio_call(url: str, index: int, seconds: float, latencies: list):
+    """Stream audio like Twilio does and verify every echoed frame comes back to this call."""
+    stream_sid = f"MZ{index:032d}"
+    frames = int(seconds / FRAME_INTERVAL)
+    sent_at = {}
+    received = 0
+    misrouted = 0
+
+    async with websockets.connect(url) as ws:
+        await ws.send(json.dumps({"event": "start", "start": {"streamSid": stream_sid}}))
+
+        async def receive():
+            nonlocal received, misrouted
+            async for message in ws:
+                event = json.loads(message)
+                if event.get("event") != "media":
+                    continue
+                # The bridge may coalesce several frames into one message
+                audio = base64.b64decode(event["media"]["payload"])
+                for offset in range(0, len(audio), FRAME_BYTES):
+                    started = sent_at.pop(audio[offset:offset + FRAME_BYTES], None)
+                    if event["streamSid"] != stream_sid or started is None:
+                        misrouted += 1
+                    else:
+                        received += 1
+                        latencies.append(time.perf_counter() - started)
+                if received + misrouted >= frames:
+                    return
+
+        receiver = asyncio.create_task(receive())
+        for seq in range(frames):
+            # Tag each frame with the call and sequence number
+            frame = f"{index:08d}{seq:08d}".encode().ljust(FRAME_BYTES, b"\xff")
+            sent_at[frame] = time.perf_counter()
+            payload = base64.b64encode(frame).decode()
+            await ws.send(json.dumps({"event": "media", "streamSid": stream_sid, "media": {"payload": payload}}))
+            await asyncio.sleep(FRAME_INTERVAL)
+
+        try:
+            await asyncio.wait_for(receiver, timeout=5)
+        except asyncio.TimeoutError:
+            receiver.cancel()
+
+    return frames, received, misrouted
+
+
+async def main(config):
+    fake_openai = await websockets.serve(
+        functools.partial(fake_realtime_handler, jitter=config.jitter_ms / 1000),
+        "127.0.0.1",
+        config.openai_port,
+    )
+
+    # Point the app at the stand-in before importing it, and keep bots out of the test
+    os.environ["OPENAI_REALTIME_URL"] = f"ws://127.0.0.1:{config.openai_port}"
+    os.environ.setdefault("BOT_POOL_MIN", "0")
+
+    import uvicorn
+    import server
+    from call_context import CallRegistry
+
+    app_server = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=config.port, log_level="warning"))
+    serve_task = asyncio.create_task(app_server.serve())
+    while not app_server.started:
+        await asyncio.sleep(0.05)
+
+    peak_calls = 0
+
+    async def watch_registry():
+        nonlocal peak_calls
+        while True:
+            peak_calls = max(peak_calls, CallRegistry.count())
+            await asyncio.sleep(0.1)
+
+    watcher = asyncio.create_task(watch_registry())
+    latencies = []
+    url = f"ws://127.0.0.1:{config.port}/media-stream"
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(fake_twilio_call(url, i, config.seconds, latencies) for i in range(config.calls)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - started
+    watcher.cancel()
+
+    failed = [r for r in results if isinstance(r, Exception)]
+    completed = [r for r in results if not isinstance(r, Exception)]
+    sent = sum(r[0] for r in completed)
+    received = sum(r[1] for r in completed)
+    misrouted = sum(r[2] for r in completed)
+    latencies.sort()
+
+    print(f"calls: {config.calls} ({len(failed)} failed), peak live calls: {peak_calls}, elapsed: {elapsed:.1f}s")
+    print(f"frames: {sent} sent, {received} echoed back, {misrouted} misrouted, {sent - received - misrouted} dropped")
+    if latencies:
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"round trip through the bridge: p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+    for error in failed[:5]:
+        print(f"call failed: {error!r}")
+
+    app_server.should_exit = True
+    await serve_task
+    fake_openai.close()
+    await fake_openai.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Twilio media stream load test")
+    parser.add_argument("--calls", type=int, default=200, help="Concurrent fake Twilio calls")
+    parser.add_argument("--seconds", type=float, default=10, help="Audio streamed per call")
+    parser.add_argument("--port", type=int, default=7861, help="Port for the app under test")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random delay added by the fake OpenAI server per frame")
+    parser.add_argument("--openai-port", type=int, default=7862, help="Port for the fake OpenAI Realtime server")
+    asyncio.run(main(parser.parse_args()))
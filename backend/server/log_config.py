@@ -0,0 +1,121 @@
+"""Structured, Non-Blocking Logging for the Server and Bots
+
+Records are handed to loguru's background queue, so the event loop never
+waits on a stdout/stderr write, and the sink writes them as JSON lines in
+batches. Levels are set per module from the environment, and per-frame media
+events go through `sample()` so only one in LOG_SAMPLE_EVERY is logged.
+
+    LOG_LEVEL=INFO
+    LOG_LEVELS=server=INFO,media_bridge=WARNING,pipecat=WARNING
+    LOG_FORMAT=json   # or text for local development
+"""
+import os
+import sys
+import threading
+import time
+
+from loguru import logger
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, default=str).decode()
+
+except ImportError:
+    import json
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_FILE = os.getenv("LOG_FILE")  # defaults to stderr
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "500"))
+
+
+class BatchedJSONSink:
+    """loguru sink that buffers JSON lines and writes them in batches.
+
+    Runs on loguru's queue thread, not the event loop. A timer thread flushes
+    partial batches every `flush_interval` seconds so quiet periods still
+    reach the log promptly.
+    """
+
+    def __init__(self, stream, batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL):
+        self._stream = stream
+        self._batch_size = batch_size
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, args=(flush_interval,), daemon=True)
+        self._flusher.start()
+
+    def write(self, message):
+        record = message.record
+        entry = {
+            "ts": record["time"].timestamp(),
+            "level": record["level"].name,
+            "module": record["name"],
+            "msg": record["message"],
+        }
+        if record["extra"]:
+            entry.update(record["extra"])
+        if record["exception"]:
+            entry["exception"] = str(message).rstrip()
+        with self._lock:
+            self._buffer.append(_dumps(entry))
+            if len(self._buffer) >= self._batch_size:
+                self._write_buffer()
+
+    def stop(self):
+        """Called by loguru when the sink is removed."""
+        self._stopped.set()
+        with self._lock:
+            self._write_buffer()
+
+    def _write_buffer(self):
+        if self._buffer:
+            self._stream.write("\n".join(self._buffer) + "\n")
+            self._stream.flush()
+            self._buffer.clear()
+
+    def _flush_periodically(self, interval: float):
+        while not self._stopped.wait(interval):
+            with self._lock:
+                self._write_buffer()
+
+
+def parse_levels(spec: str, default: str) -> dict:
+    """Turn "server=INFO,pipecat=WARNING" into a loguru per-module filter."""
+    levels = {"": default}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        module, _, level = item.partition("=")
+        levels[module.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """Replace loguru's default handler with the configured non-blocking one."""
+    logger.remove()
+    levels = parse_levels(LOG_LEVELS, LOG_LEVEL.upper())
+    if LOG_FORMAT == "text":
+        logger.add(sys.stderr, filter=levels, enqueue=True)
+        return
+
+    stream = open(LOG_FILE, "a", buffering=1 << 16) if LOG_FILE else sys.stderr
+    logger.add(BatchedJSONSink(stream), filter=levels, format="{message}", enqueue=True)
+
+
+_sample_counts = {}
+
+
+def sample(key: str, every: int = LOG_SAMPLE_EVERY) -> bool:
+    """True once every `every` calls for `key`; gates logging of per-frame events."""
+    count = _sample_counts.get(key, 0) + 1
+    _sample_counts[key] = count
+    return count % every == 1 or every <= 1
@@ -0,0 +1,137 @@
+"""Bounded Audio Queues for the Twilio ⇄ Realtime Media Bridge
+
+Each direction of a phone call gets its own bounded queue, so a slow peer on
+one side never stalls reading from the other, and stale audio is dropped by
+policy instead of piling up into seconds of lag:
+
+- drop_oldest: when full, discard the oldest frame.
+- coalesce: the sender drains the backlog in chunks of up to
+  MEDIA_COALESCE_MAX_MS, so a backlog costs one send instead of many; when
+  full, the oldest frame is discarded.
+- flush: when full, discard the whole backlog and resume from live audio.
+
+`flush()` can also be called directly, e.g. when the caller barges in.
+"""
+import asyncio
+import base64
+import os
+from collections import deque
+from typing import Optional
+
+from media_relay import payload_duration_ms
+
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+FLUSH = "flush"
+POLICIES = (DROP_OLDEST, COALESCE, FLUSH)
+
+# Twilio -> model: 50 frames is one second of caller audio
+MEDIA_INBOUND_QUEUE = int(os.getenv("MEDIA_INBOUND_QUEUE", "50"))
+MEDIA_INBOUND_POLICY = os.getenv("MEDIA_INBOUND_POLICY", DROP_OLDEST)
+# Model -> Twilio: responses arrive in bursts faster than real time
+MEDIA_OUTBOUND_QUEUE = int(os.getenv("MEDIA_OUTBOUND_QUEUE", "500"))
+MEDIA_OUTBOUND_POLICY = os.getenv("MEDIA_OUTBOUND_POLICY", COALESCE)
+# Longest coalesced chunk; also bounds how coarsely playback marks track barge-in
+MEDIA_COALESCE_MAX_MS = int(os.getenv("MEDIA_COALESCE_MAX_MS", "500"))
+
+
+class AudioQueue:
+    """Bounded FIFO of base64 μ-law payloads for one direction of a call."""
+
+    __slots__ = ("maxlen", "policy", "coalesce_max_ms", "_frames", "_ready", "_closed",
+                 "enqueued", "sent", "dropped", "flushed", "coalesced", "peak_depth")
+
+    def __init__(self, maxlen: int, policy: str = DROP_OLDEST, coalesce_max_ms: int = MEDIA_COALESCE_MAX_MS):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown audio queue policy: {policy}")
+        self.maxlen = maxlen
+        self.policy = policy
+        self.coalesce_max_ms = coalesce_max_ms
+        self._frames = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0  # discarded on overflow
+        self.flushed = 0  # discarded by flush()
+        self.coalesced = 0  # frames merged into a larger chunk
+        self.peak_depth = 0
+
+    @classmethod
+    def inbound(cls) -> "AudioQueue":
+        """Queue for caller audio going to the model."""
+        return cls(MEDIA_INBOUND_QUEUE, MEDIA_INBOUND_POLICY)
+
+    @classmethod
+    def outbound(cls) -> "AudioQueue":
+        """Queue for model audio going to the caller."""
+        return cls(MEDIA_OUTBOUND_QUEUE, MEDIA_OUTBOUND_POLICY)
+
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    def put(self, payload: str):
+        """Queue a frame without waiting, applying the overflow policy when full."""
+        if self._closed:
+            return
+        if len(self._frames) >= self.maxlen:
+            if self.policy == FLUSH:
+                self.dropped += len(self._frames)
+                self._frames.clear()
+            else:
+                self._frames.popleft()
+                self.dropped += 1
+        self._frames.append(payload)
+        self.enqueued += 1
+        if len(self._frames) > self.peak_depth:
+            self.peak_depth = len(self._frames)
+        self._ready.set()
+
+    async def get(self) -> Optional[str]:
+        """Wait for the next payload to send; None once the queue is closed and empty."""
+        while not self._frames:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+
+        if self.policy == COALESCE and len(self._frames) > 1:
+            parts = [self._frames.popleft()]
+            duration_ms = payload_duration_ms(parts[0])
+            while self._frames and duration_ms + payload_duration_ms(self._frames[0]) <= self.coalesce_max_ms:
+                parts.append(self._frames.popleft())
+                duration_ms += payload_duration_ms(parts[-1])
+            self.sent += len(parts)
+            if len(parts) == 1:
+                return parts[0]
+            self.coalesced += len(parts)
+            return base64.b64encode(b"".join(base64.b64decode(part) for part in parts)).decode()
+
+        self.sent += 1
+        return self._frames.popleft()
+
+    def flush(self) -> int:
+        """Discard everything queued; returns the number of frames dropped."""
+        count = len(self._frames)
+        self._frames.clear()
+        self.flushed += count
+        return count
+
+    def close(self):
+        """Stop accepting frames; get() returns None once the backlog is sent."""
+        self._closed = True
+        self._ready.set()
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "depth": len(self._frames),
+            "peak_depth": self.peak_depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,112 @@
+"""Zero-Copy μ-law Relay for the Twilio ⇄ OpenAI Realtime Media Bridge
+
+Both sides speak g711 μ-law as base64 text, so audio never has to be decoded:
+the payload string from one socket is spliced untouched into a JSON envelope
+for the other. Envelopes are string templates built once per stream, and
+parsing uses orjson when it is installed.
+
+Run `python media_relay.py` to benchmark the relay against the decode/re-encode
+path it replaces.
+"""
+import json
+
+try:
+    import orjson
+
+    def loads(data):
+        """Parse a JSON message (str or bytes)."""
+        return orjson.loads(data)
+
+    def dumps(obj) -> str:
+        """Serialize to compact JSON text."""
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+    loads = json.loads
+
+    def dumps(obj) -> str:
+        """Serialize to compact JSON text."""
+        return json.dumps(obj, separators=(",", ":"))
+
+
+# Base64 payloads only contain [A-Za-z0-9+/=], none of which need escaping
+# inside a JSON string, so they can be spliced in between fixed fragments.
+_INPUT_APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+_INPUT_APPEND_SUFFIX = '"}'
+_MEDIA_SUFFIX = '"}}'
+
+
+def input_audio_append(payload: str) -> str:
+    """OpenAI `input_audio_buffer.append` message for a Twilio media payload."""
+    return _INPUT_APPEND_PREFIX + payload + _INPUT_APPEND_SUFFIX
+
+
+class StreamEnvelope:
+    """Twilio message templates for one media stream."""
+
+    __slots__ = ("stream_sid", "_media_prefix", "_mark_prefix", "_clear")
+
+    def __init__(self, stream_sid: str):
+        self.stream_sid = stream_sid
+        sid = dumps(stream_sid)
+        self._media_prefix = '{"event":"media","streamSid":' + sid + ',"media":{"payload":"'
+        self._mark_prefix = '{"event":"mark","streamSid":' + sid + ',"mark":{"name":'
+        self._clear = '{"event":"clear","streamSid":' + sid + '}'
+
+    def media(self, payload: str) -> str:
+        """Twilio `media` message carrying an OpenAI audio delta."""
+        return self._media_prefix + payload + _MEDIA_SUFFIX
+
+    def mark(self, name: str) -> str:
+        """Twilio `mark` message, echoed back once the audio before it has played."""
+        return self._mark_prefix + dumps(name) + "}}"
+
+    def clear(self) -> str:
+        """Twilio `clear` message, discarding audio buffered for playback."""
+        return self._clear
+
+
+def payload_duration_ms(payload: str) -> int:
+    """Playback length of a base64 8 kHz μ-law payload, without decoding it."""
+    padding = payload.count("=", -2)
+    return (len(payload) * 3 // 4 - padding) // 8
+
+
+if __name__ == "__main__":
+    import base64
+    import os
+    import time
+
+    FRAMES = 50_000
+    # One 20 ms frame of 8 kHz μ-law is 160 bytes
+    payload = base64.b64encode(os.urandom(160)).decode()
+    stream_sid = "MZ" + "0" * 32
+    twilio_inbound = json.dumps({"event": "media", "streamSid": stream_sid, "media": {"payload": payload}})
+    openai_delta = json.dumps({"type": "response.audio.delta", "item_id": "item_1", "delta": payload})
+
+    def legacy_frame():
+        data = json.loads(twilio_inbound)
+        json.dumps({"type": "input_audio_buffer.append", "audio": data["media"]["payload"]})
+        response = json.loads(openai_delta)
+        audio = base64.b64encode(base64.b64decode(response["delta"])).decode("utf-8")
+        json.dumps({"event": "media", "streamSid": stream_sid, "media": {"payload": audio}})
+
+    envelope = StreamEnvelope(stream_sid)
+
+    def relay_frame():
+        data = loads(twilio_inbound)
+        input_audio_append(data["media"]["payload"])
+        response = loads(openai_delta)
+        envelope.media(response["delta"])
+
+    for name, frame in (("legacy", legacy_frame), ("relay", relay_frame)):
+        samples = []
+        for _ in range(FRAMES):
+            start = time.perf_counter_ns()
+            frame()
+            samples.append(time.perf_counter_ns() - start)
+        samples.sort()
+        mean_us = sum(samples) / len(samples) / 1000
+        p99_us = samples[int(len(samples) * 0.99)] / 1000
+        print(f"{name:>6}: {mean_us:6.2f} µs/frame mean, {p99_us:6.2f} µs p99 "
+              f"({mean_us / 20_000 * 100:.3f}% of a 20 ms frame)")
@@ -0,0 +1,293 @@
+"""Prometheus Metrics for Call Latency and Bot Processes
+
+The server renders every metric in the Prometheus text exposition format at
+/metrics. Bot processes have no HTTP endpoint of their own: once a bot calls
+report_to_server(), each observation is sent as one datagram on a local unix
+socket (METRICS_SOCKET) and recorded by the server's MetricsCollector, so one
+scrape covers every bot. Sends never block and are dropped if the server is
+not listening.
+"""
+import asyncio
+import math
+import os
+import socket
+import tempfile
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from media_relay import dumps, loads
+
+METRICS_SOCKET = os.getenv("METRICS_SOCKET", os.path.join(tempfile.gettempdir(), "dialmate-metrics.sock"))
+
+# Seconds; spans sub-100 ms tool calls up to multi-second model turns
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+SEND_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+BYTE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536)
+# Observations per label set that summaries compute their quantiles over
+SUMMARY_WINDOW = int(os.getenv("METRICS_SUMMARY_WINDOW", "1000"))
+
+REGISTRY: Dict[str, "Metric"] = {}
+_reporter: Optional[socket.socket] = None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        REGISTRY[name] = self
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self.samples()
+
+
+class Histogram(Metric):
+    """Bucketed observations per label set; label values are passed positionally."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}  # label values -> [bucket counts, sum]
+
+    def observe(self, value: float, *labels: str):
+        if _reporter is not None:
+            _send(self.name, labels, value)
+        else:
+            self.record(labels, value)
+
+    def record(self, labels: Tuple[str, ...], value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def totals(self, *labels: str) -> Tuple[int, float]:
+        """(count, sum) of a label set's observations."""
+        series = self._series.get(labels)
+        return (sum(series[0]), series[1]) if series else (0, 0.0)
+
+    def samples(self) -> Iterator[str]:
+        bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for labels, (counts, total) in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            suffix = _labels(self.labelnames, labels)
+            yield f"{self.name}_sum{suffix} {total}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+class Summary(Metric):
+    """Quantiles over each label set's last `window` observations, plus all-time sum and count."""
+
+    kind = "summary"
+    quantiles = (0.5, 0.95, 0.99)
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), window: int = SUMMARY_WINDOW):
+        super().__init__(name, help, labelnames)
+        self.window = window
+        self._series: Dict[Tuple[str, ...], list] = {}  # label values -> [recent values, sum, count]
+
+    def observe(self, value: float, *labels: str):
+        if _reporter is not None:
+            _send(self.name, labels, value)
+        else:
+            self.record(labels, value)
+
+    def record(self, labels: Tuple[str, ...], value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [deque(maxlen=self.window), 0.0, 0]
+        series[0].append(value)
+        series[1] += value
+        series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], dict]:
+        """Per label set: count, sum and the quantiles of the recent window."""
+        result = {}
+        for labels, (recent, total, count) in list(self._series.items()):
+            ordered = sorted(recent)
+            result[labels] = {
+                "count": count,
+                "sum": total,
+                **{q: ordered[min(int(q * len(ordered)), len(ordered) - 1)] for q in self.quantiles},
+            }
+        return result
+
+    def samples(self) -> Iterator[str]:
+        for labels, stats in self.snapshot().items():
+            for q in self.quantiles:
+                quantile = f'quantile="{q}"'
+                yield f"{self.name}{_labels(self.labelnames, labels, quantile)} {stats[q]}"
+            suffix = _labels(self.labelnames, labels)
+            yield f"{self.name}_sum{suffix} {stats['sum']}"
+            yield f"{self.name}_count{suffix} {stats['count']}"
+
+
+class Counter(Metric):
+    """Monotonic total per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        if _reporter is not None:
+            _send(self.name, labels, amount)
+        else:
+            self.record(labels, amount)
+
+    def record(self, labels: Tuple[str, ...], value: float):
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Gauge(Metric):
+    """A value read from `read` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], float] = lambda: 0):
+        super().__init__(name, help)
+        self.read = read
+
+    def samples(self) -> Iterator[str]:
+        value = self.read()
+        yield f"{self.name} {value if math.isfinite(value) else 0}"
+
+
+TIME_TO_FIRST_AUDIO = Histogram(
+    "dialmate_time_to_first_audio_seconds",
+    "Time from a caller connecting to the first bot audio sent to them.",
+    ("channel",),
+)
+TURN_LATENCY = Histogram(
+    "dialmate_turn_latency_seconds",
+    "Time from the end of user speech to the start of the bot's reply.",
+    ("channel",),
+)
+TOOL_CALL_DURATION = Histogram(
+    "dialmate_tool_call_duration_seconds",
+    "Time from a tool call starting to its result.",
+    ("tool",),
+)
+TOOL_CALL_RECENT = Summary(
+    "dialmate_tool_call_recent_seconds",
+    "Tool-call duration quantiles over each tool's most recent calls.",
+    ("tool",),
+)
+TOOL_CALL_ERRORS = Counter(
+    "dialmate_tool_call_errors_total",
+    "Tool calls whose handler raised.",
+    ("tool",),
+)
+TOOL_ARGUMENT_BYTES = Histogram(
+    "dialmate_tool_call_argument_bytes",
+    "Size of a tool call's JSON arguments.",
+    ("tool",),
+    buckets=BYTE_BUCKETS,
+)
+TOOL_RESULT_BYTES = Histogram(
+    "dialmate_tool_call_result_bytes",
+    "Size of a tool call's result.",
+    ("tool",),
+    buckets=BYTE_BUCKETS,
+)
+WS_SEND_LATENCY = Histogram(
+    "dialmate_ws_send_seconds",
+    "Time spent in one WebSocket send.",
+    ("peer",),
+    buckets=SEND_BUCKETS,
+)
+BOT_PROCESSES = Gauge("dialmate_bot_processes", "Live bot processes, warming, idle and busy.")
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text format."""
+    lines: List[str] = []
+    for metric in list(REGISTRY.values()):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _send(name: str, labels: Tuple[str, ...], value: float):
+    try:
+        _reporter.sendto(dumps([name, labels, value]).encode(), METRICS_SOCKET)
+    except OSError:
+        pass  # server not listening or its socket buffer is full
+
+
+def report_to_server():
+    """Send this process's observations to the server instead of recording them."""
+    global _reporter
+    if _reporter is None:
+        _reporter = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        _reporter.setblocking(False)
+
+
+class _CollectorProtocol(asyncio.DatagramProtocol):
+    def datagram_received(self, data: bytes, addr):
+        try:
+            name, labels, value = loads(data)
+            metric = REGISTRY[name]
+            metric.record(tuple(labels), float(value))
+        except (ValueError, TypeError, KeyError, AttributeError):
+            logger.debug(f"Dropped malformed metrics datagram: {data[:100]!r}")
+
+
+class MetricsCollector:
+    """Records observations that bot processes send over METRICS_SOCKET."""
+
+    def __init__(self, path: str = METRICS_SOCKET):
+        self.path = path
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            _CollectorProtocol, sock=sock
+        )
+
+    def stop(self):
+        if self._transport:
+            self._transport.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
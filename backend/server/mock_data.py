@@ -29,14 +29,14 @@ CITIZENS = {
 }
 
 BENEFITS = {
-    "healthcare_subsidy": {"max_income": 400000, "min_age": 0, "description": "Healthcare cost subsidy"},
-    "education_grant": {"max_income": 500000, "min_age": 18, "description": "Education funding support"},
-    "housing_assistance": {"max_income": 600000, "min_age": 21, "description": "Housing support program"},
-    "unemployment_benefits": {"max_income": 300000, "min_age": 18, "description": "Job loss financial aid"},
-    "senior_support": {"max_income": 1000000, "min_age": 60, "description": "Elderly care services"},
-    "disability_support": {"max_income": 800000, "min_age": 0, "description": "Disability assistance"},
+    "healthcare_subsidy": {"rule": "income <= 400000", "description": "Healthcare cost subsidy"},
+    "education_grant": {"rule": "income <= 500000 and age >= 18", "description": "Education funding support"},
+    "housing_assistance": {"rule": "income <= 600000 and age >= 21", "description": "Housing support program"},
+    "unemployment_benefits": {"rule": "income <= 300000 and age >= 18", "description": "Job loss financial aid"},
+    "senior_support": {"rule": "income <= 1000000 and age >= 60", "description": "Elderly care services"},
+    "disability_support": {"rule": "income <= 800000", "description": "Disability assistance"},
 }
 
-APPLICATIONS = {}  # {session_id: [{"service_id": "SVC001", "status": "draft"}]}
+APPLICATIONS = {}  # {session_id: [records.Application]}
 
-REQUESTS = {}  # {request_id: {"citizen_id": "CIT001", "applications": [], "status": "submitted"}}
+REQUESTS = {}  # {request_id: records.ServiceRequest}
@@ -0,0 +1,128 @@
+"""Pre-Opened OpenAI Realtime Connections
+
+Opening the realtime socket only after Twilio connects makes the caller wait
+for the TLS handshake plus the session.update round-trip. The pool keeps a few
+authenticated sessions already configured for the phone bridge, hands one out
+as soon as a call arrives and opens its replacement in the background. Idle
+sessions older than their TTL are closed so callers never get a stale one.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Optional
+
+import websockets
+from loguru import logger
+
+REALTIME_POOL_SIZE = int(os.getenv("REALTIME_POOL_SIZE", "2"))
+REALTIME_POOL_TTL = float(os.getenv("REALTIME_POOL_TTL", "300"))  # seconds an idle session is kept
+REALTIME_SETUP_TIMEOUT = float(os.getenv("REALTIME_SETUP_TIMEOUT", "10"))
+
+
+class WarmConnection:
+    """A configured realtime session waiting for a call."""
+
+    __slots__ = ("ws", "opened_at")
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.opened_at = time.monotonic()
+
+
+class RealtimeConnectionPool:
+    """Keeps `size` realtime sessions open, configured with `session_update`."""
+
+    def __init__(self, url: str, headers: dict, session_update: dict, size: int = REALTIME_POOL_SIZE, ttl: float = REALTIME_POOL_TTL):
+        self.url = url
+        self.headers = headers
+        self.session_update = json.dumps(session_update)
+        self.size = size
+        self.ttl = ttl
+
+        self._idle: deque = deque()
+        self._warming = set()
+        self._wake = asyncio.Event()
+        self._fill_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start warming connections in the background."""
+        self._fill_task = asyncio.create_task(self._fill_loop())
+
+    async def stop(self):
+        """Stop refilling and close the idle connections."""
+        if self._fill_task:
+            self._fill_task.cancel()
+        for task in self._warming:
+            task.cancel()
+        while self._idle:
+            await self._idle.popleft().ws.close()
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    async def acquire(self):
+        """Return a configured realtime socket, opening one inline if none is warm."""
+        self._wake.set()
+        while self._idle:
+            conn = self._idle.popleft()
+            if conn.ws.open and not self._expired(conn):
+                return conn.ws
+            await conn.ws.close()
+        return await self.open()
+
+    async def open(self):
+        """Open a realtime socket and wait until the session update is applied."""
+        ws = await websockets.connect(self.url, extra_headers=self.headers)
+        try:
+            await ws.send(self.session_update)
+            await asyncio.wait_for(self._wait_session_updated(ws), timeout=REALTIME_SETUP_TIMEOUT)
+        except BaseException:
+            await ws.close()
+            raise
+        return ws
+
+    @staticmethod
+    async def _wait_session_updated(ws):
+        async for message in ws:
+            event = json.loads(message)
+            if event["type"] == "session.updated":
+                return
+            if event["type"] == "error":
+                raise RuntimeError(f"Realtime session setup failed: {event.get('error')}")
+        raise ConnectionError("Realtime socket closed during session setup")
+
+    def _expired(self, conn: WarmConnection) -> bool:
+        return time.monotonic() - conn.opened_at > self.ttl
+
+    async def _evict(self):
+        """Close idle sessions that are past their TTL or were closed remotely."""
+        stale = [conn for conn in self._idle if not conn.ws.open or self._expired(conn)]
+        for conn in stale:
+            self._idle.remove(conn)
+        for conn in stale:
+            await conn.ws.close()
+
+    async def _warm_one(self):
+        try:
+            self._idle.append(WarmConnection(await self.open()))
+        except Exception as e:
+            logger.warning(f"Failed to pre-open realtime session: {e}")
+            await asyncio.sleep(1.0)  # back off before the next attempt
+
+    async def _fill_loop(self):
+        while True:
+            await self._evict()
+            missing = self.size - len(self._idle) - len(self._warming)
+            for _ in range(missing):
+                task = asyncio.create_task(self._warm_one())
+                self._warming.add(task)
+                task.add_done_callback(self._warming.discard)
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=min(self.ttl / 4, 5.0))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,172 @@
+"""Co-occurrence Service Recommendations
+
+Services used by the same citizen are counted as pairs, across every
+citizen's service_history and every submitted request, and each service keeps
+its top-k most frequent companions. A recommendation merges the precomputed
+lists for the services a citizen already used, so it costs O(history × k)
+instead of scanning rules or histories. New requests update the counts and the
+affected top-k lists in place.
+
+Run `python recommender.py` to benchmark on a synthetic 1M-citizen history.
+"""
+import os
+from collections import Counter, defaultdict
+from itertools import permutations
+from typing import Dict, Iterable, List, Optional
+
+from records import ServiceRequest
+
+RECOMMENDER_TOP_K = int(os.getenv("RECOMMENDER_TOP_K", "10"))
+
+
+class CoOccurrenceRecommender:
+    def __init__(self, k: int = RECOMMENDER_TOP_K):
+        self.k = k
+        self.pairs: Dict[str, Counter] = defaultdict(Counter)  # service -> {companion: times used together}
+        self.popularity = Counter()
+        self.top: Dict[str, List[str]] = {}  # service -> top-k companions, most frequent first
+
+    @classmethod
+    def build(cls, citizens: Dict[str, dict], requests: Dict[str, ServiceRequest],
+              k: int = RECOMMENDER_TOP_K) -> "CoOccurrenceRecommender":
+        """Count every citizen's history and submitted request, then rank companions once."""
+        recommender = cls(k)
+        for citizen in citizens.values():
+            recommender._count(set(citizen["service_history"]), None)
+        for request in requests.values():
+            history = citizens.get(request.citizen_id, {}).get("service_history", ())
+            applied = {item.service_id for item in request.applications}
+            recommender._count(set(history) | applied, applied - set(history))
+        for service_id, companions in recommender.pairs.items():
+            recommender.top[service_id] = [companion for companion, _ in companions.most_common(k)]
+        return recommender
+
+    def _count(self, basket: set, new: Optional[set], promote: bool = False):
+        """Count pairs in a basket; with `new`, only pairs involving a new service.
+
+        With `promote`, each count is re-ranked in the top-k lists as soon as it
+        goes up, while it is the only one out of place.
+        """
+        if new is None:
+            self.popularity.update(basket)
+            for service_id, companion in permutations(basket, 2):
+                self.pairs[service_id][companion] += 1
+            return
+        self.popularity.update(new)
+        for service_id, companion in self._new_pairs(basket, new):
+            self.pairs[service_id][companion] += 1
+            self.pairs[companion][service_id] += 1
+            if promote:
+                self._promote(service_id, companion)
+                self._promote(companion, service_id)
+
+    @staticmethod
+    def _new_pairs(basket: set, new: set):
+        """Each unordered pair in the basket with at least one new service, once."""
+        for service_id in new:
+            for companion in basket:
+                # A pair of two new services is seen from both sides; take it from one
+                if companion != service_id and not (companion in new and companion < service_id):
+                    yield service_id, companion
+
+    def record_request(self, history: Iterable[str], applied: Iterable[str]):
+        """Fold a newly submitted request into the counts and top-k lists."""
+        history = set(history)
+        new = set(applied) - history
+        if not new:
+            return
+        self._count(history | new, new, promote=True)
+
+    def _promote(self, service_id: str, companion: str):
+        """Keep `companion` in the service's top-k after its count went up, in O(k)."""
+        counts = self.pairs[service_id]
+        top = self.top.setdefault(service_id, [])
+        if companion not in top:
+            if len(top) >= self.k and counts[companion] <= counts[top[-1]]:
+                return
+            top.append(companion)
+        # Only `companion` moved, so bubble it up past smaller counts
+        position = top.index(companion)
+        while position and counts[top[position - 1]] < counts[companion]:
+            top[position - 1], top[position] = top[position], top[position - 1]
+            position -= 1
+        del top[self.k:]
+
+    def recommend(self, history: Iterable[str], k: int = 3) -> List[str]:
+        """Services most often used alongside `history`, excluding ones already used."""
+        history = set(history)
+        scores = Counter()
+        for service_id in history:
+            counts = self.pairs.get(service_id)
+            for companion in self.top.get(service_id, ()):
+                if companion not in history:
+                    scores[companion] += counts[companion]
+        recommended = [service_id for service_id, _ in scores.most_common(k)]
+        if len(recommended) < k:
+            # New citizens or services nobody combines yet: fall back to the most used
+            for service_id, _ in self.popularity.most_common(k + len(history) + len(recommended)):
+                if service_id not in history and service_id not in recommended:
+                    recommended.append(service_id)
+                    if len(recommended) == k:
+                        break
+        return recommended
+
+
+_recommender: Optional[CoOccurrenceRecommender] = None
+
+
+def get_recommender() -> CoOccurrenceRecommender:
+    """Recommender over mock_data citizens and requests, built on first use."""
+    global _recommender
+    if _recommender is None:
+        from mock_data import CITIZENS, REQUESTS
+        _recommender = CoOccurrenceRecommender.build(CITIZENS, REQUESTS)
+    return _recommender
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from records import Application
+
+    CITIZENS = 1_000_000
+    SERVICES = [f"SVC{i:04d}" for i in range(1, 501)]
+    rng = random.Random(15)
+    # Services cluster into related groups so there is structure to find
+    groups = [SERVICES[i:i + 10] for i in range(0, len(SERVICES), 10)]
+
+    def history():
+        group = rng.choice(groups)
+        size = rng.choices([0, 1, 2, 3, 4, 5], weights=[5, 20, 30, 25, 15, 5])[0]
+        return [rng.choice(group) if rng.random() < 0.8 else rng.choice(SERVICES) for _ in range(size)]
+
+    citizens = {f"CIT{i:07d}": {"service_history": history()} for i in range(CITIZENS)}
+    requests = {
+        f"REQ{i:06d}": ServiceRequest(f"CIT{rng.randrange(CITIZENS):07d}", [Application(rng.choice(SERVICES))])
+        for i in range(100_000)
+    }
+
+    start = time.perf_counter()
+    recommender = CoOccurrenceRecommender.build(citizens, requests)
+    print(f"built from {CITIZENS:,} citizens and {len(requests):,} requests in {time.perf_counter() - start:.1f} s")
+
+    histories = [citizen["service_history"] for citizen in list(citizens.values())[:10_000]]
+    start = time.perf_counter()
+    for services in histories:
+        recommender.recommend(services)
+    print(f"recommend: {(time.perf_counter() - start) / len(histories) * 1e6:.1f} µs per citizen")
+
+    updates = [(histories[i], [rng.choice(SERVICES)]) for i in range(10_000)]
+    start = time.perf_counter()
+    for services, applied in updates:
+        recommender.record_request(services, applied)
+    print(f"record_request: {(time.perf_counter() - start) / len(updates) * 1e6:.1f} µs per request")
+
+    # Incremental top-k lists should match a rebuild from the same counts
+    stale = sum(
+        1 for service_id, companions in recommender.pairs.items()
+        if [count for _, count in companions.most_common(recommender.k)]
+        != [companions[companion] for companion in recommender.top[service_id]]
+    )
+    print(f"top-k lists differing from a full re-rank: {stale}")
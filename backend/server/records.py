@@ -0,0 +1,167 @@
+"""Slotted Records for Sessions, Applications and Service Requests
+
+Typed replacements for the nested dicts these used to be. Timestamps are
+integer epoch milliseconds, and records serialize to compact positional
+msgpack arrays (JSON arrays if msgpack is not installed) for the session
+store and snapshots. Stored sessions start with a SESSION_FORMAT byte, and
+Session.from_bytes raises ValueError for any other format.
+
+Run `python records.py` to compare memory and snapshot/restore time for 100k
+sessions against the dict representation.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from conversation_history import ConversationHistory
+
+try:
+    import msgpack
+
+    def pack(obj) -> bytes:
+        return msgpack.packb(obj)
+
+    def unpack(data: bytes):
+        return msgpack.unpackb(data)
+
+except ImportError:
+    import json
+
+    def pack(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def unpack(data: bytes):
+        return json.loads(data)
+
+# First byte of a stored session; bump it when Session.to_list changes
+SESSION_FORMAT = 1
+
+
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+@dataclass(slots=True)
+class Application:
+    service_id: str
+    status: str = "draft"
+
+    def to_list(self) -> list:
+        return [self.service_id, self.status]
+
+
+@dataclass(slots=True)
+class ServiceRequest:
+    citizen_id: str
+    applications: List[Application] = field(default_factory=list)
+    status: str = "submitted"
+    created_at: int = field(default_factory=now_ms)
+
+    def to_list(self) -> list:
+        return [self.citizen_id, [item.to_list() for item in self.applications], self.status, self.created_at]
+
+    @classmethod
+    def from_list(cls, data: list) -> "ServiceRequest":
+        citizen_id, applications, status, created_at = data
+        return cls(citizen_id, [Application(*item) for item in applications], status, created_at)
+
+    def to_bytes(self) -> bytes:
+        return pack(self.to_list())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ServiceRequest":
+        return cls.from_list(unpack(data))
+
+
+@dataclass(slots=True)
+class Session:
+    session_id: str
+    citizen_id: str = "CIT001"
+    channel: str = "web"  # web, phone, whatsapp, kiosk
+    applications: List[Application] = field(default_factory=list)
+    conversation_history: ConversationHistory = field(default_factory=ConversationHistory)
+    current_intent: Optional[str] = None
+    created_at: int = field(default_factory=now_ms)
+    last_activity: int = field(default_factory=now_ms)
+
+    def to_list(self) -> list:
+        history = self.conversation_history
+        return [
+            self.session_id, self.citizen_id, self.channel,
+            [item.to_list() for item in self.applications],
+            [[[turn.role, turn.message, turn.ts_ms] for turn in history], history.summary, history.rolled_up],
+            self.current_intent, self.created_at, self.last_activity,
+        ]
+
+    @classmethod
+    def from_list(cls, data: list) -> "Session":
+        session_id, citizen_id, channel, applications, history, current_intent, created_at, last_activity = data
+        turns, summary, rolled_up = history
+        return cls(
+            session_id, citizen_id, channel,
+            [Application(*item) for item in applications],
+            ConversationHistory.from_dict({"turns": turns, "summary": summary, "rolled_up": rolled_up}),
+            current_intent, created_at, last_activity,
+        )
+
+    def to_bytes(self) -> bytes:
+        return bytes([SESSION_FORMAT]) + pack(self.to_list())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Session":
+        if not data or data[0] != SESSION_FORMAT:
+            raise ValueError(f"Unknown session format {data[:1]!r}")
+        return cls.from_list(unpack(data[1:]))
+
+
+if __name__ == "__main__":
+    import json
+    import tracemalloc
+    from datetime import datetime
+
+    SESSIONS = 100_000
+
+    def dict_session(i: int) -> dict:
+        """A session as it used to be stored."""
+        return {
+            "session_id": f"session-{i}",
+            "citizen_id": f"CIT{i % 1000:03d}",
+            "channel": "phone",
+            "applications": [{"service_id": "SVC001", "status": "draft"}, {"service_id": "SVC005", "status": "draft"}],
+            "conversation_history": [
+                {"role": "user" if turn % 2 else "assistant", "message": f"turn {turn}",
+                 "timestamp": datetime.now().isoformat()}
+                for turn in range(6)
+            ],
+            "current_intent": "service_discovery",
+            "created_at": datetime.now().isoformat(),
+            "last_activity": datetime.now().isoformat(),
+        }
+
+    def record_session(i: int) -> Session:
+        session = Session(f"session-{i}", f"CIT{i % 1000:03d}", "phone",
+                          [Application("SVC001"), Application("SVC005")], current_intent="service_discovery")
+        for turn in range(6):
+            session.conversation_history.append("user" if turn % 2 else "assistant", f"turn {turn}")
+        return session
+
+    def measure(build, dump, load, label):
+        tracemalloc.start()
+        sessions = [build(i) for i in range(SESSIONS)]
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        snapshot = [dump(session) for session in sessions]
+        dump_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for data in snapshot:
+            load(data)
+        load_s = time.perf_counter() - start
+        size = sum(map(len, snapshot))
+        print(f"{label:>14}: {memory / SESSIONS:,.0f} B/session in memory, {size / SESSIONS:,.0f} B/session serialized, "
+              f"snapshot {dump_s * 1000:.0f} ms, restore {load_s * 1000:.0f} ms")
+
+    print(f"{SESSIONS:,} sessions, 2 applications and 6 turns each")
+    measure(dict_session, lambda s: json.dumps(s).encode(), json.loads, "dict + json")
+    measure(record_session, Session.to_bytes, Session.from_bytes, "record + " + ("msgpack" if "msgpack" in globals() else "json"))
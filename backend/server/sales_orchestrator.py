@@ -48,7 +48,10 @@ class VoiceAgentOrchestrator:
             intent["agents_needed"] = ["information_agent"]
         
         # Update session intent
-        session["current_intent"] = intent["primary"]
+        def set_intent(session):
+            session.current_intent = intent["primary"]
+
+        intent["context"] = SessionManager.update(session_id, set_intent)
         
         return intent
     
@@ -69,7 +72,7 @@ class VoiceAgentOrchestrator:
     def should_suggest_additional_service(session_id: str) -> bool:
         """Determine if additional service suggestion opportunity exists"""
         session = SessionManager.get_session(session_id)
-        applications = session.get("applications", [])
+        applications = session.applications
         
         # Suggest if 1-2 applications (not too few, not too many)
         return 1 <= len(applications) <= 2
@@ -88,8 +91,8 @@ class VoiceAgentOrchestrator:
         # Analyze application categories
         categories = set()
         for item in app_items:
-            if item["service_id"] in SERVICES:
-                categories.add(SERVICES[item["service_id"]]["category"])
+            if item.service_id in SERVICES:
+                categories.add(SERVICES[item.service_id]["category"])
         
         suggestions = {
             "Healthcare": "Would you like to apply for our supplemental health benefits? We have programs that complement your current application!",
@@ -121,7 +124,7 @@ class VoiceAgentOrchestrator:
     def generate_closing_statement(session_id: str) -> str:
         """Generate appropriate closing based on session state"""
         session = SessionManager.get_session(session_id)
-        intent = session.get("current_intent")
+        intent = session.current_intent
         
         closings = {
             "service_request": "Thank you for your application! You'll receive confirmation shortly. Is there anything else I can help with?",
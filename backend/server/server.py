@@ -1,30 +1,43 @@
-import json
-import base64
 import asyncio
 import argparse
 import os
 import subprocess
+import time
 import aiohttp
-import websockets
-import traceback
+from urllib.parse import parse_qs
 
 from contextlib import asynccontextmanager
-from typing import Any, Dict
+from typing import Any, Dict, List
 from pydantic import BaseModel
 
 from fastapi import FastAPI, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
 from fastapi.websockets import WebSocketDisconnect
 
 from pipecat.transports.services.helpers.daily_rest import DailyRESTHelper, DailyRoomParams
 
 from twilio.twiml.voice_response import Connect
-from twilio.rest import Client
 from dotenv import load_dotenv
+from loguru import logger
 
+# Loaded before the local modules below, which read their settings on import
 load_dotenv()
 
+from analytics_tracker import AnalyticsTracker
+from bot_hosts import BotHostSupervisor
+from bot_pool import BotWorkerPool
+from call_context import CallContext, CallRegistry
+from log_config import configure_logging, sample
+from media_relay import dumps, input_audio_append, loads, payload_duration_ms
+from metrics import BOT_PROCESSES, TIME_TO_FIRST_AUDIO, TURN_LATENCY, WS_SEND_LATENCY, MetricsCollector, render
+from realtime_pool import RealtimeConnectionPool
+from tool_tracing import tool_stats
+from campaign import CAMPAIGNS, Campaign
+from twilio_dialer import TWILIO_BATCH_MAX_SECONDS, TWILIO_CALLS_PER_SECOND, TwilioDialer, build_twiml
+
+configure_logging()
+
 
 
 """
@@ -41,17 +54,38 @@ direct browser access and RTVI client connections. It handles:
 
 # Constants
 MAX_BOTS_PER_ROOM = 1
+BOT_MODE = os.getenv("BOT_MODE", "pool")  # pool: one warmed process per session, host: many sessions per process
 
 # Global state
-bot_procs = {}
+bot_procs: Dict[str, List[subprocess.Popen]] = {}  # room URL -> processes running its bots
 daily_helpers = {}
+bot_pools = {}
+realtime_pools = {}
+twilio_dialers = {}
+metrics_collector = MetricsCollector()
 
 
 def cleanup():
     """Terminate all bot processes during server shutdown."""
-    for proc, _ in bot_procs.values():
+    # A bot host runs many rooms; stop each process once
+    procs = {proc.pid: proc for room_procs in bot_procs.values() for proc in room_procs}
+    for proc in procs.values():
         proc.terminate()
         proc.wait()
+    bot_procs.clear()
+
+
+def room_ended(room_url: str):
+    """Forget a room whose bot session has ended."""
+    bot_procs.pop(room_url, None)
+
+
+def prune_bots():
+    """Forget rooms whose bot processes have all exited."""
+    for room_url, procs in list(bot_procs.items()):
+        procs[:] = [proc for proc in procs if proc.poll() is None]
+        if not procs:
+            del bot_procs[room_url]
 
 
 def get_bot_file() -> str:
@@ -68,7 +102,34 @@ async def lifespan(app: FastAPI):
         daily_api_url="https://api.daily.co/v1",
         aiohttp_session=aiohttp_session,
     )
+    bot_cwd = os.path.dirname(os.path.abspath(__file__))
+    if BOT_MODE == "host":
+        bot_pools["bots"] = BotHostSupervisor(get_bot_file(), cwd=bot_cwd, on_ended=room_ended)
+    else:
+        bot_pools["bots"] = BotWorkerPool(get_bot_file(), cwd=bot_cwd)
+    await bot_pools["bots"].start()
+    BOT_PROCESSES.read = lambda: bot_pools["bots"].processes
+    await metrics_collector.start()
+    realtime_pools["openai"] = RealtimeConnectionPool(
+        OPENAI_REALTIME_URL,
+        headers={
+            "Authorization": f"Bearer {OPENAI_API_KEY}",
+            "OpenAI-Beta": "realtime=v1",
+        },
+        session_update=build_session_update(),
+    )
+    await realtime_pools["openai"].start()
+    twilio_dialers["twilio"] = TwilioDialer(account_sid, auth_token, TWILIO_PHONE_NUMBER)
+    await twilio_dialers["twilio"].start()
+    AnalyticsTracker.start(aggregate=True)
     yield
+    for campaign in CAMPAIGNS.values():
+        if campaign.task and not campaign.task.done():
+            campaign.task.cancel()
+    await twilio_dialers["twilio"].close()
+    await realtime_pools["openai"].stop()
+    await bot_pools["bots"].stop()
+    metrics_collector.stop()
     await aiohttp_session.close()
     cleanup()
 
@@ -97,28 +158,29 @@ async def create_room_and_token() -> tuple[str, str]:
     return room.url, token
 
 
+async def start_bot(room_url: str, token: str):
+    """Hand a room to a pre-warmed bot worker or the least-loaded bot host."""
+    prune_bots()
+    try:
+        proc = await bot_pools["bots"].acquire(room_url, token)
+        bot_procs.setdefault(room_url, []).append(proc)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to start bot: {e}")
+
+
 @app.get("/")
 async def start_agent(request: Request):
     """Create a room, start a bot, and redirect to the room URL."""
-    print("Creating room...")
+    logger.info("Creating room...")
     room_url, token = await create_room_and_token()
-    print(f"Room URL: {room_url}")
+    logger.info(f"Room URL: {room_url}")
 
     # Check if max bots limit is reached
-    if sum(1 for _, url in bot_procs.values() if url == room_url) >= MAX_BOTS_PER_ROOM:
+    prune_bots()
+    if len(bot_procs.get(room_url, ())) >= MAX_BOTS_PER_ROOM:
         raise HTTPException(status_code=500, detail=f"Max bot limit reached for room: {room_url}")
 
-    try:
-        bot_file = get_bot_file()
-        proc = subprocess.Popen(
-            [f"python3 -m {bot_file} -u {room_url} -t {token}"],
-            shell=True,
-            bufsize=1,
-            cwd=os.path.dirname(os.path.abspath(__file__)),
-        )
-        bot_procs[proc.pid] = (proc, room_url)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to start subprocess: {e}")
+    await start_bot(room_url, token)
 
     return RedirectResponse(room_url)
 
@@ -126,35 +188,29 @@ async def start_agent(request: Request):
 @app.post("/connect")
 async def rtvi_connect(request: Request) -> Dict[Any, Any]:
     """Create a room and return connection credentials."""
-    print("Creating room for RTVI connection...")
+    logger.info("Creating room for RTVI connection...")
     room_url, token = await create_room_and_token()
-    print(f"Room URL: {room_url}")
+    logger.info(f"Room URL: {room_url}")
 
-    # Start bot process
-    try:
-        bot_file = get_bot_file()
-        proc = subprocess.Popen(
-            [f"python3 -m {bot_file} -u {room_url} -t {token}"],
-            shell=True,
-            bufsize=1,
-            cwd=os.path.dirname(os.path.abspath(__file__)),
-        )
-        bot_procs[proc.pid] = (proc, room_url)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to start subprocess: {e}")
+    # Hand the room to a pre-warmed bot process
+    await start_bot(room_url, token)
 
     return {"room_url": room_url, "token": token}
 
 
 @app.get("/status/{pid}")
 def get_status(pid: int):
-    """Get the status of a specific bot process."""
-    proc = bot_procs.get(pid)
-    if not proc:
+    """Get the status of a bot process and the rooms it is running.
+
+    A bot host runs many rooms in one process; rooms are forgotten once their
+    session ends, so a process with no rooms left is reported as not found.
+    """
+    prune_bots()
+    rooms = [room_url for room_url, procs in bot_procs.items() if any(proc.pid == pid for proc in procs)]
+    if not rooms:
         raise HTTPException(status_code=404, detail=f"Bot with process ID: {pid} not found")
 
-    status = "running" if proc[0].poll() is None else "finished"
-    return JSONResponse({"bot_id": pid, "status": status})
+    return JSONResponse({"bot_id": pid, "status": "running", "rooms": rooms})
 
 
 
@@ -195,67 +251,180 @@ LOG_EVENT_TYPES = [
 ]
 account_sid = os.getenv("TWILIO_ACCOUNT_SID")
 auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-client = Client(account_sid, auth_token)
 
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_FROM_NUMBER")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_REALTIME_URL = os.getenv(
+    "OPENAI_REALTIME_URL",
+    "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01",
+)
 ngrokurl = os.getenv("NGROK_URL")
 
 
 class CallRequest(BaseModel):
     to_phone_number: str
 
+
+class BulkCallRequest(BaseModel):
+    to_phone_numbers: List[str]
+    calls_per_second: float = TWILIO_CALLS_PER_SECOND
+
+
 @app.post("/make-call")
 async def make_call(request: CallRequest):
     """an outgoing call from Twilio."""
     to_phone_number = request.to_phone_number 
     
     try:
-        twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Say>Connecting you to the AI assistant.</Say>
-    <Connect>
-        <Stream name="arsh" url="wss://{ngrokurl}/media-stream" /> 
-    </Connect>
-    <Pause length="10" />
-</Response>"""
-        # paste here ^
-
-        # Make the call
-        call = client.calls.create(
-            twiml=twiml,
-            to=to_phone_number,
-            from_=TWILIO_PHONE_NUMBER,
-        )
-        return {"message": "Call initiated.", "call_sid": call.sid}
+        # Make the call without blocking the event loop
+        call_sid = await twilio_dialers["twilio"].create_call(to_phone_number, build_twiml(ngrokurl))
+        return {"message": "Call initiated.", "call_sid": call_sid}
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Failed to initiate call")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@app.post("/make-calls")
+async def make_calls(request: BulkCallRequest):
+    """Outgoing calls to a few numbers, rate limited to calls_per_second.
+
+    The request waits for every call to be placed, so batches that would take
+    longer than TWILIO_BATCH_MAX_SECONDS are refused; use POST /campaigns.
+    """
+    if request.calls_per_second <= 0:
+        raise HTTPException(status_code=400, detail="calls_per_second must be positive")
+    seconds = (len(request.to_phone_numbers) - 1) / request.calls_per_second
+    if seconds > TWILIO_BATCH_MAX_SECONDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{len(request.to_phone_numbers)} calls at {request.calls_per_second:g}/s would take {seconds:.0f}s; "
+                   f"the limit is {TWILIO_BATCH_MAX_SECONDS:g}s, start a campaign with POST /campaigns instead",
+        )
+
+    results = await twilio_dialers["twilio"].create_calls(
+        request.to_phone_numbers, build_twiml(ngrokurl), request.calls_per_second
+    )
+    initiated = sum(1 for result in results if "call_sid" in result)
+    return {"message": f"{initiated} of {len(results)} calls initiated.", "calls": results}
+
+class CampaignRequest(BaseModel):
+    to_phone_numbers: List[str]
+    concurrency: int = 5
+    calls_per_second: float = TWILIO_CALLS_PER_SECOND
+    max_attempts: int = 3
+
+
+def start_campaign(numbers: List[str], concurrency: int, calls_per_second: float, max_attempts: int) -> dict:
+    if concurrency <= 0 or calls_per_second <= 0 or max_attempts <= 0:
+        raise HTTPException(status_code=400, detail="concurrency, calls_per_second and max_attempts must be positive")
+    if not numbers:
+        raise HTTPException(status_code=400, detail="No phone numbers given")
+    if not ngrokurl:
+        raise HTTPException(status_code=500, detail="NGROK_URL is not set, so Twilio could not report call outcomes")
+
+    campaign = Campaign(
+        numbers,
+        twilio_dialers["twilio"],
+        build_twiml(ngrokurl),
+        concurrency=concurrency,
+        calls_per_second=calls_per_second,
+        max_attempts=max_attempts,
+        status_callback=f"https://{ngrokurl}/campaigns/status-callback",
+    ).start()
+    logger.info(f"Campaign {campaign.campaign_id} started with {len(campaign.calls)} numbers")
+    return campaign.summary()
+
+
+@app.post("/campaigns")
+async def create_campaign(request: CampaignRequest):
+    """Dial a list of numbers in the background; poll GET /campaigns/{id} for progress."""
+    return start_campaign(request.to_phone_numbers, request.concurrency, request.calls_per_second, request.max_attempts)
+
+
+@app.post("/campaigns/csv")
+async def create_campaign_from_csv(request: Request, concurrency: int = 5,
+                                   calls_per_second: float = TWILIO_CALLS_PER_SECOND, max_attempts: int = 3):
+    """Same as POST /campaigns, with the numbers sent as a text/csv body."""
+    numbers = Campaign.numbers_from_csv((await request.body()).decode("utf-8-sig"))
+    return start_campaign(numbers, concurrency, calls_per_second, max_attempts)
+
+
+@app.get("/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str, calls: bool = False):
+    """Campaign progress; pass ?calls=true to include every call's SID and outcome."""
+    campaign = CAMPAIGNS.get(campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found")
+
+    summary = campaign.summary()
+    if calls:
+        summary["calls"] = [call.to_dict() for call in campaign.calls]
+    return summary
+
+
+@app.post("/campaigns/status-callback")
+async def campaign_status_callback(request: Request):
+    """Twilio StatusCallback for campaign calls (form encoded)."""
+    form = parse_qs((await request.body()).decode())
+    call_sid = form.get("CallSid", [""])[0]
+    call_status = form.get("CallStatus", [""])[0]
+    if call_sid and call_status:
+        Campaign.record_status(call_sid, call_status)
+    return {"status": "ok"}
+
+
 @app.websocket("/media-stream")
 async def handle_media_stream(websocket: WebSocket):
     """Handle WebSocket connections between Twilio and OpenAI."""
-    print("Client connected")
+    logger.info("Client connected")
     await websocket.accept()
 
-    async with websockets.connect(
-        "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01",
-        extra_headers={
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "OpenAI-Beta": "realtime=v1",
-        },
-    ) as openai_ws:
-        await send_session_update(openai_ws)
+    call = CallRegistry.register(CallContext(websocket))
+    try:
+        # Pre-opened and already configured with the session update
+        call.openai_ws = await realtime_pools["openai"].acquire()
+        # Each direction is a reader and a writer joined by a bounded queue,
+        # so a slow peer never blocks reading from the other side
         await asyncio.gather(
-            receive_from_twilio(websocket, openai_ws),
-            send_to_twilio(websocket, openai_ws),
+            receive_from_twilio(call),
+            forward_to_openai(call),
+            send_to_twilio(call),
+            forward_to_twilio(call),
         )
+    finally:
+        if call.openai_ws is not None:
+            await call.openai_ws.close()
+        CallRegistry.unregister(call.call_id)
+
+
+@app.get("/calls")
+async def live_calls():
+    """List the phone calls currently bridged by this worker."""
+    return {"count": CallRegistry.count(), "calls": CallRegistry.snapshot()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Latency histograms and bot process count in the Prometheus text format."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/tool-stats")
+async def get_tool_stats():
+    """Rolling per-tool latency percentiles, errors and payload sizes from every bot."""
+    return tool_stats()
+
 
+@app.get("/analytics")
+async def analytics():
+    """Service metrics merged across the server and every bot process."""
+    return AnalyticsTracker.get_metrics()
 
-async def send_session_update(openai_ws):
-    """Sends session update details to OpenAI WebSocket."""
-    session_update = {
+
+def build_session_update() -> dict:
+    """Session update details applied to every OpenAI realtime session."""
+    return {
         "type": "session.update",
         "session": {
             "turn_detection": {"type": "server_vad"},
@@ -267,63 +436,129 @@ async def send_session_update(openai_ws):
             "temperature": 0.8,
         },
     }
-    print("Sending session update:", json.dumps(session_update))
-    await openai_ws.send(json.dumps(session_update))
 
-current_stream_sid = None
 
-async def receive_from_twilio(websocket: WebSocket, openai_ws):
-    """Receive audio data from Twilio and forward it to OpenAI Realtime API."""
-    global current_stream_sid
+async def receive_from_twilio(call: CallContext):
+    """Receive audio data from Twilio and queue it for the OpenAI Realtime API."""
     try:
-        async for message in websocket.iter_text():
-            data = json.loads(message)
-            if data["event"] == "media" and openai_ws.open:
-                audio_append = {
-                    "type": "input_audio_buffer.append",
-                    "audio": data["media"]["payload"],
-                }
-                await openai_ws.send(json.dumps(audio_append))
+        async for message in call.twilio_ws.iter_text():
+            data = loads(message)
+            if data["event"] == "media":
+                call.frames_in += 1
+                call.last_media_at = time.monotonic()
+                call.inbound.put(data["media"]["payload"])
+                if sample("twilio_media"):
+                    logger.debug(f"Call {call.call_id}: {call.frames_in} frames in, inbound queue {call.inbound.depth}")
+            elif data["event"] == "mark":
+                # Marks are named "<item_id>:<ms sent>" and echoed once that audio has played
+                item_id, _, played_ms = data["mark"]["name"].rpartition(":")
+                call.mark_played(item_id, int(played_ms))
             elif data["event"] == "start":
-                current_stream_sid = data["start"]["streamSid"]
-                print(f"Incoming stream started: {current_stream_sid}")
+                call.start_stream(data["start"]["streamSid"])
+                logger.info(f"Incoming stream started: {call.stream_sid}")
     except WebSocketDisconnect:
-        print("Twilio client disconnected.")
-        if openai_ws.open:
-            await openai_ws.close()
+        pass
+    logger.info(f"Twilio client disconnected: {call.stream_sid}")
+    call.inbound.close()
 
 
-async def send_to_twilio(websocket: WebSocket, openai_ws):
-    global current_stream_sid
-    """Receive audio responses from OpenAI and send them back to Twilio."""
+async def forward_to_openai(call: CallContext):
+    """Send queued caller audio to OpenAI, then release the model socket on hangup."""
+    openai_ws = call.openai_ws
     try:
-        async for openai_message in openai_ws:
-            response = json.loads(openai_message)
-            if response["type"] in LOG_EVENT_TYPES:
-                print(f"Received event: {response['type']}", response)
+        while (payload := await call.inbound.get()) is not None:
+            if not openai_ws.open:
+                break
+            sent_at = time.perf_counter()
+            await openai_ws.send(input_audio_append(payload))
+            WS_SEND_LATENCY.observe(time.perf_counter() - sent_at, "openai")
+    except Exception as e:
+        logger.error(f"Error in sending data to OpenAI: {e}")
+    if openai_ws.open:
+        await openai_ws.close()
+
+
+async def send_to_twilio(call: CallContext):
+    """Receive audio responses from OpenAI and queue them for Twilio."""
+    try:
+        async for openai_message in call.openai_ws:
+            response = loads(openai_message)
+            if response["type"] == "response.audio.delta" and response.get("delta"):
+                item_id = response.get("item_id")
+                if item_id == call.interrupted_item_id:
+                    continue  # the caller already talked over this item
+                if item_id != call.response_item_id:
+                    call.start_response(item_id)
+                    if call.speech_stopped_at is not None:
+                        TURN_LATENCY.observe(time.monotonic() - call.speech_stopped_at, "phone")
+                        call.speech_stopped_at = None
+                # The base64 μ-law delta is forwarded untouched
+                call.outbound.put(response["delta"])
+            elif response["type"] == "input_audio_buffer.speech_started":
+                logger.info(f"Received event: {response['type']}")
+                await handle_barge_in(call)
+            elif response["type"] == "input_audio_buffer.speech_stopped":
+                call.speech_stopped_at = time.monotonic()
+            elif response["type"] == "response.done":
+                logger.debug(f"Received event: {response['type']} {response}")
+                call.finish_response()
+            elif response["type"] in LOG_EVENT_TYPES:
+                logger.debug(f"Received event: {response['type']} {response}")
             elif response["type"] == "session.updated":
-                print("Session updated:", response)
-            elif response["type"] == "response.audio.delta" and response.get("delta"):
-                try:
-                    audio_payload = base64.b64encode(
-                        base64.b64decode(response["delta"])
-                    ).decode("utf-8")
-                    print(response)
-                    audio_delta = {
-                        "event": "media",
-                        "streamSid": current_stream_sid,
-                        "media": {"payload": audio_payload},
-                    }
-                    print(current_stream_sid)
-                    await websocket.send_json(audio_delta)
-                except Exception as e:
-                    print(f"Error processing audio data: {e}")
+                logger.debug(f"Session updated: {response}")
+    except Exception as e:
+        logger.error(f"Error in receiving data from OpenAI: {e}")
+    call.outbound.close()
+
+
+async def forward_to_twilio(call: CallContext):
+    """Send queued model audio to Twilio, each chunk followed by a playback mark."""
+    try:
+        while (payload := await call.outbound.get()) is not None:
+            if call.envelope is None:
+                continue  # Twilio has not announced the stream yet
+            sent_at = time.perf_counter()
+            await call.twilio_ws.send_text(call.envelope.media(payload))
+            WS_SEND_LATENCY.observe(time.perf_counter() - sent_at, "twilio")
+            if call.frames_out == 0:
+                TIME_TO_FIRST_AUDIO.observe(time.monotonic() - call.connected_at, "phone")
+            call.frames_out += 1
+            if sample("twilio_send"):
+                logger.debug(f"Call {call.call_id}: {call.frames_out} chunks out, outbound queue {call.outbound.depth}")
+            if call.response_item_id is not None:
+                call.audio_sent_ms += payload_duration_ms(payload)
+                await call.twilio_ws.send_text(call.envelope.mark(f"{call.response_item_id}:{call.audio_sent_ms}"))
     except Exception as e:
-        print(f"Error in sending data to Twilio: {e}")
+        logger.error(f"Error in sending data to Twilio: {e}")
+
+
+async def handle_barge_in(call: CallContext):
+    """Stop the bot talking as soon as the caller starts speaking.
+
+    Drops the audio still queued here, tells Twilio to discard what it has
+    buffered, and truncates the assistant item on the realtime socket to the
+    audio the caller actually heard, so the model's transcript matches.
+    """
+    if call.response_item_id is None or call.envelope is None:
+        return  # the bot is not speaking
+
+    item_id = call.response_item_id
+    played_ms = call.audio_played_ms
+    call.outbound.flush()
+    call.interrupt()
+
+    await call.twilio_ws.send_text(call.envelope.clear())
+    if call.openai_ws.open:
+        await call.openai_ws.send(dumps({
+            "type": "conversation.item.truncate",
+            "item_id": item_id,
+            "content_index": 0,
+            "audio_end_ms": played_ms,
+        }))
 
 @app.post("/error")
 async def error():
-    print("meow") # this is for twilio's error handling
+    logger.warning("Twilio reported a call error") # this is for twilio's error handling
 
 
 if __name__ == "__main__":
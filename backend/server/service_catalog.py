@@ -0,0 +1,259 @@
+"""Indexed Service Catalog Search
+
+The catalog is indexed once when it is loaded: every name, category and
+eligibility token (and each of its prefixes of at least MIN_PREFIX letters)
+maps to the services containing it with a field weight, categories are
+bucketed, and all strings are normalized up front. A search is then a few
+dict lookups and a walk over the smallest posting list instead of a lowercase
+substring scan over every service. Query words match whole words or their
+prefixes, so only when that finds nothing are the normalized fields scanned
+for the query as a substring, which still finds "care" in "Healthcare".
+
+Run `python service_catalog.py` to benchmark searches on 10k and 100k services.
+"""
+import heapq
+import random
+import re
+from itertools import islice
+from typing import Dict, List, Optional, Set, Tuple
+
+MIN_PREFIX = 3
+# Field weights for ranking; prefix matches score half
+NAME_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+ELIGIBILITY_WEIGHT = 1.0
+STOPWORDS = frozenset({"a", "an", "and", "for", "in", "of", "on", "the", "to", "with", "scheme", "service", "services"})
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase with runs of whitespace collapsed."""
+    return " ".join(text.lower().split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class CatalogIndex:
+    """Read-only search index over a {service_id: service} catalog."""
+
+    # Below this many matches, score them all rather than walking ranked postings
+    DIRECT_SCORE_LIMIT = 256
+
+    def __init__(self, services: Dict[str, dict]):
+        self.services = services
+        self.order = {service_id: position for position, service_id in enumerate(services)}
+        self.names: Dict[str, str] = {}
+        self._texts: Dict[str, Tuple[str, str]] = {}  # service_id -> normalized (category, eligibility)
+        self._weights: Dict[str, Dict[str, float]] = {}  # term or prefix -> {service_id: weight}
+        self._postings: Dict[str, Set[str]] = {}
+        self._ranked: Dict[str, List[str]] = {}  # term -> service IDs, best weight first
+        self._eligibility: Dict[str, Set[str]] = {}
+        self._eligibility_ranked: Dict[str, List[str]] = {}
+        self._categories: Dict[str, List[str]] = {}
+
+        for service_id, service in services.items():
+            self.names[service_id] = normalize(service["name"])
+            category = normalize(service.get("category", ""))
+            self._texts[service_id] = (category, normalize(service.get("eligibility", "")))
+            self._categories.setdefault(category, []).append(service_id)
+            self._add(service_id, service["name"], NAME_WEIGHT)
+            self._add(service_id, category, CATEGORY_WEIGHT)
+            for term in self._add(service_id, service.get("eligibility", ""), ELIGIBILITY_WEIGHT):
+                self._eligibility_ranked.setdefault(term, []).append(service_id)
+
+        order = self.order
+        for term, weights in self._weights.items():
+            self._postings[term] = set(weights)
+            self._ranked[term] = sorted(weights, key=lambda service_id: (-weights[service_id], order[service_id]))
+        for term, service_ids in self._eligibility_ranked.items():
+            self._eligibility[term] = set(service_ids)
+        self._category_sets = {name: set(service_ids) for name, service_ids in self._categories.items()}
+
+    def _add(self, service_id: str, text: str, weight: float) -> Set[str]:
+        """Index a field's tokens and prefixes; returns the terms added."""
+        added = set()
+        for token in tokenize(text):
+            for end in range(min(MIN_PREFIX, len(token)), len(token) + 1):
+                term = token[:end]
+                score = weight if end == len(token) else weight / 2
+                weights = self._weights.setdefault(term, {})
+                if score > weights.get(service_id, 0.0):
+                    weights[service_id] = score
+                added.add(term)
+        return added
+
+    def categories(self, category: str) -> List[str]:
+        """Normalized category names containing `category`."""
+        category = normalize(category)
+        return [name for name in self._categories if category in name]
+
+    def search(self, query: str = "", category: str = "", eligibility: str = "",
+               k: int = 5) -> Tuple[int, List[str]]:
+        """Services matching every query word, narrowed to a category and eligibility.
+
+        Returns the number of matches and the IDs of the top `k`, best first.
+        With no arguments the whole catalog matches, in catalog order. A query
+        no word or prefix matches is looked for inside names instead.
+        """
+        total, top = self._search_index(query, category, eligibility, k)
+        if not total and query.strip():
+            total, top = self._search_substring(query, category, eligibility, k)
+        return total, top
+
+    def _search_substring(self, query: str, category: str, eligibility: str, k: int) -> Tuple[int, List[str]]:
+        """The linear scan the index replaced, in catalog order; used only when the index finds nothing."""
+        query, category, eligibility = normalize(query), normalize(category), normalize(eligibility)
+        texts = self._texts
+        matches = [service_id for service_id, name in self.names.items()
+                   if query in name and category in texts[service_id][0] and eligibility in texts[service_id][1]]
+        return len(matches), matches[:k]
+
+    def _search_index(self, query: str, category: str, eligibility: str, k: int) -> Tuple[int, List[str]]:
+        # Candidate sets, each paired with its IDs in ranked order
+        sets: List[Tuple[Set[str], List[str]]] = []
+        query_terms = tokenize(query)
+        for term in query_terms:
+            if term not in self._postings:
+                return 0, []
+            sets.append((self._postings[term], self._ranked[term]))
+        if category.strip():
+            names = self.categories(category)
+            if not names:
+                return 0, []
+            if len(names) == 1:
+                sets.append((self._category_sets[names[0]], self._categories[names[0]]))
+            else:
+                service_ids = sorted((service_id for name in names for service_id in self._categories[name]),
+                                     key=self.order.__getitem__)
+                sets.append((set(service_ids), service_ids))
+        for term in tokenize(eligibility):
+            if term not in self._eligibility:
+                return 0, []
+            sets.append((self._eligibility[term], self._eligibility_ranked[term]))
+
+        if not sets:
+            return len(self.services), list(islice(self.services, k))
+
+        sets.sort(key=lambda pair: len(pair[0]))
+        matches = sets[0][0].intersection(*(candidates for candidates, _ in sets[1:]))
+        if not matches:
+            return 0, []
+
+        weights = [self._weights[term] for term in query_terms]
+        order = self.order
+
+        def rank(service_id):
+            return -sum(weight[service_id] for weight in weights), order[service_id]
+
+        if len(matches) <= self.DIRECT_SCORE_LIMIT:
+            return len(matches), heapq.nsmallest(k, matches, key=rank)
+
+        if not weights:
+            # Unscored: the smallest set's list is already in catalog order
+            top = []
+            for service_id in sets[0][1]:
+                if service_id in matches:
+                    top.append(service_id)
+                    if len(top) == k:
+                        break
+            return len(matches), top
+
+        # Walk the rarest query term's postings, best weight first, until no
+        # remaining service can beat the k-th best score found so far
+        position = min(range(len(weights)), key=lambda i: len(weights[i]))
+        rarest = weights[position]
+        ceiling = sum(max(weight.values()) for i, weight in enumerate(weights) if i != position)
+        best: List[Tuple[float, int, str]] = []  # min-heap of (score, -position, id)
+        for service_id in self._ranked[query_terms[position]]:
+            if len(best) == k and rarest[service_id] + ceiling <= best[0][0]:
+                break
+            if service_id in matches:
+                item = (sum(weight[service_id] for weight in weights), -order[service_id], service_id)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+        return len(matches), [service_id for _, _, service_id in sorted(best, reverse=True)]
+
+
+_catalog: Optional[CatalogIndex] = None
+
+
+def get_catalog() -> CatalogIndex:
+    """The live index, built from mock_data.SERVICES on first use."""
+    global _catalog
+    if _catalog is None:
+        from mock_data import SERVICES
+        _catalog = CatalogIndex(SERVICES)
+    return _catalog
+
+
+# Vocabulary of the generated catalogs the benchmarks here and in fuzzy_matcher search
+REGIONS = ["Rajasthan", "Kerala", "Punjab", "Assam", "Bihar", "Goa", "Odisha", "Gujarat", "Delhi", "Tamil Nadu"]
+TOPICS = ["Healthcare", "Education", "Housing", "Employment", "Pension", "Agriculture", "Water", "Transport",
+          "Passport", "Business", "Disability", "Child Care", "Skill", "Tax", "Energy", "Fisheries"]
+KINDS = ["Subsidy", "Grant", "Assistance", "Renewal", "Registration", "Support", "Loan", "Insurance", "License"]
+GROUPS = ["Low income families", "Students under 25", "Citizens 60+", "Farmers", "Women entrepreneurs",
+          "Persons with disabilities", "Unemployed adults", "Small businesses", "Citizens 18+"]
+
+
+def synthetic_catalog(size: int) -> Dict[str, dict]:
+    """mock_data.SERVICES padded out to `size` generated services, for benchmarks."""
+    from mock_data import SERVICES
+
+    rng = random.Random(size)
+    services = dict(SERVICES)
+    for i in range(len(services), size):
+        topic = rng.choice(TOPICS)
+        services[f"SVC{i + 1:06d}"] = {
+            "name": f"{rng.choice(REGIONS)} {topic} {rng.choice(KINDS)} {rng.randint(1, 999)}",
+            "category": topic,
+            "eligibility": rng.choice(GROUPS),
+            "availability": {"status": "active", "next_available": "N/A"},
+        }
+    return services
+
+
+if __name__ == "__main__":
+    import time
+
+    def linear_search(services, query, category, eligibility):
+        """The scan search_services used to do (without its empty-category bug)."""
+        query, category, eligibility = query.lower(), category.lower(), eligibility.lower()
+        return [
+            service_id for service_id, service in services.items()
+            if (query and query in service["name"].lower() or category and category in service["category"].lower())
+            and eligibility in service.get("eligibility", "").lower()
+        ]
+
+    QUERIES = [
+        ("passport renewal", "", ""),
+        ("health", "", ""),
+        ("kerala pension", "", "citizens 60"),
+        ("", "agriculture", "farmers"),
+        ("grant", "education", ""),
+        ("care", "", ""),
+        ("xyzzy", "", ""),
+    ]
+
+    for size in (10_000, 100_000):
+        services = synthetic_catalog(size)
+        start = time.perf_counter()
+        index = CatalogIndex(services)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"{size:,} services: index built in {build_ms:.0f} ms")
+        for query, category, eligibility in QUERIES:
+            samples = []
+            for _ in range(200):
+                start = time.perf_counter_ns()
+                total, _ = index.search(query, category, eligibility)
+                samples.append(time.perf_counter_ns() - start)
+            samples.sort()
+            start = time.perf_counter()
+            linear_search(services, query, category, eligibility)
+            linear_ms = (time.perf_counter() - start) * 1000
+            print(f"  {query or '-':>16} | {category or '-':>11} | {eligibility or '-':>11}: {total:>6} hits, "
+                  f"p50 {samples[100] / 1e6:.3f} ms, p99 {samples[198] / 1e6:.3f} ms (linear scan {linear_ms:.2f} ms)")
@@ -1,75 +1,90 @@
-"""Session and Context Management for Omnichannel Continuity"""
-import json
-from datetime import datetime
-from typing import Dict, Any
+"""Session and Context Management for Omnichannel Continuity
+
+Sessions live in the store picked by SESSION_STORE (see session_store), opened
+on first use and shared with the bot processes when it is SQLite. Every change
+goes through one store update, so concurrent changes to a session from
+different processes are never lost. Calls block on the store; async code
+should make them through asyncio.to_thread.
+"""
+import threading
+from typing import Callable, List, Optional
+
+from records import Application, Session, now_ms
+from session_store import SessionStore, create_store
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SessionStore:
+    """The session store, opened on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store(encode=Session.to_bytes, decode=Session.from_bytes)
+    return _store
 
-# In-memory session storage (use Redis/DB in production)
-SESSIONS = {}
 
 class SessionManager:
     @staticmethod
     def create_session(session_id: str, channel: str, citizen_id: str = None):
         """Create new session with context"""
-        SESSIONS[session_id] = {
-            "session_id": session_id,
-            "citizen_id": citizen_id or "CIT001",
-            "channel": channel,  # web, phone, whatsapp
-            "applications": [],
-            "conversation_history": [],
-            "current_intent": None,
-            "created_at": datetime.now().isoformat(),
-            "last_activity": datetime.now().isoformat()
-        }
-        return SESSIONS[session_id]
-    
+        session = Session(session_id, citizen_id or "CIT001", channel)
+        get_store().put(session_id, session)
+        return session
+
     @staticmethod
-    def get_session(session_id: str):
+    def update(session_id: str, mutate: Callable[[Session], None]) -> Session:
+        """Apply `mutate` to a session (a new web session if missing) and save it, atomically"""
+        def touch(session: Session):
+            mutate(session)
+            session.last_activity = now_ms()
+
+        return get_store().update(session_id, touch, lambda: Session(session_id, "CIT001", "web"))
+
+    @staticmethod
+    def get_session(session_id: str) -> Session:
         """Retrieve session or create new one"""
-        if session_id not in SESSIONS:
-            return SessionManager.create_session(session_id, "web")
-        SESSIONS[session_id]["last_activity"] = datetime.now().isoformat()
-        return SESSIONS[session_id]
-    
+        return SessionManager.update(session_id, lambda session: None)
+
     @staticmethod
-    def update_applications(session_id: str, application_items: list):
-        """Update applications in session"""
-        session = SessionManager.get_session(session_id)
-        session["applications"] = application_items
+    def save(session: Session):
+        """Overwrite the stored session; prefer update() for read-modify-write"""
+        get_store().put(session.session_id, session)
         return session
-    
+
+    @staticmethod
+    def update_applications(session_id: str, application_items: List[Application]):
+        """Update applications in session"""
+        def replace(session: Session):
+            session.applications = list(application_items)
+
+        return SessionManager.update(session_id, replace)
+
     @staticmethod
     def switch_channel(session_id: str, new_channel: str):
         """Handle channel switching (web → phone → kiosk)"""
-        session = SessionManager.get_session(session_id)
-        old_channel = session["channel"]
-        session["channel"] = new_channel
-        session["conversation_history"].append({
-            "event": "channel_switch",
-            "from": old_channel,
-            "to": new_channel,
-            "timestamp": datetime.now().isoformat()
-        })
-        return session
-    
+        def switch(session: Session):
+            old_channel = session.channel
+            session.channel = new_channel
+            session.conversation_history.append("event", f"Switched channel from {old_channel} to {new_channel}")
+
+        return SessionManager.update(session_id, switch)
+
     @staticmethod
     def add_conversation(session_id: str, role: str, message: str):
         """Track conversation for context"""
-        session = SessionManager.get_session(session_id)
-        session["conversation_history"].append({
-            "role": role,
-            "message": message,
-            "timestamp": datetime.now().isoformat()
-        })
-        return session
-    
+        return SessionManager.update(session_id, lambda session: session.conversation_history.append(role, message))
+
     @staticmethod
     def get_context_summary(session_id: str) -> str:
         """Generate context summary for agent"""
         session = SessionManager.get_session(session_id)
-        app_count = len(session["applications"])
-        last_intent = session.get("current_intent", "browsing")
-        
-        summary = f"Citizen {session['citizen_id']} on {session['channel']}. "
+        app_count = len(session.applications)
+        last_intent = session.current_intent or "browsing"
+
+        summary = f"Citizen {session.citizen_id} on {session.channel}. "
         if app_count > 0:
             summary += f"{app_count} applications in progress. "
         summary += f"Current activity: {last_intent}."
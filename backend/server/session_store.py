@@ -0,0 +1,211 @@
+"""Pluggable Session Storage for SessionManager
+
+- MemorySessionStore: in-process LRU with an idle TTL, for a single worker.
+- SQLiteSessionStore: a local SQLite file in WAL mode, shared by the server
+  and every bot process on the host and kept across restarts.
+
+Both bound what they hold: sessions idle longer than SESSION_TTL seconds
+expire, and the memory store also evicts the least recently used session
+beyond SESSION_MAX. Pick one with SESSION_STORE=memory|sqlite.
+
+update() loads, changes and stores a session as one step, in a single
+BEGIN IMMEDIATE transaction for SQLite, so concurrent changes from different
+processes are never lost. Stores block while they work; call them from a
+worker thread in async code. A stored session that no longer decodes is
+logged and dropped, and reads as missing.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Union
+
+from loguru import logger
+
+SESSION_STORE = os.getenv("SESSION_STORE", "sqlite")
+SESSION_DB = os.getenv("SESSION_DB") or os.path.join(tempfile.gettempdir(), "dialmate-sessions.db")
+SESSION_TTL = float(os.getenv("SESSION_TTL", "86400"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+
+
+def _json_encode(session) -> str:
+    return json.dumps(session, separators=(",", ":"))
+
+
+class SessionStore:
+    """Key-value storage for sessions.
+
+    Persistent stores serialize sessions with the `encode`/`decode` pair they
+    are created with; the memory store keeps the objects themselves.
+    """
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """The stored session, or None if it is missing or expired."""
+        raise NotImplementedError
+
+    def put(self, session_id: str, session: dict):
+        """Store a session, restarting its TTL."""
+        raise NotImplementedError
+
+    def update(self, session_id: str, mutate: Callable[[object], None], create: Callable[[], object]):
+        """Load the session (or `create()` one), `mutate` it and store it atomically; returns it."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, max_size: int = SESSION_MAX, ttl: float = SESSION_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._sessions = OrderedDict()  # session_id -> (expires_at, session), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def put(self, session_id: str, session: dict):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic() + self.ttl, session)
+            self._sessions.move_to_end(session_id)
+            self._evict()
+
+    def update(self, session_id: str, mutate: Callable[[object], None], create: Callable[[], object]):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            session = entry[1] if entry is not None and entry[0] >= time.monotonic() else create()
+            mutate(session)
+            self._sessions[session_id] = (time.monotonic() + self.ttl, session)
+            self._sessions.move_to_end(session_id)
+            self._evict()
+        return session
+
+    def _evict(self):
+        now = time.monotonic()
+        # Least recently used first, so expired sessions sit at the front
+        while self._sessions:
+            session_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at >= now and len(self._sessions) <= self.max_size:
+                break
+            del self._sessions[session_id]
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    PURGE_EVERY = 1000  # puts between sweeps of expired rows
+
+    def __init__(self, path: str = SESSION_DB, ttl: float = SESSION_TTL,
+                 encode: Callable[[object], Union[str, bytes]] = _json_encode,
+                 decode: Callable[[Union[str, bytes]], object] = json.loads):
+        self.path = path
+        self.ttl = ttl
+        self.encode = encode
+        self.decode = decode
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._load(session_id)
+
+    def put(self, session_id: str, session: dict):
+        data = self.encode(session)
+        with self._lock:
+            self._store(session_id, data)
+
+    def update(self, session_id: str, mutate: Callable[[object], None], create: Callable[[], object]):
+        with self._lock:
+            # Takes the database write lock up front, so no other process can
+            # change the session between our read and our write
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                session = self._load(session_id)
+                if session is None:
+                    session = create()
+                mutate(session)
+                self._store(session_id, self.encode(session))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return session
+
+    def _load(self, session_id: str):
+        row = self._db.execute(
+            "SELECT data FROM sessions WHERE session_id = ? AND expires_at >= ?", (session_id, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return self.decode(row[0])
+        except (ValueError, TypeError, KeyError, IndexError) as e:
+            logger.warning(f"Dropping undecodable session {session_id}: {e!r}")
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            return None
+
+    def _store(self, session_id: str, data: Union[str, bytes]):
+        self._db.execute(
+            "INSERT INTO sessions (session_id, data, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+            (session_id, data, time.time() + self.ttl),
+        )
+        self._puts += 1
+        if self._puts % self.PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete expired sessions; returns how many were removed."""
+        return self._db.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),)).rowcount
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions WHERE expires_at >= ?", (time.time(),)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def create_store(kind: str = SESSION_STORE, encode=_json_encode, decode=json.loads) -> SessionStore:
+    """Store selected by SESSION_STORE."""
+    if kind == "memory":
+        return MemorySessionStore()
+    if kind == "sqlite":
+        return SQLiteSessionStore(encode=encode, decode=decode)
+    raise ValueError(f"Unknown session store: {kind}")
@@ -0,0 +1,70 @@
+"""Startup Timing for Bot Processes
+
+Bot processes mark the end of each startup phase (import groups, VAD load,
+transport and model setup, joining the room) on STARTUP. Run a bot with
+--profile-startup to log the breakdown once it has joined its room. Marking
+is always on until the first room is joined or the first session ends; it
+costs a perf_counter call per phase, and later sessions record nothing.
+"""
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+_started = time.perf_counter()
+
+
+class StartupProfile:
+    def __init__(self):
+        self.enabled = False
+        self.finished = False
+        self.phases: List[Tuple[str, float, bool]] = []  # (name, seconds, ran in the background)
+        self.idle = 0.0  # seconds spent waiting for work, left out of the breakdown
+        self._last = _started
+
+    def mark(self, name: str):
+        """End the current phase; it covers everything since the previous mark."""
+        if self.finished:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last, False))
+        self._last = now
+
+    def skip(self):
+        """End the current phase without counting it, like a pool worker waiting for a room."""
+        if self.finished:
+            return
+        now = time.perf_counter()
+        self.idle += now - self._last
+        self._last = now
+
+    @contextmanager
+    def background(self, name: str):
+        """Time work that overlaps the main phases, like loading the VAD in a thread."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if not self.finished:
+                self.phases.append((name, time.perf_counter() - started, True))
+
+    def finish(self) -> str:
+        """Stop recording; returns the report, logged by the caller if enabled."""
+        if self.finished:
+            return ""
+        report = self.report()
+        self.finished = True
+        self.phases.clear()
+        return report
+
+    def report(self) -> str:
+        total = self._last - _started - self.idle
+        lines = [f"Startup took {total * 1000:.0f} ms to the last mark"]
+        if self.idle:
+            lines[0] += f", not counting {self.idle * 1000:.0f} ms waiting for a room"
+        for name, seconds, background in self.phases:
+            share = f"{seconds / total * 100:5.1f}%" if total and not background else "  (bg)"
+            lines.append(f"  {seconds * 1000:8.1f} ms {share}  {name}")
+        return "\n".join(lines)
+
+
+STARTUP = StartupProfile()
@@ -0,0 +1,10 @@
+"""Make the flat server modules importable, as they are when run from backend/server.
+
+Modules that configure logging on import (server) write to LOG_FILE rather
+than to the stderr pytest captures and closes.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOG_FILE", os.devnull)
@@ -0,0 +1,87 @@
+"""Analytics shard files: writing, merging and skipping broken ones"""
+import json
+import os
+import threading
+
+import pytest
+
+import analytics_tracker
+from analytics_tracker import SHARD_FORMAT, MetricsShard
+
+
+@pytest.fixture
+def shard_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics_tracker, "ANALYTICS_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _shard(conversations=1, service="SVC001") -> MetricsShard:
+    shard = MetricsShard()
+    shard.conversations = conversations
+    shard.satisfaction.observe(4)
+    shard.service_views.add(service)
+    return shard
+
+
+def _write(shard_dir, name, data):
+    (shard_dir / f"{name}.json").write_text(json.dumps(data))
+
+
+def _live_pid() -> str:
+    return str(os.getppid())
+
+
+def test_shards_are_written_with_their_format(shard_dir):
+    analytics_tracker._write_shard("1", _shard().to_dict())
+    assert json.loads((shard_dir / "1.json").read_text())["format"] == SHARD_FORMAT
+    assert analytics_tracker._read_shard("1").conversations == 1
+
+    unversioned = _shard().to_dict()
+    del unversioned["format"]
+    _write(shard_dir, "2", unversioned)
+    assert analytics_tracker._read_shard("2") is None
+
+
+def test_skips_unknown_and_malformed_shards(shard_dir):
+    _write(shard_dir, _live_pid(), {**_shard(conversations=5).to_dict(), "format": SHARD_FORMAT + 1})
+    _write(shard_dir, "retired", {"format": SHARD_FORMAT, "conversations": 2})
+    (shard_dir / "999999999.json").write_text("{not json")
+    own = analytics_tracker._process_totals().conversations
+
+    metrics = analytics_tracker.aggregate()
+    assert metrics["total_conversations"] == own
+    # The exited process's file can never be read, so it is dropped
+    assert not (shard_dir / "999999999.json").exists()
+    assert (shard_dir / f"{_live_pid()}.json").exists()
+
+
+def test_folds_exited_processes_into_the_retired_shard(shard_dir):
+    _write(shard_dir, "999999998", _shard(conversations=2).to_dict())
+    _write(shard_dir, "999999999", _shard(conversations=3, service="SVC002").to_dict())
+    own = analytics_tracker._process_totals().conversations
+
+    metrics = analytics_tracker.aggregate()
+    assert metrics["total_conversations"] == own + 5
+    assert sorted(os.listdir(shard_dir)) == ["retired.json"]
+    assert analytics_tracker._read_shard("retired").conversations == 5
+
+
+def test_flusher_survives_a_failed_aggregation(shard_dir, monkeypatch):
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise RuntimeError("dictionary changed size during iteration")
+
+    monkeypatch.setattr(analytics_tracker, "aggregate", failing)
+    stop = threading.Event()
+    thread = threading.Thread(target=analytics_tracker._flush_loop, args=(True, 0.01, stop), daemon=True)
+    thread.start()
+    for _ in range(200):
+        if len(calls) >= 3:
+            break
+        stop.wait(0.01)
+    alive = thread.is_alive()
+    stop.set()
+    thread.join(1)
+    assert len(calls) >= 3 and alive
@@ -0,0 +1,90 @@
+"""Room bookkeeping for multi-session bot hosts"""
+import asyncio
+import json
+import os
+
+import server
+from bot_hosts import BotHostSupervisor
+
+
+class FakeProc:
+    def __init__(self, pid):
+        self.pid = pid
+
+    def poll(self):
+        return None
+
+
+class FakeWriter:
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    def write(self, data):
+        self.sent.append(data)
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def is_closing(self):
+        return self.closed
+
+
+def _lines(*events):
+    return b"".join(json.dumps(event).encode() + b"\n" for event in events)
+
+
+def test_rooms_are_tracked_per_room_and_dropped_when_they_end():
+    async def run():
+        ended = []
+        supervisor = BotHostSupervisor("bot-gemini", cwd=".", num_hosts=1, on_ended=ended.append)
+        proc = FakeProc(4242)
+        supervisor._starting[proc.pid] = proc
+        reader = asyncio.StreamReader()
+        reader.feed_data(_lines({"event": "ready", "pid": proc.pid}))
+        host_task = asyncio.create_task(supervisor._handle_host(reader, FakeWriter()))
+        await asyncio.sleep(0)
+
+        # Both rooms go to the one host process
+        assert await supervisor.acquire("room-a", "t") is proc
+        assert await supervisor.acquire("room-b", "t") is proc
+        assert supervisor.size == 2
+
+        reader.feed_data(_lines({"event": "ended", "room_url": "room-a"}))
+        await asyncio.sleep(0)
+        assert ended == ["room-a"]
+        assert supervisor.size == 1
+
+        # The host exits with room-b still running
+        reader.feed_eof()
+        await host_task
+        assert ended == ["room-a", "room-b"]
+        os.rmdir(supervisor._ipc_dir)
+
+    asyncio.run(run())
+
+
+def test_server_keys_bots_by_room(monkeypatch):
+    monkeypatch.setattr(server, "bot_procs", {})
+    host = FakeProc(4242)
+
+    class Supervisor:
+        async def acquire(self, room_url, token):
+            return host
+
+    monkeypatch.setitem(server.bot_pools, "bots", Supervisor())
+
+    async def run():
+        await server.start_bot("room-a", "t")
+        await server.start_bot("room-b", "t")
+
+    asyncio.run(run())
+    assert server.bot_procs == {"room-a": [host], "room-b": [host]}
+    assert json.loads(server.get_status(4242).body)["rooms"] == ["room-a", "room-b"]
+
+    server.room_ended("room-a")
+    server.room_ended("room-b")
+    assert server.bot_procs == {}
@@ -0,0 +1,42 @@
+"""Playback tracking of assistant items in CallContext"""
+from call_context import CallContext
+
+
+def _speaking_call(sent_ms=400) -> CallContext:
+    call = CallContext(twilio_ws=None)
+    call.start_response("item1")
+    call.audio_sent_ms = sent_ms
+    return call
+
+
+def test_item_released_once_done_and_played():
+    call = _speaking_call()
+    call.finish_response()
+    assert call.response_item_id == "item1"  # Twilio is still playing it
+
+    call.mark_played("item1", 200)
+    assert call.response_item_id == "item1"
+    call.mark_played("item1", 400)
+    assert call.response_item_id is None
+
+
+def test_item_released_when_playback_already_caught_up():
+    call = _speaking_call()
+    call.mark_played("item1", 400)
+    call.finish_response()
+    assert call.response_item_id is None
+
+
+def test_item_kept_while_audio_is_queued():
+    call = _speaking_call()
+    call.outbound.put("AAAA")
+    call.mark_played("item1", 400)
+    call.finish_response()
+    assert call.response_item_id == "item1"
+
+
+def test_marks_for_other_items_are_ignored():
+    call = _speaking_call()
+    call.finish_response()
+    call.mark_played("item0", 400)
+    assert call.response_item_id == "item1"
@@ -0,0 +1,119 @@
+"""Campaign dialing and bookkeeping"""
+import asyncio
+import time
+
+import campaign as campaigns
+from campaign import CAMPAIGN_CALLS, CAMPAIGNS, FAILED, INITIATED, Campaign
+
+
+class FlakyDialer:
+    """Raises something other than the errors _dial expects for some numbers."""
+
+    def __init__(self, failing):
+        self.failing = set(failing)
+
+    async def create_call(self, to, twiml, status_callback=None):
+        if to in self.failing:
+            raise ValueError("Expecting value: line 1 column 1 (char 0)")
+        return f"CA{to}"
+
+
+def test_unexpected_dial_errors_do_not_stall_the_campaign():
+    numbers = ["+15550000001", "+15550000002", "+15550000003"]
+    campaign = Campaign(numbers, FlakyDialer(numbers[:2]), "<Response/>", concurrency=2,
+                        calls_per_second=1000, max_attempts=2, backoff_seconds=0.01)
+
+    asyncio.run(asyncio.wait_for(campaign.run(), timeout=5))
+
+    statuses = [call.status for call in campaign.calls]
+    assert statuses == [FAILED, FAILED, INITIATED]
+    assert campaign.calls[0].attempts == 2
+    assert "ValueError" in campaign.calls[0].error
+    CAMPAIGN_CALLS.clear()
+
+
+def _finished(age: float, sid: str) -> Campaign:
+    campaign = Campaign(["+15550000001"], None, "<Response/>")
+    campaign.finished_at = time.monotonic() - age
+    campaign.calls[0].call_sid = sid
+    CAMPAIGNS[campaign.campaign_id] = campaign
+    CAMPAIGN_CALLS[sid] = campaign.calls[0]
+    return campaign
+
+
+def test_finished_campaigns_are_evicted_after_ttl(monkeypatch):
+    monkeypatch.setattr(campaigns, "CAMPAIGN_TTL", 60)
+    old = _finished(120, "CAold")
+    recent = _finished(10, "CArecent")
+    running = Campaign(["+15550000002"], None, "<Response/>")
+    CAMPAIGNS[running.campaign_id] = running
+
+    Campaign.evict_finished()
+
+    assert set(CAMPAIGNS) == {recent.campaign_id, running.campaign_id}
+    assert set(CAMPAIGN_CALLS) == {"CArecent"}
+    assert old.campaign_id not in CAMPAIGNS
+    CAMPAIGNS.clear()
+    CAMPAIGN_CALLS.clear()
+
+
+def test_finished_campaigns_are_capped(monkeypatch):
+    monkeypatch.setattr(campaigns, "CAMPAIGN_MAX", 2)
+    kept = [_finished(age, f"CA{age}") for age in (30, 20, 10)][1:]
+
+    Campaign.evict_finished()
+
+    assert set(CAMPAIGNS) == {campaign.campaign_id for campaign in kept}
+    CAMPAIGNS.clear()
+    CAMPAIGN_CALLS.clear()
+
+
+class CountingDialer:
+    def __init__(self):
+        self.dialed = []
+
+    async def create_call(self, to, twiml, status_callback=None):
+        self.dialed.append(to)
+        return f"CA{to}"
+
+
+def test_calls_hold_their_slot_until_twilio_reports_the_end():
+    numbers = [f"+1555000000{i}" for i in range(4)]
+    dialer = CountingDialer()
+    campaign = Campaign(numbers, dialer, "<Response/>", concurrency=2, calls_per_second=1000,
+                        status_callback="https://example.test/campaigns/status-callback")
+
+    async def run():
+        task = asyncio.create_task(campaign.run())
+        await asyncio.sleep(0.05)
+        assert len(dialer.dialed) == 2  # both slots held by live calls
+
+        Campaign.record_status(f"CA{numbers[0]}", "in-progress")
+        await asyncio.sleep(0.05)
+        assert len(dialer.dialed) == 2  # not over yet
+
+        Campaign.record_status(f"CA{numbers[0]}", "completed")
+        await asyncio.sleep(0.05)
+        assert len(dialer.dialed) == 3
+
+        for to in numbers[1:3]:
+            Campaign.record_status(f"CA{to}", "no-answer")
+        await asyncio.sleep(0.05)
+        assert len(dialer.dialed) == 4
+        Campaign.record_status(f"CA{numbers[3]}", "no-answer")
+        await asyncio.wait_for(task, timeout=1)
+
+    asyncio.run(run())
+    assert [call.outcome for call in campaign.calls] == ["completed"] + ["no-answer"] * 3
+    CAMPAIGN_CALLS.clear()
+
+
+def test_a_call_without_a_final_status_frees_its_slot_after_the_timeout(monkeypatch):
+    monkeypatch.setattr(campaigns, "CAMPAIGN_CALL_TIMEOUT", 0.05)
+    campaign = Campaign(["+15550000001", "+15550000002"], CountingDialer(), "<Response/>", concurrency=1,
+                        calls_per_second=1000, status_callback="https://example.test/campaigns/status-callback")
+
+    asyncio.run(asyncio.wait_for(campaign.run(), timeout=1))
+
+    assert [call.status for call in campaign.calls] == [INITIATED, INITIATED]
+    CAMPAIGN_CALLS.clear()
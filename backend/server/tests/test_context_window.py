@@ -0,0 +1,67 @@
+"""Token-budgeted context window for the Gemini bot"""
+import asyncio
+import json
+
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from context_window import MEMO_HEADER, SAME_RESULT, ContextWindowManager, estimate_tokens
+
+
+def _fit(messages, **kwargs):
+    """Run fit() after each message is added, as the pipeline does; returns the manager and context."""
+
+    async def run():
+        context = OpenAILLMContext([])
+        manager = ContextWindowManager(context, **kwargs)
+        for message in messages:
+            context.add_message(message)
+            manager.fit()
+        return manager, context
+
+    return asyncio.run(run())
+
+
+def _tool_call(name, arguments, result):
+    return [
+        {"role": "assistant", "tool_calls": [{"id": name, "type": "function",
+                                              "function": {"name": name, "arguments": json.dumps(arguments)}}]},
+        {"role": "tool", "tool_call_id": name, "content": json.dumps(result)},
+    ]
+
+
+def test_short_history_keeps_its_only_tool_result():
+    messages = [{"role": "user", "content": "hello"}]
+    messages += _tool_call("check_service_availability", {"service_id": "SVC001"}, "open")
+    messages.append({"role": "assistant", "content": "It is open."})
+    messages += [{"role": "user", "content": f"question {turn}"} for turn in range(5)]
+
+    _, context = _fit(messages)
+    results = [message["content"] for message in context.messages if message.get("role") == "tool"]
+    assert results == [json.dumps("open")]
+
+
+def test_repeated_tool_results_are_sent_once():
+    messages = []
+    for turn in range(4):
+        messages.append({"role": "user", "content": f"question {turn}"})
+        messages += _tool_call("search_services", {"query": "housing"}, {"services": ["SVC003"]})
+    messages += [{"role": "user", "content": f"more {turn}"} for turn in range(6)]
+
+    _, context = _fit(messages, keep_messages=6)
+    results = [message["content"] for message in context.messages if message.get("role") == "tool"]
+    assert results == [SAME_RESULT] * 3 + [json.dumps({"services": ["SVC003"]})]
+
+
+def test_history_is_kept_under_budget_with_a_memo():
+    system = {"role": "system", "content": "You are DialMate."}
+    messages = [system]
+    for turn in range(60):
+        messages.append({"role": "user", "content": f"Question {turn} " * 40})
+        messages.append({"role": "assistant", "content": f"Answer {turn} " * 40})
+
+    manager, context = _fit(messages, max_tokens=3000, keep_messages=4)
+    assert sum(estimate_tokens(message) for message in context.messages) <= 3000
+    assert context.messages[0] is system
+    assert context.messages[1]["content"].startswith(MEMO_HEADER)
+    assert context.messages[-1]["content"] == "Answer 59 " * 40
+    assert manager.evicted > 0
@@ -0,0 +1,21 @@
+"""Bounded conversation history"""
+from conversation_history import ConversationHistory
+
+
+def test_ring_buffer_rolls_old_turns_into_the_summary():
+    history = ConversationHistory(max_turns=3)
+    for turn in range(5):
+        history.append("user", f"turn {turn}", ts_ms=turn)
+    assert [turn.message for turn in history] == ["turn 2", "turn 3", "turn 4"]
+    assert history.rolled_up == 2
+    assert history.summary == "user: turn 0 user: turn 1"
+
+
+def test_round_trips_through_to_dict():
+    history = ConversationHistory(max_turns=3)
+    for turn in range(4):
+        history.append("assistant", f"turn {turn}", ts_ms=turn)
+    restored = ConversationHistory.from_dict(history.to_dict(), max_turns=3)
+    assert [turn.to_dict() for turn in restored] == [turn.to_dict() for turn in history]
+    assert (restored.summary, restored.rolled_up) == (history.summary, history.rolled_up)
+
@@ -0,0 +1,75 @@
+"""Parsing and compiling benefit eligibility rules"""
+import numpy as np
+import pytest
+
+from eligibility_engine import CitizenColumns
+from eligibility_rules import Rule, RuleError
+
+CITIZENS = {
+    "CIT001": {"income": 250000, "age": 35, "benefits_points": 1200, "channel": "phone",
+               "benefits_tier": "Gold", "service_history": ["SVC001", "SVC009"]},
+    "CIT002": {"income": 720000, "age": 64, "benefits_points": 0, "channel": "web",
+               "benefits_tier": "Bronze", "service_history": []},
+    "CIT003": {"income": 90000, "age": 19, "benefits_points": 300, "channel": "kiosk",
+               "benefits_tier": "Platinum", "service_history": ["SVC006"]},
+}
+
+
+@pytest.mark.parametrize("source", [
+    "income <= 400000",
+    "age between 18 and 25 and channel in (web, whatsapp)",
+    "benefits_tier in (Gold, Platinum) or service_history has SVC006",
+    "not (income > 800000) and service_history has any (SVC001, SVC009)",
+    "channel != 'kiosk' and not age < 21",
+])
+def test_predicate_mask_and_explain_agree(source):
+    rule = Rule(source)
+    columns = CitizenColumns.from_records(CITIZENS)
+    expected = [rule(citizen) for citizen in CITIZENS.values()]
+
+    assert rule.mask(columns).tolist() == expected
+    assert [rule.explain(citizen)[0] for citizen in CITIZENS.values()] == expected
+
+
+def test_rules_select_the_right_citizens():
+    columns = CitizenColumns.from_records(CITIZENS)
+    mask = Rule("income <= 300000 and benefits_tier in (Gold, Platinum)").mask(columns)
+    assert np.flatnonzero(mask).tolist() == [0, 2]
+
+
+@pytest.mark.parametrize("source", [
+    "age in (35, 42)",  # in is for categorical fields
+    "channel between 0 and 1",  # between is for numeric fields
+    "channel > web",  # categorical fields only support == and !=
+    "income == high",  # numeric fields compare against numbers
+    "channel in (1, 2)",  # categorical fields hold names
+    "age has SVC001",  # has is for service_history
+    "service_history has any (1, 2)",
+    "height > 170",  # unknown field
+    "income <= 400000 and",  # incomplete
+])
+def test_type_errors_are_rejected_at_load(source):
+    with pytest.raises(RuleError):
+        Rule(source)
+
+
+@pytest.mark.parametrize("source", [
+    "income <= 400000",
+    "age between 18 and 25",
+    "channel in (web, phone)",
+    "service_history has SVC001",
+])
+def test_explain_reads_missing_fields_as_the_predicate_does(source):
+    rule = Rule(source)
+    passed, conditions = rule.explain({})
+    assert passed == rule({})
+    assert len(conditions) == 1
+
+
+def test_engine_explains_every_benefit_for_a_sparse_citizen():
+    from eligibility_engine import get_engine
+    from mock_data import BENEFITS
+
+    engine = get_engine()
+    for benefit_id in BENEFITS:
+        assert engine.explain({"channel": "web"}, benefit_id)
@@ -0,0 +1,77 @@
+"""Space-Saving sketches and the windowed top-k built on them"""
+import random
+from collections import Counter
+
+from heavy_hitters import ServiceViews, SpaceSaving, WindowedTopK
+
+
+def test_space_saving_is_exact_under_capacity():
+    sketch = SpaceSaving(capacity=10)
+    for key in "aababcabcd":
+        sketch.add(key)
+    assert sketch.top(4) == [("a", 4), ("b", 3), ("c", 2), ("d", 1)]
+    assert set(sketch.errors.values()) == {0}
+
+
+def test_space_saving_keeps_heavy_hitters_in_fixed_memory():
+    rng = random.Random(20)
+    stream = ["hot1"] * 3000 + ["hot2"] * 2000 + [f"cold{rng.randrange(5000)}" for _ in range(5000)]
+    rng.shuffle(stream)
+    sketch = SpaceSaving(capacity=50)
+    for key in stream:
+        sketch.add(key)
+    assert len(sketch) == 50
+    assert [key for key, _ in sketch.top(2)] == ["hot1", "hot2"]
+    exact = Counter(stream)
+    for key, count in sketch.counts.items():
+        # Counts never undercount, and overcount by at most the recorded error
+        assert exact[key] <= count <= exact[key] + sketch.errors[key]
+
+
+def test_windowed_top_k_forgets_expired_intervals():
+    window = WindowedTopK(window=60, intervals=6)
+    window.add("old", 5, now=0)
+    window.add("new", 2, now=55)
+    assert window.top(2, now=55) == [("old", 5), ("new", 2)]
+    assert window.top(2, now=65) == [("new", 2)]
+    window.add("new", 1, now=66)
+    assert window.top(2, now=66) == [("new", 3)]
+
+
+def test_service_views_merge_adds_up_windows_and_all_time():
+    now = 1_700_000_000
+    first, second = ServiceViews(), ServiceViews()
+    for _ in range(3):
+        first.add("SVC001", now=now)
+    second.add("SVC001", now=now)
+    second.add("SVC002", now=now - 7200)  # outside the hour, inside the day
+
+    merged = ServiceViews()
+    merged.merge(first.to_dict())
+    merged.merge(second.to_dict())
+    top = merged.top(5, now=now)
+    assert top["all_time"] == [("SVC001", 4), ("SVC002", 1)]
+    assert top["hour"] == [("SVC001", 4)]
+    assert top["day"] == [("SVC001", 4), ("SVC002", 1)]
+
+
+def test_service_views_can_be_snapshot_while_another_thread_adds():
+    import threading
+
+    views = ServiceViews()
+    stop = threading.Event()
+
+    def track():
+        now = 1_700_000_000
+        while not stop.is_set():
+            now += 300  # a new hour interval every view, so the sketch dicts keep changing size
+            views.add(f"SVC{now % 97:03d}", now=now)
+
+    thread = threading.Thread(target=track, daemon=True)
+    thread.start()
+    try:
+        for _ in range(2000):
+            views.to_dict()
+    finally:
+        stop.set()
+        thread.join(1)
@@ -0,0 +1,102 @@
+"""RealtimeConnectionPool against a local fake realtime server"""
+import asyncio
+import json
+
+import websockets
+
+from realtime_pool import RealtimeConnectionPool
+
+
+class FakeRealtimeServer:
+    """Answers session.update with session.updated, like the OpenAI realtime API."""
+
+    def __init__(self):
+        self.connections = []
+        self.server = None
+
+    async def _handle(self, ws, path=None):
+        self.connections.append(ws)
+        async for message in ws:
+            if json.loads(message)["type"] == "session.update":
+                await ws.send(json.dumps({"type": "session.updated"}))
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        port = self.server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+
+async def _until(condition, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _run(scenario, **pool_args):
+    async def main():
+        async with FakeRealtimeServer() as server:
+            pool = RealtimeConnectionPool(server.url, {}, {"type": "session.update"}, **pool_args)
+            await pool.start()
+            try:
+                await scenario(server, pool)
+            finally:
+                await pool.stop()
+
+    asyncio.run(main())
+
+
+def test_acquire_returns_warm_connection():
+    async def scenario(server, pool):
+        await _until(lambda: pool.idle_count == 2)
+        ws = await pool.acquire()
+        assert ws.open
+        assert len(server.connections) == 2  # handed out a warm one, nothing opened inline
+        await ws.close()
+
+    _run(scenario, size=2)
+
+
+def test_refills_after_acquire():
+    async def scenario(server, pool):
+        await _until(lambda: pool.idle_count == 2)
+        ws = await pool.acquire()
+        await _until(lambda: pool.idle_count == 2)
+        assert len(server.connections) == 3
+        await ws.close()
+
+    _run(scenario, size=2)
+
+
+def test_evicts_connections_past_ttl():
+    async def scenario(server, pool):
+        await _until(lambda: pool.idle_count == 1)
+        first = server.connections[0]
+        await _until(lambda: len(server.connections) >= 2 and pool.idle_count == 1)
+        await _until(lambda: first.closed)
+        ws = await pool.acquire()
+        assert ws.open
+        await ws.close()
+
+    _run(scenario, size=1, ttl=0.2)
+
+
+def test_replaces_dead_connection():
+    async def scenario(server, pool):
+        await _until(lambda: pool.idle_count == 1)
+        await server.connections[0].close()
+        ws = await pool.acquire()
+        assert ws.open  # the dead one was skipped and replaced
+        assert not server.connections[0].open
+        await ws.close()
+        await _until(lambda: pool.idle_count == 1)
+
+    _run(scenario, size=1)
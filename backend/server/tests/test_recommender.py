@@ -0,0 +1,44 @@
+"""Co-occurrence counts and recommendations"""
+from recommender import CoOccurrenceRecommender
+from records import Application, ServiceRequest
+
+CITIZENS = {
+    "CIT001": {"service_history": ["SVC001", "SVC002"]},
+    "CIT002": {"service_history": ["SVC001", "SVC003"]},
+    "CIT003": {"service_history": []},
+}
+REQUESTS = {
+    # Two new services at once: the SVC004-SVC005 pair must count once
+    "REQ001": ServiceRequest("CIT001", [Application("SVC004"), Application("SVC005")]),
+    "REQ002": ServiceRequest("CIT002", [Application("SVC001"), Application("SVC004")]),
+    "REQ003": ServiceRequest("CIT003", [Application("SVC002"), Application("SVC004"), Application("SVC005")]),
+}
+
+
+def test_live_recording_matches_build():
+    built = CoOccurrenceRecommender.build(CITIZENS, REQUESTS)
+
+    live = CoOccurrenceRecommender.build(CITIZENS, {})
+    for request in REQUESTS.values():
+        live.record_request(CITIZENS[request.citizen_id]["service_history"],
+                            [item.service_id for item in request.applications])
+
+    assert {service: dict(counts) for service, counts in live.pairs.items()} == \
+           {service: dict(counts) for service, counts in built.pairs.items()}
+    assert live.popularity == built.popularity
+    assert built.pairs["SVC004"]["SVC005"] == 2  # REQ001 and REQ003
+    for service_id, companions in built.pairs.items():
+        assert [live.pairs[service_id][companion] for companion in live.top[service_id]] == \
+               [count for _, count in companions.most_common(built.k)]
+
+
+def test_recommends_companions_not_already_used():
+    recommender = CoOccurrenceRecommender.build(CITIZENS, REQUESTS)
+    recommended = recommender.recommend(["SVC004"], k=2)
+    assert len(recommended) == 2
+    assert set(recommended) <= {"SVC001", "SVC002", "SVC005"}  # each used with SVC004 twice
+
+
+def test_falls_back_to_popular_services():
+    recommender = CoOccurrenceRecommender.build(CITIZENS, REQUESTS)
+    assert len(recommender.recommend([], k=3)) == 3
@@ -0,0 +1,27 @@
+"""Catalog index search"""
+from service_catalog import CatalogIndex
+
+SERVICES = {
+    "SVC001": {"name": "Healthcare Subsidy", "category": "Healthcare", "eligibility": "Low income families"},
+    "SVC002": {"name": "Passport Renewal", "category": "Documents", "eligibility": "Citizens 18+"},
+    "SVC003": {"name": "Kerala Pension Scheme", "category": "Pension", "eligibility": "Citizens 60+"},
+    "SVC004": {"name": "Kerala Housing Grant", "category": "Housing", "eligibility": "Low income families"},
+}
+
+
+def test_query_words_match_words_and_their_prefixes():
+    index = CatalogIndex(SERVICES)
+    assert index.search("pass") == (1, ["SVC002"])
+    assert index.search("kerala pension") == (1, ["SVC003"])
+    assert index.search("kerala", eligibility="low income") == (1, ["SVC004"])
+
+
+def test_names_are_scanned_for_a_substring_when_no_word_matches():
+    index = CatalogIndex(SERVICES)
+    assert index.search("care") == (1, ["SVC001"])
+    assert index.search("care", category="housing") == (0, [])
+    assert index.search("xyzzy") == (0, [])
+
+
+def test_no_arguments_return_the_catalog_in_order():
+    assert CatalogIndex(SERVICES).search(k=2) == (4, ["SVC001", "SVC002"])
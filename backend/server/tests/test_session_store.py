@@ -0,0 +1,119 @@
+"""Session stores and SessionManager persistence"""
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from records import SESSION_FORMAT, Application, Session
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _new_counter():
+    return {"count": 0}
+
+
+def _increment(session):
+    session["count"] += 1
+
+
+def _increment_many(path, times):
+    store = SQLiteSessionStore(path)
+    for _ in range(times):
+        store.update("shared", _increment, _new_counter)
+    store.close()
+
+
+def test_concurrent_updates_from_processes_are_not_lost(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SQLiteSessionStore(path).close()  # create the schema once, up front
+    workers = [multiprocessing.Process(target=_increment_many, args=(path, 200)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    store = SQLiteSessionStore(path)
+    assert store.get("shared") == {"count": 800}
+    store.close()
+
+
+def test_failed_update_leaves_session_unchanged(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    store.put("s1", {"count": 1})
+
+    def fail(session):
+        session["count"] = 99
+        raise RuntimeError("boom")
+
+    try:
+        store.update("s1", fail, _new_counter)
+    except RuntimeError:
+        pass
+    assert store.get("s1") == {"count": 1}
+    store.update("s1", _increment, _new_counter)  # the transaction was released
+    assert store.get("s1") == {"count": 2}
+    store.close()
+
+
+def test_memory_store_update_creates_and_mutates():
+    store = MemorySessionStore(max_size=2)
+    store.update("s1", _increment, _new_counter)
+    store.update("s1", _increment, _new_counter)
+    assert store.get("s1") == {"count": 2}
+
+
+def test_importing_session_manager_opens_no_store(tmp_path):
+    path = tmp_path / "sessions.db"
+    env = dict(os.environ, SESSION_STORE="sqlite", SESSION_DB=str(path))
+    subprocess.run([sys.executable, "-c", "import session_manager"], cwd=SERVER_DIR, env=env, check=True)
+    assert not path.exists()
+    assert not os.path.exists(os.path.join(SERVER_DIR, "sessions.db"))
+
+
+def test_session_manager_round_trip(tmp_path):
+    path = tmp_path / "sessions.db"
+    env = dict(os.environ, SESSION_STORE="sqlite", SESSION_DB=str(path))
+    script = (
+        "from session_manager import SessionManager\n"
+        "SessionManager.switch_channel('s1', 'phone')\n"
+        "SessionManager.add_conversation('s1', 'user', 'hello')\n"
+        "session = SessionManager.get_session('s1')\n"
+        "assert session.channel == 'phone', session.channel\n"
+        "assert [turn.message for turn in session.conversation_history][-1] == 'hello'\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=SERVER_DIR, env=env, check=True)
+    assert path.exists()
+
+
+def _session_store(tmp_path):
+    return SQLiteSessionStore(str(tmp_path / "sessions.db"), encode=Session.to_bytes, decode=Session.from_bytes)
+
+
+def _write_raw(store, session_id, data):
+    store._db.execute("INSERT INTO sessions VALUES (?, ?, ?)", (session_id, data, time.time() + 60))
+
+
+def test_sessions_are_stored_with_a_format_byte(tmp_path):
+    store = _session_store(tmp_path)
+    session = Session("s1", channel="phone", applications=[Application("SVC001")])
+    session.conversation_history.append("user", "hello")
+    store.put("s1", session)
+    raw = store._db.execute("SELECT data FROM sessions").fetchone()[0]
+    assert raw[0] == SESSION_FORMAT
+    assert store.get("s1").to_list() == session.to_list()
+    store.close()
+
+
+def test_undecodable_sessions_read_as_missing_and_are_dropped(tmp_path):
+    store = _session_store(tmp_path)
+    _write_raw(store, "bad", b"\x7fnot a session")
+    _write_raw(store, "truncated", Session("truncated").to_bytes()[:5])
+    assert store.get("bad") is None
+    assert len(store) == 1
+    created = store.update("truncated", lambda session: None, lambda: Session("truncated", channel="phone"))
+    assert created.channel == "phone"
+    assert store.get("truncated").channel == "phone"
+    store.close()
@@ -0,0 +1,31 @@
+"""Startup phase timing"""
+import time
+
+from startup_profile import StartupProfile
+
+
+def test_skipped_time_is_left_out_of_the_breakdown():
+    profile = StartupProfile()
+    profile.mark("imports")
+    time.sleep(0.05)
+    profile.skip()
+    profile.mark("join room")
+    report = profile.report()
+    assert profile.idle >= 0.05
+    assert "waiting for a room" in report
+    assert [name for name, _, _ in profile.phases] == ["imports", "join room"]
+    assert profile.phases[-1][1] < 0.05
+
+
+def test_nothing_is_recorded_after_finishing():
+    profile = StartupProfile()
+    profile.mark("imports")
+    report = profile.finish()
+    assert "imports" in report
+    for _ in range(3):  # later sessions of a multi-session host
+        profile.mark("set up transport, model and pipeline")
+        with profile.background("load VAD"):
+            pass
+        profile.skip()
+    assert profile.phases == []
+    assert profile.finish() == ""
@@ -0,0 +1,37 @@
+"""Tool schemas declared with @tool and the handlers behind them"""
+import asyncio
+import importlib
+import inspect
+import re
+
+import tool_registry
+from tool_registry import TOOL_DECLARATIONS, TOOL_HANDLERS
+
+for module in tool_registry.TOOL_MODULES:
+    importlib.import_module(module)
+
+
+def _call(name, **arguments):
+    results = []
+
+    async def result_callback(result):
+        results.append(result)
+
+    asyncio.run(TOOL_HANDLERS[name](name, "call-1", arguments, None, None, result_callback))
+    return results[-1]
+
+
+def test_every_declared_parameter_is_read_by_its_handler():
+    unread = []
+    for name, declaration in TOOL_DECLARATIONS.items():
+        source = inspect.getsource(TOOL_HANDLERS[name])
+        read = set(re.findall(r"arguments(?:\.get\(|\[)\"(\w+)\"", source))
+        unread += [f"{name}.{parameter}" for parameter in declaration["parameters"]["properties"] if parameter not in read]
+    assert unread == []
+
+
+def test_notify_when_available_uses_the_contacts_given():
+    service_id = next(iter(importlib.import_module("mock_data").SERVICES))
+    assert "email at a@example.com and SMS at +911234" in _call(
+        "notify_when_available", service_id=service_id, email="a@example.com", phone="+911234")
+    assert "Which email address or phone number" in _call("notify_when_available", service_id=service_id)
@@ -0,0 +1,49 @@
+"""Tool-call tracing"""
+import asyncio
+import json
+import threading
+
+import tool_tracing
+
+
+def test_spans_are_written_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(tool_tracing, "TOOL_TRACE_FILE", str(path))
+    writers = []
+    write = tool_tracing.os.write
+
+    def recording_write(fd, data):
+        writers.append(threading.current_thread().name)
+        return write(fd, data)
+
+    monkeypatch.setattr(tool_tracing.os, "write", recording_write)
+
+    async def lookup(name, tool_call_id, arguments, llm, context, result_callback):
+        await result_callback({"status": "active"})
+
+    async def failing(name, tool_call_id, arguments, llm, context, result_callback):
+        raise ValueError("no such service")
+
+    async def run():
+        results = []
+
+        async def result_callback(result):
+            results.append(result)
+
+        for call in range(3):
+            await tool_tracing.traced("lookup", lookup)("lookup", f"call-{call}", {"id": call}, None, None, result_callback)
+        try:
+            await tool_tracing.traced("failing", failing)("failing", "call-x", {}, None, None, result_callback)
+        except ValueError:
+            pass
+        return results
+
+    assert asyncio.run(run()) == [{"status": "active"}] * 3
+    loop_thread = threading.current_thread().name
+    tool_tracing._stop_writer()
+
+    requests = [json.loads(line) for line in path.read_text().splitlines()]
+    spans = [request["resourceSpans"][0]["scopeSpans"][0]["spans"][0] for request in requests]
+    assert [span["name"] for span in spans] == ["tool lookup"] * 3 + ["tool failing"]
+    assert spans[-1]["status"]["code"] == tool_tracing.STATUS_ERROR
+    assert writers and loop_thread not in writers
@@ -0,0 +1,75 @@
+"""TwilioDialer against a local fake Calls endpoint"""
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from twilio_dialer import TwilioCallError, TwilioDialer
+
+
+def _run(handler, scenario):
+    async def main():
+        app = web.Application()
+        app.router.add_post("/2010-04-01/Accounts/{sid}/Calls.json", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        dialer = TwilioDialer("ACtest", "token", "+15550000000", api_base=f"http://127.0.0.1:{port}")
+        await dialer.start()
+        try:
+            return await scenario(dialer)
+        finally:
+            await dialer.close()
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+async def _created(request):
+    return web.json_response({"sid": "CA123"}, status=201)
+
+
+async def _bad_gateway(request):
+    return web.Response(text="<html><body>502 Bad Gateway</body></html>", status=502, content_type="text/html")
+
+
+async def _bad_request(request):
+    return web.json_response({"message": "Invalid 'To' number"}, status=400)
+
+
+def test_create_call_returns_sid():
+    assert _run(_created, lambda dialer: dialer.create_call("+15551230000", "<Response/>")) == "CA123"
+
+
+def test_html_error_body_is_a_retryable_call_error():
+    with pytest.raises(TwilioCallError) as error:
+        _run(_bad_gateway, lambda dialer: dialer.create_call("+15551230000", "<Response/>"))
+    assert error.value.status == 502
+    assert error.value.retryable
+
+
+def test_twilio_rejection_is_not_retryable():
+    with pytest.raises(TwilioCallError) as error:
+        _run(_bad_request, lambda dialer: dialer.create_call("+15551230000", "<Response/>"))
+    assert "Invalid 'To' number" in str(error.value)
+    assert not error.value.retryable
+
+
+def test_create_calls_reports_each_failure():
+    results = _run(_bad_gateway, lambda dialer: dialer.create_calls(["+15551230000", "+15551230001"], "<Response/>", 100))
+    assert [result["to"] for result in results] == ["+15551230000", "+15551230001"]
+    assert all("502" in result["error"] for result in results)
+
+
+def test_make_calls_refuses_batches_that_would_hold_the_request_open():
+    import server
+    from fastapi import HTTPException
+
+    request = server.BulkCallRequest(to_phone_numbers=[f"+1555000{i:04d}" for i in range(100)], calls_per_second=1)
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(server.make_calls(request))
+    assert excinfo.value.status_code == 413
+    assert "/campaigns" in excinfo.value.detail
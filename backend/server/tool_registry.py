@@ -0,0 +1,102 @@
+"""Declarative Tool Registry for LLM Function Calling
+
+Each handler declares its own schema with @tool, next to its code:
+
+    @tool("Track request status", required=["request_id"],
+          request_id=("string", "Request ID"))
+    async def track_request(function_name, tool_call_id, arguments, llm, context, result_callback):
+        ...
+
+The function-declaration payload is built from those schemas once per process
+and cached, and register_all() registers every handler on an LLM service in
+one pass. Schemas are checked when the decorator runs, and asking for a tool
+nobody registered fails when the payload is built, not mid-call.
+"""
+import importlib
+import inspect
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Modules whose handlers are exposed to the model
+TOOL_MODULES = ("worker_agents", "edge_case_handlers")
+PARAMETER_TYPES = {"string", "number", "integer", "boolean"}
+HANDLER_ARGS = ["function_name", "tool_call_id", "arguments", "llm", "context", "result_callback"]
+
+TOOL_HANDLERS: Dict[str, Callable] = {}
+TOOL_DECLARATIONS: Dict[str, dict] = {}
+_payloads: Dict[Optional[Tuple[str, ...]], list] = {}  # tool names (None for all) -> cached payload
+
+
+class ToolRegistryError(ValueError):
+    pass
+
+
+def tool(description: str, required: Iterable[str] = (), name: Optional[str] = None,
+         **parameters: Tuple[str, str]):
+    """Register an async handler as an LLM tool.
+
+    Each keyword argument declares a parameter as (JSON type, description).
+    """
+
+    def decorator(handler: Callable) -> Callable:
+        tool_name = name or handler.__name__
+        if tool_name in TOOL_HANDLERS:
+            raise ToolRegistryError(f"Tool {tool_name} is registered twice")
+        if not inspect.iscoroutinefunction(handler):
+            raise ToolRegistryError(f"Tool {tool_name} must be an async function")
+        if list(inspect.signature(handler).parameters) != HANDLER_ARGS:
+            raise ToolRegistryError(f"Tool {tool_name} must take ({', '.join(HANDLER_ARGS)})")
+
+        properties = {}
+        for parameter, (kind, text) in parameters.items():
+            if kind not in PARAMETER_TYPES:
+                raise ToolRegistryError(f"Tool {tool_name}: parameter {parameter} has unknown type {kind}")
+            properties[parameter] = {"type": kind, "description": text}
+        missing = [parameter for parameter in required if parameter not in properties]
+        if missing:
+            raise ToolRegistryError(f"Tool {tool_name}: required parameters {missing} are not declared")
+
+        schema = {"type": "object", "properties": properties}
+        if required:
+            schema["required"] = list(required)
+        TOOL_HANDLERS[tool_name] = handler
+        TOOL_DECLARATIONS[tool_name] = {"name": tool_name, "description": description, "parameters": schema}
+        _payloads.clear()
+        return handler
+
+    return decorator
+
+
+def load():
+    """Import every tool module so their decorators have run."""
+    for module in TOOL_MODULES:
+        importlib.import_module(module)
+
+
+def _select(names: Optional[Iterable[str]]) -> List[str]:
+    load()
+    if names is None:
+        return list(TOOL_HANDLERS)
+    names = list(names)
+    missing = [tool_name for tool_name in names if tool_name not in TOOL_HANDLERS]
+    if missing:
+        raise ToolRegistryError(f"No handler registered for tools: {', '.join(missing)}")
+    return names
+
+
+def build(names: Optional[Iterable[str]] = None) -> list:
+    """The `tools` payload for the model: all tools, or just `names`.
+
+    Built once per selection and shared read-only by every session after.
+    """
+    key = None if names is None else tuple(names)
+    payload = _payloads.get(key)
+    if payload is None:
+        payload = [{"function_declarations": [TOOL_DECLARATIONS[tool_name] for tool_name in _select(key)]}]
+        _payloads[key] = payload
+    return payload
+
+
+def register_all(llm, names: Optional[Iterable[str]] = None):
+    """Register the handler of every tool (or of `names`) on an LLM service."""
+    for tool_name in _select(names):
+        llm.register_function(tool_name, TOOL_HANDLERS[tool_name])
@@ -0,0 +1,196 @@
+"""Tool-Call Tracing for LLM Function Handlers
+
+instrument(llm) makes every later llm.register_function call register a
+traced handler. Each call records its duration (until the result is handed
+back, or the handler returns or raises), the JSON size of its arguments and
+result, and any error:
+- as an OTLP/JSON span appended to TOOL_TRACE_FILE, one export request per
+  line, which the OpenTelemetry collector's otlpjsonfile receiver can ingest.
+  Spans are queued and written by a background thread, so a handler never
+  waits on the file from the bot's event loop;
+- in the /metrics histograms, counters and rolling-quantile summary, which bot
+  processes report to the server like every other metric.
+
+tool_stats() turns those into a per-tool p50/p95/p99 table for /tool-stats.
+"""
+import atexit
+import functools
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from loguru import logger
+
+from media_relay import dumps
+from metrics import TOOL_ARGUMENT_BYTES, TOOL_CALL_DURATION, TOOL_CALL_ERRORS, TOOL_CALL_RECENT, TOOL_RESULT_BYTES
+
+TOOL_TRACE_FILE = os.getenv("TOOL_TRACE_FILE", "tool_spans.jsonl")
+SERVICE_NAME = "dialmate-bot"
+
+# OTLP span kind and status codes
+SPAN_KIND_INTERNAL = 1
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_spans: "queue.SimpleQueue[Optional[dict]]" = queue.SimpleQueue()  # export requests; None stops the writer
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def _size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode())
+    try:
+        return len(dumps(value))
+    except TypeError:
+        return len(str(value).encode())
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool) or not isinstance(value, int):
+        return {"key": key, "value": {"stringValue": str(value)}}
+    return {"key": key, "value": {"intValue": str(value)}}
+
+
+def _write_spans():
+    """Writer thread: append queued export requests to TOOL_TRACE_FILE until told to stop."""
+    fd = None
+    while True:
+        requests = [_spans.get()]
+        while True:
+            try:
+                requests.append(_spans.get_nowait())
+            except queue.Empty:
+                break
+        lines = "".join(json.dumps(request, separators=(",", ":")) + "\n" for request in requests if request is not None)
+        if lines:
+            try:
+                if fd is None:
+                    fd = os.open(TOOL_TRACE_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                # One write of whole lines, so spans from concurrent bot processes never interleave
+                os.write(fd, lines.encode())
+            except OSError as e:
+                logger.warning(f"Could not write tool spans: {e}")
+        if None in requests:
+            if fd is not None:
+                os.close(fd)
+            return
+
+
+def _stop_writer():
+    """Write every queued span and stop the writer thread."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _spans.put(None)
+            _writer.join(timeout=5)
+            _writer = None
+
+
+def _enqueue(request: dict):
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_write_spans, name="tool-spans", daemon=True)
+                _writer.start()
+    _spans.put(request)
+
+
+atexit.register(_stop_writer)
+
+
+def _write_span(name: str, tool_call_id: str, start_ns: int, end_ns: int,
+                attributes: Dict[str, object], error: Optional[BaseException]):
+    span = {
+        "traceId": os.urandom(16).hex(),
+        "spanId": os.urandom(8).hex(),
+        "name": f"tool {name}",
+        "kind": SPAN_KIND_INTERNAL,
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(end_ns),
+        "attributes": [_attribute("tool.name", name), _attribute("tool.call_id", tool_call_id)]
+        + [_attribute(key, value) for key, value in attributes.items()],
+        "status": {"code": STATUS_ERROR, "message": f"{type(error).__name__}: {error}"} if error else {"code": STATUS_OK},
+    }
+    request = {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", SERVICE_NAME), _attribute("process.pid", os.getpid())]},
+            "scopeSpans": [{"scope": {"name": "tool_tracing"}, "spans": [span]}],
+        }]
+    }
+    _enqueue(request)
+
+
+def traced(function_name: str, handler):
+    """Wrap a register_function handler so each call is timed and traced."""
+
+    @functools.wraps(handler)
+    async def wrapper(name, tool_call_id, arguments, llm, context, result_callback):
+        tool = function_name or name
+        start_ns = time.time_ns()
+        started = time.perf_counter()
+        finished = None
+        result_bytes = 0
+
+        async def traced_callback(result):
+            nonlocal finished, result_bytes
+            if finished is None:
+                finished = time.perf_counter()
+                result_bytes = _size(result)
+            await result_callback(result)
+
+        error = None
+        try:
+            await handler(name, tool_call_id, arguments, llm, context, traced_callback)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            duration = (finished or time.perf_counter()) - started
+            argument_bytes = _size(arguments)
+            TOOL_CALL_DURATION.observe(duration, tool)
+            TOOL_CALL_RECENT.observe(duration, tool)
+            TOOL_ARGUMENT_BYTES.observe(argument_bytes, tool)
+            TOOL_RESULT_BYTES.observe(result_bytes, tool)
+            if error is not None:
+                TOOL_CALL_ERRORS.inc(tool)
+            _write_span(tool, tool_call_id, start_ns, start_ns + int(duration * 1e9),
+                        {"tool.argument_bytes": argument_bytes, "tool.result_bytes": result_bytes}, error)
+
+    return wrapper
+
+
+def instrument(llm):
+    """Trace every handler registered on `llm` from now on."""
+    register = llm.register_function
+
+    def register_function(function_name, callback, start_callback=None):
+        register(function_name, traced(function_name, callback), start_callback)
+
+    llm.register_function = register_function
+    return llm
+
+
+def tool_stats() -> Dict[str, dict]:
+    """Per-tool call count, errors, rolling p50/p95/p99 (ms) and mean payload sizes."""
+    table = {}
+    for (tool,), stats in sorted(TOOL_CALL_RECENT.snapshot().items()):
+        arguments, argument_total = TOOL_ARGUMENT_BYTES.totals(tool)
+        results, result_total = TOOL_RESULT_BYTES.totals(tool)
+        table[tool] = {
+            "calls": stats["count"],
+            "errors": int(TOOL_CALL_ERRORS.get(tool)),
+            "p50_ms": round(stats[0.5] * 1000, 2),
+            "p95_ms": round(stats[0.95] * 1000, 2),
+            "p99_ms": round(stats[0.99] * 1000, 2),
+            "mean_ms": round(stats["sum"] / stats["count"] * 1000, 2),
+            "mean_argument_bytes": round(argument_total / arguments) if arguments else 0,
+            "mean_result_bytes": round(result_total / results) if results else 0,
+        }
+    return table
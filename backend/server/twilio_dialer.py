@@ -0,0 +1,108 @@
+"""Non-Blocking Twilio Call Origination
+
+`twilio.rest.Client` is synchronous, so calling it from an async endpoint
+blocks the event loop (and every live media stream on it) for the whole HTTP
+round-trip. TwilioDialer talks to the Calls REST API over a keep-alive aiohttp
+connection pool instead, and can fan a list of numbers out under a
+calls-per-second limit.
+"""
+import asyncio
+import json
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+import aiohttp
+
+TWILIO_API_BASE = os.getenv("TWILIO_API_BASE", "https://api.twilio.com")
+TWILIO_MAX_CONNECTIONS = int(os.getenv("TWILIO_MAX_CONNECTIONS", "20"))
+TWILIO_CALLS_PER_SECOND = float(os.getenv("TWILIO_CALLS_PER_SECOND", "1"))  # Twilio's default account limit
+# Longest a create_calls batch may take at its rate while a request waits on it
+TWILIO_BATCH_MAX_SECONDS = float(os.getenv("TWILIO_BATCH_MAX_SECONDS", "30"))
+
+
+class TwilioCallError(Exception):
+    """Twilio rejected a call request."""
+
+    def __init__(self, status: int, message: str, retryable: Optional[bool] = None):
+        super().__init__(f"Twilio error {status}: {message}")
+        self.status = status
+        # By default: rate limited or a Twilio-side failure, as opposed to a bad request
+        self.retryable = (status == 429 or status >= 500) if retryable is None else retryable
+
+
+@lru_cache(maxsize=8)
+def build_twiml(ngrok_url: str) -> str:
+    """TwiML that bridges an answered call to our /media-stream, built once per host."""
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Say>Connecting you to the AI assistant.</Say>
+    <Connect>
+        <Stream name="arsh" url="wss://{ngrok_url}/media-stream" />
+    </Connect>
+    <Pause length="10" />
+</Response>"""
+
+
+class TwilioDialer:
+    """Async client for creating outbound calls through the Twilio REST API."""
+
+    def __init__(self, account_sid: str, auth_token: str, from_number: str,
+                 api_base: str = TWILIO_API_BASE, max_connections: int = TWILIO_MAX_CONNECTIONS):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self.calls_url = f"{api_base}/2010-04-01/Accounts/{account_sid}/Calls.json"
+        self.max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        """Open the keep-alive connection pool."""
+        self._session = aiohttp.ClientSession(
+            auth=aiohttp.BasicAuth(self.account_sid or "", self.auth_token or ""),
+            connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=15),
+        )
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+
+    async def create_call(self, to: str, twiml: str, status_callback: Optional[str] = None) -> str:
+        """Start a call and return its SID. Raises TwilioCallError if Twilio refuses it."""
+        data = {"To": to, "From": self.from_number, "Twiml": twiml}
+        if status_callback:
+            data["StatusCallback"] = status_callback
+        async with self._session.post(self.calls_url, data=data) as response:
+            text = await response.text()
+            try:
+                body = json.loads(text)
+            except ValueError:
+                body = None
+            if not isinstance(body, dict):
+                # Not Twilio's JSON: an HTML error page from a proxy or load balancer
+                raise TwilioCallError(response.status, text[:200] or "empty response", retryable=response.status >= 500)
+            if response.status >= 400:
+                raise TwilioCallError(response.status, body.get("message", "unknown error"))
+            if "sid" not in body:
+                raise TwilioCallError(response.status, "response has no call SID", retryable=False)
+            return body["sid"]
+
+    async def create_calls(self, numbers: List[str], twiml: str,
+                           calls_per_second: float = TWILIO_CALLS_PER_SECOND) -> List[dict]:
+        """Call every number, starting at most `calls_per_second` calls each second.
+
+        Returns one result per number, in order, with either a call_sid or an error.
+        """
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / calls_per_second
+        start = loop.time()
+
+        async def dial(index: int, to: str) -> dict:
+            await asyncio.sleep(max(0.0, start + index * interval - loop.time()))
+            try:
+                return {"to": to, "call_sid": await self.create_call(to, twiml)}
+            except (TwilioCallError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return {"to": to, "error": str(e)}
+
+        return await asyncio.gather(*(dial(i, to) for i, to in enumerate(numbers)))
@@ -1,52 +1,57 @@
 """Worker Agents for Government/Public Sector Services"""
-from mock_data import SERVICES, CITIZENS, BENEFITS, APPLICATIONS, REQUESTS
+from mock_data import SERVICES, CITIZENS, APPLICATIONS, REQUESTS
 from session_manager import SessionManager
+from records import Application, ServiceRequest
+from service_catalog import get_catalog
+from recommender import get_recommender
+from analytics_tracker import AnalyticsTracker
+from tool_registry import tool
+import asyncio
 import random
-from datetime import datetime
 
 # Information Agent
+@tool("Search government services by name, category, or eligibility",
+      query=("string", "Service name or keyword"),
+      category=("string", "Category like Healthcare, Education, Housing, Employment"),
+      eligibility=("string", "Eligibility group, like students or citizens 60+"))
 async def search_services(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Search services by category, name, or eligibility"""
-    query = arguments.get("query", "").lower()
-    category = arguments.get("category", "").lower()
-    eligibility = arguments.get("eligibility", "").lower()
-    
-    results = []
-    for service_id, service in SERVICES.items():
-        if (query in service["name"].lower() or 
-            category in service["category"].lower() or 
-            query == ""):
-            if eligibility in service.get("eligibility", "").lower() or eligibility == "":
-                results.append(f"{service['name']} - {service_id}")
-    
+    catalog = get_catalog()
+    total, service_ids = catalog.search(
+        arguments.get("query", ""), arguments.get("category", ""), arguments.get("eligibility", "")
+    )
+    if not service_ids and arguments.get("query"):
+        # Misheard or Hindi service names miss the index; fall back to fuzzy matching.
+        # Imported here so fuzzywuzzy loads on first use, not while the bot starts.
+        from fuzzy_matcher import get_matcher
+        service_ids = [service_id for service_id, _ in get_matcher().match(arguments["query"])]
+        total = len(service_ids)
+    results = [f"{catalog.services[service_id]['name']} - {service_id}" for service_id in service_ids]
+
     if results:
-        await result_callback(f"Found {len(results)} services: " + ", ".join(results[:5]))
+        await result_callback(f"Found {total} services: " + ", ".join(results))
     else:
         await result_callback("No services found matching your criteria.")
 
 
+@tool("Get personalized service recommendations based on the citizen's service history",
+      citizen_id=("string", "Citizen ID"))
 async def get_service_recommendations(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Get personalized service recommendations"""
     citizen_id = arguments.get("citizen_id", "CIT001")
     
     citizen = CITIZENS.get(citizen_id, CITIZENS["CIT001"])
-    history = citizen["service_history"]
-    
-    # Simple recommendation: suggest complementary services
-    recommendations = []
-    if any(sid in history for sid in ["SVC001", "SVC008"]):  # Applied for healthcare
-        recommendations.extend(["SVC002", "SVC010"])  # Suggest education and housing
-    if any(sid in history for sid in ["SVC002", "SVC007"]):  # Applied for education
-        recommendations.extend(["SVC001", "SVC009"])  # Suggest healthcare and employment
+    recommendations = get_recommender().recommend(citizen["service_history"])
     
-    if not recommendations:
-        recommendations = ["SVC005", "SVC006", "SVC010"]  # Default recommendations
-    
-    rec_text = ", ".join([f"{SERVICES[sid]['name']}" for sid in recommendations[:3] if sid in SERVICES])
+    rec_text = ", ".join([f"{SERVICES[sid]['name']}" for sid in recommendations if sid in SERVICES])
     await result_callback(f"Based on your profile, I recommend: {rec_text}")
 
 
 # Availability Agent
+@tool("Check whether a service is currently available, overall or in a region",
+      required=["service_id"],
+      service_id=("string", "Service ID like SVC001"),
+      region=("string", "Region name, or all"))
 async def check_service_availability(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Check service availability and status"""
     service_id = arguments.get("service_id", "")
@@ -56,6 +61,7 @@ async def check_service_availability(function_name, tool_call_id, arguments, llm
         await result_callback(f"Service {service_id} not found.")
         return
     
+    AnalyticsTracker.track_service_view(service_id)
     service = SERVICES[service_id]
     availability = service["availability"]
     
@@ -68,6 +74,10 @@ async def check_service_availability(function_name, tool_call_id, arguments, llm
 
 
 # Application Agent
+@tool("Add a service to the citizen's applications",
+      required=["service_id"],
+      session_id=("string", "Session ID"),
+      service_id=("string", "Service ID"))
 async def add_to_applications(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Add services to applications with session tracking"""
     session_id = arguments.get("session_id", "default")
@@ -86,15 +96,18 @@ async def add_to_applications(function_name, tool_call_id, arguments, llm, conte
     if session_id not in APPLICATIONS:
         APPLICATIONS[session_id] = []
     
-    APPLICATIONS[session_id].append({"service_id": service_id, "status": "draft"})
+    APPLICATIONS[session_id].append(Application(service_id))
     
     # Update session
-    SessionManager.update_applications(session_id, APPLICATIONS[session_id])
-    SessionManager.add_conversation(session_id, "system", f"Added {service_id} to applications")
+    # The session store blocks on disk, so keep it off the event loop
+    await asyncio.to_thread(SessionManager.update_applications, session_id, APPLICATIONS[session_id])
+    await asyncio.to_thread(SessionManager.add_conversation, session_id, "system", f"Added {service_id} to applications")
     
     await result_callback(f"Added {service['name']} to your applications.")
 
 
+@tool("View the citizen's current applications and their status",
+      session_id=("string", "Session ID"))
 async def view_applications(function_name, tool_call_id, arguments, llm, context, result_callback):
     """View current applications with status info"""
     session_id = arguments.get("session_id", "default")
@@ -105,14 +118,18 @@ async def view_applications(function_name, tool_call_id, arguments, llm, context
     
     items = []
     for item in APPLICATIONS[session_id]:
-        service = SERVICES[item["service_id"]]
-        status = item["status"]
+        service = SERVICES[item.service_id]
+        status = item.status
         items.append(f"{service['name']} - Status: {status}")
     
     await result_callback(f"Your applications: {', '.join(items)}.")
 
 
 # Benefits Agent
+@tool("Check whether a citizen is eligible for a benefit, and why",
+      required=["benefit_type"],
+      citizen_id=("string", "Citizen ID"),
+      benefit_type=("string", "Benefit like healthcare_subsidy, education_grant, senior_support"))
 async def check_eligibility(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Check eligibility for benefits"""
     citizen_id = arguments.get("citizen_id", "CIT001")
@@ -120,19 +137,23 @@ async def check_eligibility(function_name, tool_call_id, arguments, llm, context
     
     citizen = CITIZENS.get(citizen_id, CITIZENS["CIT001"])
     
-    # Simplified eligibility check
-    eligible = False
-    if benefit_type in BENEFITS:
-        benefit = BENEFITS[benefit_type]
-        if citizen["income"] <= benefit["max_income"] and citizen["age"] >= benefit["min_age"]:
-            eligible = True
-    
-    if eligible:
+    # Imported here so NumPy loads on first use, not while the bot starts
+    from eligibility_engine import get_engine
+    engine = get_engine()
+    if engine.is_eligible(citizen, benefit_type):
         await result_callback(f"You are eligible for {benefit_type}. Additional benefits may apply.")
+        return
+
+    reason = engine.explain(citizen, benefit_type)
+    alternatives = [benefit_id for benefit_id in engine.eligible_for(citizen) if benefit_id != benefit_type]
+    if alternatives:
+        await result_callback(f"{reason} You do qualify for: {', '.join(alternatives)}.")
     else:
-        await result_callback(f"You may not be eligible for {benefit_type} based on current criteria. Let me check alternatives.")
+        await result_callback(f"{reason} Let me check alternatives.")
 
 
+@tool("Check the citizen's benefits points and tier",
+      citizen_id=("string", "Citizen ID"))
 async def check_benefits_points(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Check citizen benefits points with redemption options"""
     citizen_id = arguments.get("citizen_id", "CIT001")
@@ -164,6 +185,9 @@ async def check_benefits_points(function_name, tool_call_id, arguments, llm, con
 
 
 # Application Agent (continued)
+@tool("Submit the citizen's applications",
+      session_id=("string", "Session ID"),
+      citizen_id=("string", "Citizen ID"))
 async def process_application(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Process application submission"""
     session_id = arguments.get("session_id", "default")
@@ -176,12 +200,10 @@ async def process_application(function_name, tool_call_id, arguments, llm, conte
         request_id = f"REQ{random.randint(10000, 99999)}"
         
         # Store request
-        REQUESTS[request_id] = {
-            "citizen_id": citizen_id,
-            "applications": APPLICATIONS.get(session_id, []),
-            "status": "submitted",
-            "created_at": datetime.now().isoformat()
-        }
+        applications = APPLICATIONS.get(session_id, [])
+        citizen = CITIZENS.get(citizen_id, CITIZENS["CIT001"])
+        get_recommender().record_request(citizen["service_history"], [item.service_id for item in applications])
+        REQUESTS[request_id] = ServiceRequest(citizen_id, applications)
         
         # Clear applications
         if session_id in APPLICATIONS:
@@ -193,6 +215,11 @@ async def process_application(function_name, tool_call_id, arguments, llm, conte
 
 
 # Delivery Agent
+@tool("Schedule home delivery or office pickup of documents",
+      required=["request_id"],
+      request_id=("string", "Request ID"),
+      delivery_type=("string", "home or pickup"),
+      date=("string", "Preferred date"))
 async def schedule_document_delivery(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Schedule document delivery or office pickup"""
     request_id = arguments.get("request_id", "REQ12345")
@@ -206,13 +233,16 @@ async def schedule_document_delivery(function_name, tool_call_id, arguments, llm
 
 
 # Post-Service Support Agent
+@tool("Track the status of a submitted request",
+      required=["request_id"],
+      request_id=("string", "Request ID"))
 async def track_request(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Track request status"""
     request_id = arguments.get("request_id", "")
     
     if request_id in REQUESTS:
         request = REQUESTS[request_id]
-        status = request.get("status", "submitted")
+        status = request.status
         await result_callback(f"Request {request_id} status: {status}. Expected processing time: 7-10 business days.")
     else:
         statuses = ["Submitted", "Under review", "Approved", "Processing", "Completed"]
@@ -220,6 +250,11 @@ async def track_request(function_name, tool_call_id, arguments, llm, context, re
         await result_callback(f"Request {request_id} status: {status}. Expected processing time: 7-10 business days.")
 
 
+@tool("Start a revision of, or an update to, a submitted request",
+      required=["request_id"],
+      request_id=("string", "Request ID"),
+      reason=("string", "Why the request needs changing"),
+      action=("string", "revision or update"))
 async def initiate_revision(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Initiate application revision or update"""
     request_id = arguments.get("request_id", "")
@@ -230,29 +265,32 @@ async def initiate_revision(function_name, tool_call_id, arguments, llm, context
     
     # Update request status
     if request_id in REQUESTS:
-        REQUESTS[request_id]["status"] = "revision_initiated" if action == "revision" else "update_initiated"
+        REQUESTS[request_id].status = "revision_initiated" if action == "revision" else "update_initiated"
     
     if action == "revision":
         await result_callback(
-            f"Revision initiated for request {request_id}. Revision ID: {revision_id}. "
+            f"Revision initiated for request {request_id} ({reason}). Revision ID: {revision_id}. "
             f"What changes would you like to make? I can guide you through the process."
         )
     else:
         await result_callback(
-            f"Update initiated for request {request_id}. Update ID: {revision_id}. "
+            f"Update initiated for request {request_id} ({reason}). Update ID: {revision_id}. "
             f"You can submit additional documents or information. "
             f"We'll process the update within 3-5 business days."
         )
 
 
 # Escalation
+@tool("Escalate to a human agent with the conversation context",
+      session_id=("string", "Session ID"),
+      reason=("string", "Reason for escalation"))
 async def escalate_to_human(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Escalate to human agent with context transfer"""
     session_id = arguments.get("session_id", "default")
     reason = arguments.get("reason", "general inquiry")
     
     # Get session context for human agent
-    context_summary = SessionManager.get_context_summary(session_id)
+    context_summary = await asyncio.to_thread(SessionManager.get_context_summary, session_id)
     
     await result_callback(
         f"I'm connecting you to a human agent who can better assist with {reason}. "
@@ -260,9 +298,11 @@ async def escalate_to_human(function_name, tool_call_id, arguments, llm, context
     )
 
 
+@tool("Get session context for continuity across channels",
+      session_id=("string", "Session ID"))
 async def get_session_context(function_name, tool_call_id, arguments, llm, context, result_callback):
     """Retrieve session context for continuity"""
     session_id = arguments.get("session_id", "default")
     
-    summary = SessionManager.get_context_summary(session_id)
+    summary = await asyncio.to_thread(SessionManager.get_context_summary, session_id)
     await result_callback(summary)